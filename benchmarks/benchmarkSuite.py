@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from python_ifconfig_me.core.getPublicIP import PublicIPClient, getPublicIPAsync
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.callbackIPRetriever import CallbackIPRetriever
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetriever,
+)
+from python_ifconfig_me.core.vote.votingStrategy import (
+    SimpleVotingStrategy,
+    VotingStrategyContext,
+)
+from python_ifconfig_me.testing.echoServer import EchoServer, lognormalLatency
+
+
+@dataclass
+class BenchmarkConfig:
+    retrievers: int = 8
+    # Lookups measured one after the other for the latency percentiles.
+    iterations: int = 50
+    # Lookups run with `concurrency` in flight for the throughput.
+    lookups: int = 500
+    concurrency: int = 50
+    latency_median: float = 0.01
+    latency_sigma: float = 0.5
+    error_rate: float = 0
+    body_size: Optional[int] = None
+    vote_sizes: Tuple[int, ...] = (8, 100, 500)
+    vote_repeat: int = 200
+    # Fresh interpreters started to measure the startup cost.
+    startup_repeat: int = 10
+    seed: int = 0
+
+
+@dataclass
+class BenchmarkReport:
+    metadata: Dict[str, Any]
+    config: Dict[str, Any]
+    results: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)]
+
+    return {
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": ordered[-1],
+        "mean": sum(ordered) / len(ordered),
+    }
+
+
+def getMetadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+    }
+
+
+def makeRetrievers(server: EchoServer, count: int) -> List[IPRetriever]:
+    return [CallbackIPRetriever(url, str.strip) for url in server.urls(count)]
+
+
+async def benchmarkLatencyAsync(
+    config: BenchmarkConfig, retrievers: List[IPRetriever]
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    samples = []
+    for _ in range(config.iterations):
+        start = time.perf_counter()
+        await getPublicIPAsync(ipRetrievers=retrievers)
+        samples.append(time.perf_counter() - start)
+    results["latency.getPublicIPAsync"] = percentiles(samples)
+
+    samples = []
+    async with PublicIPClient(ipRetrievers=retrievers) as client:
+        for _ in range(config.iterations):
+            start = time.perf_counter()
+            await client.getPublicIPAsync()
+            samples.append(time.perf_counter() - start)
+    results["latency.PublicIPClient"] = percentiles(samples)
+    return results
+
+
+async def benchmarkThroughputAsync(
+    config: BenchmarkConfig, retrievers: List[IPRetriever]
+) -> Dict[str, Dict[str, float]]:
+    semaphore = asyncio.Semaphore(config.concurrency)
+
+    async with PublicIPClient(ipRetrievers=retrievers) as client:
+
+        async def lookup() -> None:
+            async with semaphore:
+                await client.getPublicIPAsync()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(lookup() for _ in range(config.lookups)))
+        elapsed = time.perf_counter() - start
+    return {
+        "throughput.PublicIPClient": {
+            "lookupsPerSecond": config.lookups / elapsed,
+            "elapsed": elapsed,
+        }
+    }
+
+
+async def benchmarkMemoryAsync(
+    config: BenchmarkConfig, retrievers: List[IPRetriever]
+) -> Dict[str, Dict[str, float]]:
+    tracemalloc.start()
+    try:
+        async with PublicIPClient(ipRetrievers=retrievers) as client:
+            await asyncio.gather(
+                *(client.getPublicIPAsync() for _ in range(config.concurrency))
+            )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        maxRSS *= 1024
+    return {
+        "memory.concurrentLookups": {
+            "tracedPeakBytes": peak,
+            "tracedPeakBytesPerLookup": peak / config.concurrency,
+            "maxRSSBytes": maxRSS,
+        }
+    }
+
+
+def measureImportTime(module: str) -> float:
+    # Seconds spent importing `module` and everything it imports in a fresh
+    # interpreter, as reported by `python -X importtime`.
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    for line in reversed(output.splitlines()):
+        # import time: <self us> | <cumulative us> | <indented module name>
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    raise ValueError(f"{module} not found in the output of -X importtime")
+
+
+def benchmarkStartup(config: BenchmarkConfig) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for module in ("python_ifconfig_me", "python_ifconfig_me.cli"):
+        samples = [measureImportTime(module) for _ in range(config.startup_repeat)]
+        results[f"startup.import.{module}"] = percentiles(samples)
+    samples = []
+    for _ in range(config.startup_repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "python_ifconfig_me.cli", "--help"],
+            capture_output=True,
+            check=True,
+        )
+        samples.append(time.perf_counter() - start)
+    results["startup.cli.help"] = percentiles(samples)
+    return results
+
+
+def benchmarkVoting(config: BenchmarkConfig) -> Dict[str, Dict[str, float]]:
+    rng = random.Random(config.seed)
+    strategy = SimpleVotingStrategy()
+    context = VotingStrategyContext(prefer_ipv6=False, ipv4=False, ipv6=False)
+    results = {}
+    for size in config.vote_sizes:
+        # Mostly agreeing answers with a few outliers, like real services.
+        ipResults = [
+            IPResultObject(
+                IPObject(
+                    "203.0.113.1"
+                    if rng.random() < 0.9
+                    else f"198.51.100.{rng.randint(1, 254)}"
+                )
+            )
+            for _ in range(size)
+        ]
+        start = time.perf_counter()
+        for _ in range(config.vote_repeat):
+            strategy.vote(ipResults, context)
+        elapsed = time.perf_counter() - start
+        results[f"voting.SimpleVotingStrategy.{size}"] = {
+            "secondsPerVote": elapsed / config.vote_repeat
+        }
+    return results
+
+
+async def runBenchmarksAsync(config: BenchmarkConfig) -> BenchmarkReport:
+    report = BenchmarkReport(metadata=getMetadata(), config=asdict(config))
+    server = EchoServer(
+        latency=lognormalLatency(config.latency_median, config.latency_sigma),
+        error_rate=config.error_rate,
+        body_size=config.body_size,
+        seed=config.seed,
+    )
+    async with server:
+        retrievers = makeRetrievers(server, config.retrievers)
+        report.results.update(await benchmarkLatencyAsync(config, retrievers))
+        report.results.update(await benchmarkThroughputAsync(config, retrievers))
+        report.results.update(await benchmarkMemoryAsync(config, retrievers))
+    report.results.update(benchmarkVoting(config))
+    report.results.update(benchmarkStartup(config))
+    return report
+
+
+def compareReports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    lines = []
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            old = baseline.get("results", {}).get(name, {}).get(metric)
+            if old:
+                lines.append(
+                    f"{name}.{metric}: {old:.6g} -> {value:.6g} ({value / old:.2f}x)"
+                )
+            else:
+                lines.append(f"{name}.{metric}: {value:.6g} (new)")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark python-ifconfig-me against local stand-in IP services.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    defaults = BenchmarkConfig()
+    parser.add_argument("--retrievers", type=int, default=defaults.retrievers)
+    parser.add_argument("--iterations", type=int, default=defaults.iterations)
+    parser.add_argument("--lookups", type=int, default=defaults.lookups)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--latency-median", type=float, default=defaults.latency_median)
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--body-size", type=int, default=defaults.body_size)
+    parser.add_argument(
+        "--vote-sizes", type=int, nargs="+", default=list(defaults.vote_sizes)
+    )
+    parser.add_argument("--startup-repeat", type=int, default=defaults.startup_repeat)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument(
+        "--compare", help="Compare the results with a previous JSON output."
+    )
+    args = parser.parse_args()
+    config = BenchmarkConfig(
+        retrievers=args.retrievers,
+        iterations=args.iterations,
+        lookups=args.lookups,
+        concurrency=args.concurrency,
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        body_size=args.body_size,
+        vote_sizes=tuple(args.vote_sizes),
+        startup_repeat=args.startup_repeat,
+        seed=args.seed,
+    )
+    report = asdict(asyncio.run(runBenchmarksAsync(config)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compareReports(json.load(f), report)))
+    else:
+        print(json.dumps(report["results"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.benchmarkSuite import makeRetrievers
+from python_ifconfig_me.core.getPublicIP import PublicIPClient, getPublicIPAsync
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.vote.statisticsInformationItem import (
+    VotingStatisticsItem,
+)
+from python_ifconfig_me.testing.echoServer import EchoServer, lognormalLatency
+
+MODES = ("getPublicIPAsync", "PublicIPClient")
+
+
+@dataclass
+class StressConfig:
+    # getPublicIPAsync opens a session for every lookup, PublicIPClient shares
+    # one across all of them like a long-lived service would.
+    mode: str = "getPublicIPAsync"
+    lookups: int = 2000
+    concurrency: int = 200
+    retrievers: int = 4
+    latency_median: float = 0.05
+    latency_sigma: float = 0.5
+    error_rate: float = 0
+    # Lookups in flight compete for the CPU with the stand-in servers, so
+    # too many of them time out rather than exhaust resources.
+    timeout: float = 5
+    return_statistics: bool = True
+    # Seconds between samples of the file descriptors, connections and RSS.
+    sample_interval: float = 0.05
+    top_allocators: int = 10
+    seed: int = 0
+
+
+@dataclass
+class StressReport:
+    config: Dict[str, Any]
+    elapsed: float = 0
+    failedLookups: int = 0
+    fdLimit: Optional[int] = None
+    fds: Dict[str, Optional[int]] = field(default_factory=dict)
+    connections: Dict[str, Optional[int]] = field(default_factory=dict)
+    rssBytes: Dict[str, Optional[int]] = field(default_factory=dict)
+    tracedPeakBytes: int = 0
+    # Allocations still alive after the run, by source line.
+    topAllocators: List[Dict[str, Any]] = field(default_factory=list)
+    # Objects created by the run and still alive after it, which is only
+    # ever expected of the retrievers.
+    leakedObjects: Dict[str, int] = field(default_factory=dict)
+    # "Unclosed client session" and similar reports of the event loop.
+    unclosedWarnings: List[str] = field(default_factory=list)
+    leaks: List[str] = field(default_factory=list)
+
+
+def countFds() -> Optional[int]:
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return None
+
+
+def countConnections(port: int) -> Optional[int]:
+    # Established TCP connections to `port`, as listed by the Linux kernel.
+    # Counting the remote port leaves out the server's end of them.
+    count = 0
+    found = False
+    for path in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(path) as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        found = True
+        for line in lines:
+            parts = line.split()
+            # sl local_address rem_address st ...
+            if parts[3] == "01" and int(parts[2].rsplit(":", 1)[1], 16) == port:
+                count += 1
+    return count if found else None
+
+
+def getRSS() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def getMaxRSS() -> int:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxRSS if sys.platform == "darwin" else maxRSS * 1024
+
+
+def raiseFdLimit() -> int:
+    # Thousands of lookups in flight need more descriptors than the usual soft
+    # limit of 1024, both ends of every connection being in this process.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            soft = hard
+        except (OSError, ValueError):
+            pass
+    return soft
+
+
+def countLiveObjects() -> Dict[str, int]:
+    gc.collect()
+    counts = {
+        "ClientSession": 0,
+        "Transport": 0,
+        "IPResultObject": 0,
+        "VotingStatisticsItem": 0,
+    }
+    for obj in gc.get_objects():
+        if isinstance(obj, aiohttp.ClientSession):
+            counts["ClientSession"] += not obj.closed
+        elif isinstance(obj, asyncio.BaseTransport):
+            counts["Transport"] += not obj.is_closing()
+        elif isinstance(obj, IPResultObject):
+            counts["IPResultObject"] += 1
+        elif isinstance(obj, VotingStatisticsItem):
+            counts["VotingStatisticsItem"] += 1
+    return counts
+
+
+class Sampler:
+
+    def __init__(self, port: int, interval: float) -> None:
+        self.port = port
+        self.interval = interval
+        self.peakFds: Optional[int] = None
+        self.peakConnections: Optional[int] = None
+        self.peakRSS: Optional[int] = None
+
+    def sample(self) -> None:
+        self.peakFds = maxOrNone(self.peakFds, countFds())
+        self.peakConnections = maxOrNone(
+            self.peakConnections, countConnections(self.port)
+        )
+        self.peakRSS = maxOrNone(self.peakRSS, getRSS())
+
+    async def runAsync(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+
+def maxOrNone(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None:
+        return b
+    return a if b is None else max(a, b)
+
+
+async def runStressAsync(config: StressConfig) -> StressReport:
+    if config.mode not in MODES:
+        raise ValueError(f"Unknown mode {config.mode!r}, expected one of {MODES}")
+    report = StressReport(config=asdict(config), fdLimit=raiseFdLimit())
+    loop = asyncio.get_running_loop()
+    previousHandler = loop.get_exception_handler()
+    loop.set_exception_handler(
+        lambda loop, context: report.unclosedWarnings.append(context["message"])
+    )
+    server = EchoServer(
+        latency=lognormalLatency(config.latency_median, config.latency_sigma),
+        error_rate=config.error_rate,
+        seed=config.seed,
+    )
+    options = GetPublicIPOptions(
+        timeout=config.timeout, return_statistics=config.return_statistics
+    )
+    # Measured with the stand-in servers stopped on both sides, so that only
+    # what the lookups left behind counts.
+    before = countLiveObjects()
+    fdsBefore = countFds()
+    rssBefore = getRSS()
+    tracemalloc.start()
+    snapshotBefore = tracemalloc.take_snapshot()
+    try:
+        async with server:
+            retrievers = makeRetrievers(server, config.retrievers)
+            sampler = Sampler(server.port, config.sample_interval)
+            samplerTask = asyncio.ensure_future(sampler.runAsync())
+            semaphore = asyncio.Semaphore(config.concurrency)
+            client = PublicIPClient(
+                ipRetrievers=retrievers, limit=config.concurrency * config.retrievers
+            )
+
+            async def lookup() -> None:
+                async with semaphore:
+                    if config.mode == "PublicIPClient":
+                        result = await client.getPublicIPAsync(options)
+                    else:
+                        result = await getPublicIPAsync(options, retrievers)
+                    if result is None:
+                        report.failedLookups += 1
+
+            start = time.perf_counter()
+            try:
+                await asyncio.gather(*(lookup() for _ in range(config.lookups)))
+            finally:
+                report.elapsed = time.perf_counter() - start
+                sampler.sample()
+                samplerTask.cancel()
+                await asyncio.gather(samplerTask, return_exceptions=True)
+                await client.close()
+            # Closed connections are only released by the next iterations of
+            # the event loop.
+            await asyncio.sleep(0.1)
+            report.connections = {
+                "peak": sampler.peakConnections,
+                "after": countConnections(server.port),
+            }
+        await asyncio.sleep(0.1)
+        _, report.tracedPeakBytes = tracemalloc.get_traced_memory()
+        snapshotAfter = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        loop.set_exception_handler(previousHandler)
+    after = countLiveObjects()
+    report.fds = {"before": fdsBefore, "peak": sampler.peakFds, "after": countFds()}
+    report.rssBytes = {
+        "before": rssBefore,
+        "peak": sampler.peakRSS,
+        "after": getRSS(),
+        "max": getMaxRSS(),
+    }
+    for stat in snapshotAfter.compare_to(snapshotBefore, "lineno")[
+        : config.top_allocators
+    ]:
+        frame = stat.traceback[0]
+        report.topAllocators.append(
+            {
+                "location": f"{frame.filename}:{frame.lineno}",
+                "sizeDiffBytes": stat.size_diff,
+                "countDiff": stat.count_diff,
+            }
+        )
+    report.leakedObjects = {
+        name: after[name] - before[name]
+        for name in before
+        if after[name] > before[name]
+    }
+    report.leaks = findLeaks(report)
+    return report
+
+
+def findLeaks(report: StressReport) -> List[str]:
+    leaks = []
+    for name, count in report.leakedObjects.items():
+        leaks.append(f"{count} {name} objects outlived the run")
+    before, after = report.fds.get("before"), report.fds.get("after")
+    if before is not None and after is not None and after > before:
+        leaks.append(f"{after - before} file descriptors were not released")
+    if report.connections.get("after"):
+        leaks.append(f"{report.connections['after']} connections are still open")
+    for message in report.unclosedWarnings:
+        leaks.append(message)
+    return leaks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run many concurrent lookups against local stand-in IP services and report resource use and leaks.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    defaults = StressConfig()
+    parser.add_argument("--mode", choices=MODES, default=defaults.mode)
+    parser.add_argument("--lookups", type=int, default=defaults.lookups)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--retrievers", type=int, default=defaults.retrievers)
+    parser.add_argument("--latency-median", type=float, default=defaults.latency_median)
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--timeout", type=float, default=defaults.timeout)
+    parser.add_argument(
+        "--no-statistics",
+        dest="return_statistics",
+        action="store_false",
+        help="Don't ask the lookups for voting statistics.",
+    )
+    parser.add_argument(
+        "--sample-interval", type=float, default=defaults.sample_interval
+    )
+    parser.add_argument("--top-allocators", type=int, default=defaults.top_allocators)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--output", help="Write the report as JSON to this file.")
+    args = parser.parse_args()
+    config = StressConfig(
+        mode=args.mode,
+        lookups=args.lookups,
+        concurrency=args.concurrency,
+        retrievers=args.retrievers,
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        timeout=args.timeout,
+        return_statistics=args.return_statistics,
+        sample_interval=args.sample_interval,
+        top_allocators=args.top_allocators,
+        seed=args.seed,
+    )
+    report = asdict(asyncio.run(runStressAsync(config)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    # A non-zero status lets CI fail on a leak.
+    if report["leaks"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,55 @@
-from .core.getPublicIP import getPublicIP, getPublicIPAsync, GetPublicIPOptions
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .core.batch import resolveProxiesAsync
+    from .core.cache import PublicIPCache
+    from .core.instrumentation import MetricsCollector, NDJSONObserver
+    from .core.getPublicIP import (
+        getPublicIP,
+        getDualStackPublicIPAsync,
+        getPublicIPAsync,
+        getPublicIPFuture,
+        PublicIPClient,
+    )
+    from .core.localClient import getPublicIPLocal, getPublicIPLocalAsync
+    from .core.options import GetPublicIPOptions
+    from .core.scoreboard import Scoreboard
+    from .core.circuitBreaker import CircuitBreakers
+    from .core.rateLimit import RateLimitScheduler
+    from .core.scheduler import HedgeStatistics
+    from .core.vote.reliabilityWeightedVotingStrategy import (
+        ReliabilityWeightedVotingStrategy,
+    )
+    from .core.watch import watchPublicIPAsync
+
+# The public API is imported on first access so that importing the package,
+# e.g. from the CLI, doesn't import aiohttp until a lookup is needed.
+_LAZY_ATTRIBUTES = {
+    "getPublicIP": ".core.getPublicIP",
+    "getPublicIPAsync": ".core.getPublicIP",
+    "getPublicIPFuture": ".core.getPublicIP",
+    "getDualStackPublicIPAsync": ".core.getPublicIP",
+    "PublicIPClient": ".core.getPublicIP",
+    "GetPublicIPOptions": ".core.options",
+    "getPublicIPLocal": ".core.localClient",
+    "getPublicIPLocalAsync": ".core.localClient",
+    "PublicIPCache": ".core.cache",
+    "Scoreboard": ".core.scoreboard",
+    "CircuitBreakers": ".core.circuitBreaker",
+    "RateLimitScheduler": ".core.rateLimit",
+    "HedgeStatistics": ".core.scheduler",
+    "watchPublicIPAsync": ".core.watch",
+    "MetricsCollector": ".core.instrumentation",
+    "NDJSONObserver": ".core.instrumentation",
+    "resolveProxiesAsync": ".core.batch",
+    "ReliabilityWeightedVotingStrategy": ".core.vote.reliabilityWeightedVotingStrategy",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
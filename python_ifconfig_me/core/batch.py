@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import sys
+import time
+from dataclasses import dataclass, replace
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+from python_ifconfig_me.core.getPublicIP import PublicIPClient
+from python_ifconfig_me.core.ipretriever import getDefaultIPRetrievers
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetriever,
+    IPRetrieverContext,
+)
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.rateLimit import RateLimiter, getHost
+from python_ifconfig_me.core.vote.votingStrategy import IVotingStrategy, VotingResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProxyResult:
+    proxy: str
+    # The public IP the proxy exits from, None if it couldn't be found.
+    ip: Optional[str]
+    elapsed: float
+    error: Optional[str] = None
+    result: Optional[VotingResult] = None
+
+    def toDict(self) -> Dict[str, object]:
+        return {
+            "proxy": self.proxy,
+            "ip": self.ip,
+            "elapsed": round(self.elapsed, 6),
+            "error": self.error,
+        }
+
+
+class RateLimitedIPRetriever(IPRetriever):
+    # Waits for the limiter before every request, keyed by the host of the
+    # retriever's URL, so that a provider is queried at the same rate however
+    # many proxies the requests go through.
+
+    def __init__(self, ipRetriever: IPRetriever, limiter: RateLimiter) -> None:
+        self.ipRetriever = ipRetriever
+        self.limiter = limiter
+        self.url = getattr(ipRetriever, "url", None)
+        self.priority = getattr(ipRetriever, "priority", 0)
+        self._key = getHost(self.url) if self.url else id(ipRetriever)
+
+    async def getIPAsync(self, context: IPRetrieverContext) -> IPResultObject:
+        await self.limiter.acquire(self._key)
+        return await self.ipRetriever.getIPAsync(context)
+
+
+async def readLinesAsync(path: str) -> AsyncIterator[str]:
+    # The non-empty lines of a file, or of standard input for "-", without
+    # comments. Lines are read in a thread so that a slow producer on
+    # standard input doesn't block the lookups in progress.
+    loop = asyncio.get_running_loop()
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        while True:
+            line = await loop.run_in_executor(None, f.readline)
+            if not line:
+                break
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+async def iterateAsync(
+    items: Union[Iterable[str], AsyncIterable[str]],
+) -> AsyncIterator[str]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def resolveProxiesAsync(
+    proxies: Union[Iterable[str], AsyncIterable[str]],
+    options: Optional[GetPublicIPOptions] = None,
+    ipRetrievers: Optional[List[IPRetriever]] = None,
+    votingStrategy: Optional[IVotingStrategy] = None,
+    concurrency: int = 100,
+    rate_limit: Optional[float] = None,
+    rate_burst: float = 1,
+    client: Optional[PublicIPClient] = None,
+) -> AsyncIterator[ProxyResult]:
+    # Yields the egress IP of every proxy in the order the lookups finish.
+    # Proxies are read from `proxies` only as lookups complete, so at most
+    # `concurrency` of them are held at a time and the input may be endless.
+    if options is None:
+        options = GetPublicIPOptions(early_exit=True)
+    if ipRetrievers is None:
+        ipRetrievers = getDefaultIPRetrievers()
+    if rate_limit is not None:
+        limiter = RateLimiter(rate_limit, rate_burst)
+        ipRetrievers = [RateLimitedIPRetriever(r, limiter) for r in ipRetrievers]
+    ownsClient = client is None
+    if client is None:
+        # One pooled session for every HTTP proxy. `concurrency` already
+        # bounds the number of connections.
+        client = PublicIPClient(limit=0)
+
+    async def resolve(proxy: str) -> ProxyResult:
+        assert client is not None
+        start = time.perf_counter()
+        try:
+            result = await client.getPublicIPAsync(
+                replace(options, proxy=proxy), ipRetrievers, votingStrategy
+            )
+        except Exception as e:
+            logger.warning(f"Run into error resolving proxy {proxy}: {e!r}")
+            return ProxyResult(proxy, None, time.perf_counter() - start, repr(e))
+        elapsed = time.perf_counter() - start
+        if result is None:
+            return ProxyResult(proxy, None, elapsed, "No successful API call")
+        return ProxyResult(proxy, result.ip, elapsed, result=result)
+
+    pending: Set["asyncio.Task[ProxyResult]"] = set()
+    iterator = iterateAsync(proxies).__aiter__()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    proxy = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(resolve(proxy)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if ownsClient:
+            await client.close()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+
+logger = logging.getLogger(__name__)
+
+FetchCallback = Callable[[], Awaitable[Optional[VotingResult]]]
+
+
+@dataclass
+class CacheEntry:
+    result: VotingResult
+    createdAt: float
+
+
+class PublicIPCache:
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        maxsize: int = 16,
+        stale_ttl: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # How long past its TTL an entry may still be returned while it is
+        # being refreshed in the background.
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Hashable, "asyncio.Task[Optional[VotingResult]]"] = {}
+
+    @staticmethod
+    def makeKey(
+        options: GetPublicIPOptions,
+    ) -> Tuple[bool, bool, bool, Optional[str]]:
+        return (options.ipv4, options.ipv6, options.prefer_ipv6, options.proxy)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def getAsync(
+        self, options: GetPublicIPOptions, fetch: FetchCallback
+    ) -> Optional[VotingResult]:
+        # fetch must always return the statistics, which are stripped here for
+        # callers that didn't ask for them.
+        key = self.makeKey(options)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry.createdAt
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                return self._present(entry.result, options)
+            if age < self.ttl + self.stale_ttl:
+                logger.debug(f"Serving stale result for {key} while refreshing")
+                self._entries.move_to_end(key)
+                self._startRefresh(key, fetch)
+                return self._present(entry.result, options)
+        # shield() keeps one cancelled caller from cancelling the lookup that
+        # other callers are waiting for.
+        result = await asyncio.shield(self._startRefresh(key, fetch))
+        if result is None:
+            return None
+        return self._present(result, options)
+
+    def invalidate(self, options: Optional[GetPublicIPOptions] = None) -> None:
+        if options is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            key = self.makeKey(options)
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def _startRefresh(
+        self, key: Hashable, fetch: FetchCallback
+    ) -> "asyncio.Task[Optional[VotingResult]]":
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(key, fetch))
+            task.add_done_callback(self._logFailure)
+            self._inflight[key] = task
+        return task
+
+    @staticmethod
+    def _logFailure(task: "asyncio.Task[Optional[VotingResult]]") -> None:
+        # Background refreshes have nobody awaiting them.
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                f"Refreshing the cached public IP failed: {task.exception()}"
+            )
+
+    async def _refresh(
+        self, key: Hashable, fetch: FetchCallback
+    ) -> Optional[VotingResult]:
+        task = asyncio.current_task()
+        try:
+            result = await fetch()
+        finally:
+            # An invalidation while the lookup was running unregisters it.
+            isCurrent = self._inflight.get(key) is task
+            if isCurrent:
+                del self._inflight[key]
+        # Failed lookups aren't cached, and neither are the results of lookups
+        # that were invalidated while they were running.
+        if result is not None and isCurrent:
+            self._entries[key] = CacheEntry(result, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def _present(
+        self, result: VotingResult, options: GetPublicIPOptions
+    ) -> VotingResult:
+        if options.return_statistics:
+            return replace(result, statistics=list(result.statistics))
+        return replace(result, statistics=[])
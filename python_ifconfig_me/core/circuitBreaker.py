@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject, IPRetriever
+from python_ifconfig_me.core.scoreboard import getRetrieverKey
+from python_ifconfig_me.utils.atomicWrite import writeFileAtomic
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreakerState:
+    state: str = CLOSED
+    # Failed calls in a row, and how many of them timed out.
+    failures: int = 0
+    timeouts: int = 0
+    # Times the breaker opened in a row, which drives the backoff.
+    trips: int = 0
+    # When an open breaker lets a probe call through.
+    retryAt: Optional[float] = None
+    updatedAt: Optional[float] = None
+
+
+def getBreakerKey(
+    retriever: IPRetriever, family: socket.AddressFamily = socket.AF_UNSPEC
+) -> str:
+    # A service unreachable over IPv6 may be fine over IPv4, so lookups
+    # pinned to a family have breakers of their own.
+    key = getRetrieverKey(retriever)
+    return key if family == socket.AF_UNSPEC else f"{key} ({family.name})"
+
+
+class CircuitBreakers:
+    # One breaker per retriever. A breaker opens after `failure_threshold`
+    # failed calls in a row and the retriever is skipped until `retryAt`,
+    # an exponential backoff from `base_delay` up to `max_delay` shortened by
+    # up to `jitter` of it at random, so that clients don't probe in step.
+    # Then a single call goes through as a probe: the breaker closes if it
+    # succeeds and opens again for longer if it fails. A failure_threshold
+    # of None never opens the breakers.
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = 3,
+        base_delay: float = 30,
+        max_delay: float = 900,
+        jitter: float = 0.2,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._states: Dict[str, CircuitBreakerState] = {}
+        # Breakers whose probe is in flight, not persisted.
+        self._probing: Set[str] = set()
+
+    def getState(
+        self, retriever: IPRetriever, family: socket.AddressFamily = socket.AF_UNSPEC
+    ) -> CircuitBreakerState:
+        with self._lock:
+            state = self._states.get(getBreakerKey(retriever, family))
+            return CircuitBreakerState() if state is None else replace(state)
+
+    def admit(
+        self,
+        retrievers: List[IPRetriever],
+        family: socket.AddressFamily = socket.AF_UNSPEC,
+    ) -> List[IPRetriever]:
+        # The retrievers to call in a lookup. Every retriever is called when
+        # all breakers are open, rather than failing without trying.
+        now = self._clock()
+        admitted = []
+        with self._lock:
+            for retriever in retrievers:
+                key = getBreakerKey(retriever, family)
+                state = self._states.get(key)
+                if state is None or state.state == CLOSED:
+                    admitted.append(retriever)
+                elif key in self._probing:
+                    continue
+                elif state.retryAt is None or now >= state.retryAt:
+                    state.state = HALF_OPEN
+                    state.updatedAt = now
+                    self._probing.add(key)
+                    admitted.append(retriever)
+        if not admitted and retrievers:
+            logger.warning("All circuit breakers are open, calling every retriever")
+            return list(retrievers)
+        return admitted
+
+    def record(
+        self,
+        admitted: List[IPRetriever],
+        results: List[IPResultObject],
+        family: socket.AddressFamily = socket.AF_UNSPEC,
+    ) -> None:
+        # `results` may miss admitted retrievers that were cancelled, whose
+        # probes are given back so that the next lookup can probe again.
+        now = self._clock()
+        with self._lock:
+            for result in results:
+                retriever = result.getRetriever()
+                if retriever is None:
+                    continue
+                key = getBreakerKey(retriever, family)
+                self._probing.discard(key)
+                state = self._states.setdefault(key, CircuitBreakerState())
+                state.updatedAt = now
+                if result.ipObject.ip is not None:
+                    state.state = CLOSED
+                    state.failures = state.timeouts = state.trips = 0
+                    state.retryAt = None
+                    continue
+                state.failures += 1
+                state.timeouts += isinstance(result.error, asyncio.TimeoutError)
+                if state.state == HALF_OPEN or (
+                    state.state == CLOSED
+                    and self.failure_threshold is not None
+                    and state.failures >= self.failure_threshold
+                ):
+                    self._open(key, state, now)
+            for retriever in admitted:
+                key = getBreakerKey(retriever, family)
+                if key in self._probing:
+                    self._probing.discard(key)
+                    self._states[key].state = OPEN
+
+    def snapshot(self) -> Dict[str, CircuitBreakerState]:
+        with self._lock:
+            return {key: replace(state) for key, state in self._states.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._probing.clear()
+
+    def save(self, path: Union[str, Path]) -> None:
+        content = json.dumps({k: asdict(v) for k, v in self.snapshot().items()})
+        writeFileAtomic(path, content)
+
+    def load(self, path: Union[str, Path]) -> None:
+        try:
+            with open(path) as f:
+                content = json.load(f)
+            states = {
+                key: CircuitBreakerState(**value) for key, value in content.items()
+            }
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable circuit breaker file {path}: {e}")
+            return
+        with self._lock:
+            for key, state in states.items():
+                # A probe in flight in another process is over by now.
+                if state.state == HALF_OPEN:
+                    state.state = OPEN
+                self._states[key] = state
+
+    def _open(self, key: str, state: CircuitBreakerState, now: float) -> None:
+        state.trips += 1
+        delay = min(self.base_delay * 2 ** (state.trips - 1), self.max_delay)
+        delay *= 1 - self.jitter * self._rng.random()
+        state.state = OPEN
+        state.retryAt = now + delay
+        logger.info(f"Circuit breaker of {key} open for {delay:.0f}s")
+
+
+_defaultCircuitBreakers: Optional[CircuitBreakers] = None
+_defaultCircuitBreakersLock = threading.Lock()
+
+
+def getDefaultCircuitBreakers() -> CircuitBreakers:
+    # Shared by every client in the process that isn't given its own.
+    global _defaultCircuitBreakers
+    with _defaultCircuitBreakersLock:
+        if _defaultCircuitBreakers is None:
+            _defaultCircuitBreakers = CircuitBreakers()
+        return _defaultCircuitBreakers
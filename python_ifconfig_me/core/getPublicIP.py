@@ -1,18 +1,52 @@
 import asyncio
+import concurrent.futures
 import logging
+import socket
 import sys
-from dataclasses import dataclass
-from typing import List, Optional, TypedDict
+import threading
+from dataclasses import dataclass, replace
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+)
 
-from python_ifconfig_me.core.ipretriever import DEFAULT_IP_RETRIEVERS
-from python_ifconfig_me.utils.async_ import run_async
+from python_ifconfig_me.core.cache import PublicIPCache
+from python_ifconfig_me.core.circuitBreaker import (
+    CircuitBreakers,
+    getDefaultCircuitBreakers,
+)
+from python_ifconfig_me.core.instrumentation import LookupObserver, notifyVote
+from python_ifconfig_me.core.ipretriever import getDefaultIPRetrievers
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.proxy import isSocksProxy, openSocksSession
+from python_ifconfig_me.core.rateLimit import (
+    RateLimitScheduler,
+    getDefaultRateLimitScheduler,
+)
+from python_ifconfig_me.core.scheduler import (
+    HedgeStatistics,
+    SettledCallback,
+    getIPTimedAsync,
+    retrieveUntilSettledAsync,
+)
+from python_ifconfig_me.core.scoreboard import Scoreboard
+from python_ifconfig_me.utils.async_ import BackgroundLoop, getBackgroundLoop
 
 if sys.version_info >= (3, 11):
     from typing import Unpack
 else:
     from typing_extensions import Unpack
 
-import aiohttp
+# aiohttp takes longer to import than the rest of the package together, so
+# it's only imported once a session is created.
+if TYPE_CHECKING:
+    import aiohttp
 
 from python_ifconfig_me.core.ipretriever.ipRetriever import (
     IPResultObject,
@@ -20,6 +54,7 @@ from python_ifconfig_me.core.ipretriever.ipRetriever import (
     IPRetrieverContext,
 )
 from python_ifconfig_me.core.vote.votingStrategy import (
+    IVotingStrategy,
     SimpleVotingStrategy,
     VotingResult,
     VotingStrategyContext,
@@ -30,17 +65,32 @@ rootLogger = logging.getLogger(__name__.split(".")[0])
 rootLogger.setLevel(logging.ERROR)
 
 
-@dataclass
-class GetPublicIPOptions:
-    return_statistics: bool = False
-    ipv6: bool = False
-    ipv4: bool = False
-    prefer_ipv6: bool = False
-    timeout: int = 5
-
-
-class RetrieveIPsAsyncKwargs(TypedDict):
-    timeout: int
+class RetrieveIPsAsyncKwargs(TypedDict, total=False):
+    timeout: float
+    # Event loop time by which pending retrievers are cancelled, and the
+    # budgets of the phases of each request, see GetPublicIPOptions.
+    deadline: float
+    connectTimeout: float
+    tlsTimeout: float
+    readTimeout: float
+    isSettled: SettledCallback
+    # Staged scheduling, see retrieveUntilSettledAsync. Only used together
+    # with isSettled.
+    initial: int
+    hedgeDelay: float
+    hedgeStatistics: HedgeStatistics
+    observers: Sequence[LookupObserver]
+    # Called right before each request, which is skipped when it returns
+    # False, e.g. RateLimitScheduler.tryAcquire.
+    tryAcquire: Callable[[IPRetriever], bool]
+    # An externally owned session, which is left open. A short-lived session
+    # is created for the call when it is omitted.
+    session: "aiohttp.ClientSession"
+    # HTTP proxy to send the requests through, see IPRetrieverContext.
+    proxy: str
+    # socket.AF_INET or socket.AF_INET6 to only connect over that family.
+    # Ignored when a session is given.
+    family: socket.AddressFamily
 
 
 async def retrieveIPsAsync(
@@ -48,35 +98,361 @@ async def retrieveIPsAsync(
     **kwargs: Unpack[RetrieveIPsAsyncKwargs],
 ) -> List[IPResultObject]:
     timeout = kwargs.get("timeout", 5)
-    context = IPRetrieverContext(session=aiohttp.ClientSession(), timeout=timeout)
-    async with context.session:
-        tasks = [ipRetriever.getIPAsync(context) for ipRetriever in ipRetrievers]
-        results = await asyncio.gather(*tasks)
+    isSettled = kwargs.get("isSettled")
+    session = kwargs.get("session")
+    observers = kwargs.get("observers", ())
+    if session is None:
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(family=kwargs.get("family", socket.AF_UNSPEC))
+        async with aiohttp.ClientSession(connector=connector) as session:
+            kwargs["session"] = session
+            return await retrieveIPsAsync(ipRetrievers, **kwargs)
+    deadline = kwargs.get("deadline")
+    context = IPRetrieverContext(
+        session=session,
+        timeout=timeout,
+        proxy=kwargs.get("proxy"),
+        deadline=deadline,
+        connect_timeout=kwargs.get("connectTimeout"),
+        tls_timeout=kwargs.get("tlsTimeout"),
+        read_timeout=kwargs.get("readTimeout"),
+    )
+    tryAcquire = kwargs.get("tryAcquire")
+    if isSettled is None and deadline is None:
+        tasks = [
+            getIPTimedAsync(ipRetriever, context, observers)
+            for ipRetriever in ipRetrievers
+            if tryAcquire is None or tryAcquire(ipRetriever)
+        ]
+        return await asyncio.gather(*tasks)
+    return await retrieveUntilSettledAsync(
+        ipRetrievers,
+        context,
+        isSettled or (lambda results, pending: False),
+        initial=kwargs.get("initial"),
+        hedgeDelay=kwargs.get("hedgeDelay"),
+        statistics=kwargs.get("hedgeStatistics"),
+        observers=observers,
+        deadline=deadline,
+        tryAcquire=tryAcquire,
+    )
+
+
+@dataclass
+class DualStackResult:
+    ipv4: Optional[VotingResult]
+    ipv6: Optional[VotingResult]
+
+
+class PublicIPClient:
+
+    def __init__(
+        self,
+        ipRetrievers: Optional[List[IPRetriever]] = None,
+        votingStrategy: Optional[IVotingStrategy] = None,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 60,
+        ttl_dns_cache: Optional[int] = 300,
+        cache: Optional[PublicIPCache] = None,
+        scoreboard: Optional[Scoreboard] = None,
+        observers: Optional[List[LookupObserver]] = None,
+        circuit_breakers: Optional[CircuitBreakers] = None,
+        rate_limits: Optional[RateLimitScheduler] = None,
+    ) -> None:
+        self.ipRetrievers = ipRetrievers
+        self.votingStrategy = votingStrategy
+        self.cache = cache
+        self.scoreboard = scoreboard
+        # Shared by all clients of the process unless one is given.
+        self.circuitBreakers = circuit_breakers or getDefaultCircuitBreakers()
+        self.rateLimits = rate_limits or getDefaultRateLimitScheduler()
+        self.hedgeStatistics = HedgeStatistics()
+        self.observers = observers or []
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        # One session per address family, AF_UNSPEC being whatever the OS
+        # picks.
+        self._sessions: Dict[socket.AddressFamily, "aiohttp.ClientSession"] = {}
+
+    async def __aenter__(self) -> "PublicIPClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def getSession(
+        self, family: socket.AddressFamily = socket.AF_UNSPEC
+    ) -> "aiohttp.ClientSession":
+        # The session is created lazily so that it is bound to the event loop
+        # the client is used from, then kept open to reuse connections, TLS
+        # sessions and DNS answers across lookups. A session pinned to
+        # AF_INET or AF_INET6 only resolves and connects over that family.
+        session = self._sessions.get(family)
+        if session is None or session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=self.ttl_dns_cache is not None,
+                ttl_dns_cache=self.ttl_dns_cache,
+                family=family,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[family] = session
+        return session
 
-    return results
+    async def close(self) -> None:
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            await session.close()
+
+    async def retrieveIPsAsync(
+        self,
+        ipRetrievers: List[IPRetriever],
+        **kwargs: Unpack[RetrieveIPsAsyncKwargs],
+    ) -> List[IPResultObject]:
+        proxy = kwargs.get("proxy")
+        if proxy is not None and isSocksProxy(proxy):
+            del kwargs["proxy"]
+            async with openSocksSession(proxy) as session:
+                kwargs["session"] = session
+                return await retrieveIPsAsync(ipRetrievers, **kwargs)
+        kwargs["session"] = self.getSession(kwargs.get("family", socket.AF_UNSPEC))
+        return await retrieveIPsAsync(ipRetrievers, **kwargs)
+
+    async def getPublicIPAsync(
+        self,
+        options: Optional[GetPublicIPOptions] = None,
+        ipRetrievers: Optional[List[IPRetriever]] = None,
+        votingStrategy: Optional[IVotingStrategy] = None,
+        hedgeStatistics: Optional[HedgeStatistics] = None,
+    ) -> Optional[VotingResult]:
+        # A lookup with hedging is counted in `hedgeStatistics` when given,
+        # instead of the client's own.
+        if options is None:
+            options = GetPublicIPOptions()
+        if self.cache is not None:
+            lookupOptions = replace(options, return_statistics=True)
+            return await self.cache.getAsync(
+                options,
+                lambda: self._lookupAsync(
+                    lookupOptions, ipRetrievers, votingStrategy, hedgeStatistics
+                ),
+            )
+        return await self._lookupAsync(
+            options, ipRetrievers, votingStrategy, hedgeStatistics
+        )
+
+    async def getDualStackPublicIPAsync(
+        self,
+        ipv4Options: Optional[GetPublicIPOptions] = None,
+        ipv6Options: Optional[GetPublicIPOptions] = None,
+        ipRetrievers: Optional[List[IPRetriever]] = None,
+        votingStrategy: Optional[IVotingStrategy] = None,
+    ) -> DualStackResult:
+        # Both families are looked up at the same time, each over its own
+        # pinned session and with its own options, e.g. quorum. They default
+        # to an early exit vote.
+        ipv4Options = replace(
+            ipv4Options or GetPublicIPOptions(early_exit=True), ipv4=True, ipv6=False
+        )
+        ipv6Options = replace(
+            ipv6Options or GetPublicIPOptions(early_exit=True), ipv4=False, ipv6=True
+        )
+        ipv4, ipv6 = await asyncio.gather(
+            self.getPublicIPAsync(ipv4Options, ipRetrievers, votingStrategy),
+            self.getPublicIPAsync(ipv6Options, ipRetrievers, votingStrategy),
+        )
+        return DualStackResult(ipv4=ipv4, ipv6=ipv6)
+
+    async def _lookupAsync(
+        self,
+        options: GetPublicIPOptions,
+        ipRetrievers: Optional[List[IPRetriever]],
+        votingStrategy: Optional[IVotingStrategy],
+        hedgeStatistics: Optional[HedgeStatistics] = None,
+    ) -> Optional[VotingResult]:
+        if ipRetrievers is None:
+            ipRetrievers = self.ipRetrievers or getDefaultIPRetrievers()
+        if votingStrategy is None:
+            votingStrategy = self.votingStrategy or SimpleVotingStrategy()
+        context = VotingStrategyContext(
+            prefer_ipv6=options.prefer_ipv6,
+            ipv4=options.ipv4,
+            ipv6=options.ipv6,
+            return_statistics=options.return_statistics,
+        )
+        retrieveKwargs: RetrieveIPsAsyncKwargs = {
+            "timeout": options.timeout,
+            "observers": self.observers,
+        }
+        if options.deadline is not None:
+            # Measured from here, the retrievers are cut short to fit in it,
+            # and those still pending when it expires are cancelled.
+            loop = asyncio.get_running_loop()
+            retrieveKwargs["deadline"] = loop.time() + options.deadline
+        if options.connect_timeout is not None:
+            retrieveKwargs["connectTimeout"] = options.connect_timeout
+        if options.tls_timeout is not None:
+            retrieveKwargs["tlsTimeout"] = options.tls_timeout
+        if options.read_timeout is not None:
+            retrieveKwargs["readTimeout"] = options.read_timeout
+        if options.proxy is not None:
+            retrieveKwargs["proxy"] = options.proxy
+        # Pinning the family spares the requests whose answers the vote would
+        # discard anyway.
+        if options.ipv4:
+            retrieveKwargs["family"] = socket.AF_INET
+        elif options.ipv6:
+            retrieveKwargs["family"] = socket.AF_INET6
+        quorum = options.quorum
+        if options.hedge_delay is not None:
+            initial = options.hedge_initial or quorum or 2
+            quorum = quorum or initial
+            retrieveKwargs["initial"] = initial
+            retrieveKwargs["hedgeDelay"] = options.hedge_delay
+            retrieveKwargs["hedgeStatistics"] = hedgeStatistics or self.hedgeStatistics
+        # Strategies only implementing vote() structurally, without
+        # subclassing IVotingStrategy, lack its isSettled and are never
+        # settled early.
+        isSettled = getattr(votingStrategy, "isSettled", None)
+        if isSettled is not None and (quorum is not None or options.early_exit):
+            strategyIsSettled = isSettled
+            retrieveKwargs["isSettled"] = lambda results, pending: strategyIsSettled(
+                results, pending, context, quorum
+            )
+        # A failure through a proxy says more about the proxy than about the
+        # service, so proxied lookups leave the breakers alone.
+        breakers = self.circuitBreakers if options.proxy is None else None
+        family = retrieveKwargs.get("family", socket.AF_UNSPEC)
+        if breakers is not None:
+            ipRetrievers = breakers.admit(ipRetrievers, family)
+        # Probes dropped by the filters below are given back by record().
+        breakerAdmitted = ipRetrievers
+        # Likewise a proxy is throttled for its own address, not this host's.
+        rateLimits = self.rateLimits if options.proxy is None else None
+        if rateLimits is not None:
+            ipRetrievers = rateLimits.admit(ipRetrievers)
+            retrieveKwargs["tryAcquire"] = rateLimits.tryAcquire
+        if options.max_retrievers is not None:
+            k = max(options.max_retrievers, quorum or 0)
+            if self.scoreboard is not None:
+                ipRetrievers = self.scoreboard.select(ipRetrievers, k)
+            else:
+                # Without history, the highest priorities are picked, in the
+                # given order among equals.
+                ipRetrievers = sorted(
+                    ipRetrievers, key=lambda r: getattr(r, "priority", 0), reverse=True
+                )[:k]
+        ipResults: List[IPResultObject] = []
+        try:
+            ipResults = await self.retrieveIPsAsync(ipRetrievers, **retrieveKwargs)
+        finally:
+            if breakers is not None:
+                breakers.record(breakerAdmitted, ipResults, family)
+            if rateLimits is not None:
+                rateLimits.record(ipResults)
+        votingResult = votingStrategy.vote(ipResults, context)
+        if self.scoreboard is not None:
+            self.scoreboard.record(ipResults, votingResult)
+        notifyVote(self.observers, ipResults, votingResult)
+        return votingResult
 
 
 async def getPublicIPAsync(
     options: Optional[GetPublicIPOptions] = None,
     ipRetrievers: Optional[List[IPRetriever]] = None,
-    votingStrategy: Optional[SimpleVotingStrategy] = None,
+    votingStrategy: Optional[IVotingStrategy] = None,
+    cache: Optional[PublicIPCache] = None,
+    client: Optional[PublicIPClient] = None,
+    hedgeStatistics: Optional[HedgeStatistics] = None,
 ) -> Optional[VotingResult]:
-    if options is None:
-        options = GetPublicIPOptions()
-    if ipRetrievers is None:
-        ipRetrievers = DEFAULT_IP_RETRIEVERS
-    ipResults = await retrieveIPsAsync(ipRetrievers, timeout=options.timeout)
-    context = VotingStrategyContext(
-        prefer_ipv6=options.prefer_ipv6,
-        ipv4=options.ipv4,
-        ipv6=options.ipv6,
-        return_statistics=options.return_statistics,
+    if cache is not None:
+        # Unless a client is given, each lookup opens its own so that a
+        # background refresh doesn't depend on the session of the caller that
+        # started it.
+        lookupOptions = replace(options or GetPublicIPOptions(), return_statistics=True)
+        return await cache.getAsync(
+            options or GetPublicIPOptions(),
+            lambda: getPublicIPAsync(
+                lookupOptions,
+                ipRetrievers,
+                votingStrategy,
+                client=client,
+                hedgeStatistics=hedgeStatistics,
+            ),
+        )
+    if client is not None:
+        return await client.getPublicIPAsync(
+            options, ipRetrievers, votingStrategy, hedgeStatistics
+        )
+    async with PublicIPClient() as client:
+        return await client.getPublicIPAsync(
+            options, ipRetrievers, votingStrategy, hedgeStatistics
+        )
+
+
+async def getDualStackPublicIPAsync(
+    ipv4Options: Optional[GetPublicIPOptions] = None,
+    ipv6Options: Optional[GetPublicIPOptions] = None,
+    ipRetrievers: Optional[List[IPRetriever]] = None,
+    votingStrategy: Optional[IVotingStrategy] = None,
+) -> DualStackResult:
+    async with PublicIPClient() as client:
+        return await client.getDualStackPublicIPAsync(
+            ipv4Options, ipv6Options, ipRetrievers, votingStrategy
+        )
+
+
+_sharedClient: Optional[Tuple[BackgroundLoop, PublicIPClient]] = None
+_sharedClientLock = threading.Lock()
+
+
+def getSharedClient() -> Tuple[BackgroundLoop, PublicIPClient]:
+    # The client used by the synchronous API. It lives on the background loop
+    # so its session, and the connections in it, are reused across calls.
+    global _sharedClient
+    backgroundLoop = getBackgroundLoop()
+    with _sharedClientLock:
+        if _sharedClient is None or _sharedClient[0] is not backgroundLoop:
+            client = PublicIPClient()
+            backgroundLoop.addCloseCallback(client.close)
+            _sharedClient = (backgroundLoop, client)
+        return _sharedClient
+
+
+def getPublicIPFuture(
+    options: Optional[GetPublicIPOptions] = None,
+    ipRetrievers: Optional[List[IPRetriever]] = None,
+    votingStrategy: Optional[IVotingStrategy] = None,
+    cache: Optional[PublicIPCache] = None,
+    hedgeStatistics: Optional[HedgeStatistics] = None,
+) -> "concurrent.futures.Future[Optional[VotingResult]]":
+    backgroundLoop, client = getSharedClient()
+    return backgroundLoop.submit(
+        getPublicIPAsync(
+            options, ipRetrievers, votingStrategy, cache, client, hedgeStatistics
+        )
     )
-    if votingStrategy is None:
-        votingStrategy = SimpleVotingStrategy()
-    votingResult = votingStrategy.vote(ipResults, context)
-    return votingResult
 
 
-def getPublicIP(*args, **kwargs):
-    return run_async(getPublicIPAsync, *args, **kwargs)
+def getPublicIP(
+    options: Optional[GetPublicIPOptions] = None,
+    ipRetrievers: Optional[List[IPRetriever]] = None,
+    votingStrategy: Optional[IVotingStrategy] = None,
+    cache: Optional[PublicIPCache] = None,
+    hedgeStatistics: Optional[HedgeStatistics] = None,
+) -> Optional[VotingResult]:
+    backgroundLoop, client = getSharedClient()
+    return backgroundLoop.run(
+        getPublicIPAsync(
+            options, ipRetrievers, votingStrategy, cache, client, hedgeStatistics
+        )
+    )
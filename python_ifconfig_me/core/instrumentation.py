@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import sys
+import threading
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class LookupObserver(Protocol):
+
+    def onResult(self, result: IPResultObject) -> None:
+        # Called for every retriever that finished, with its status, error
+        # and elapsed time filled in. Cancelled retrievers are not reported.
+        pass
+
+    def onVote(
+        self, results: List[IPResultObject], votingResult: Optional[VotingResult]
+    ) -> None:
+        pass
+
+
+def notifyResult(observers: Sequence[LookupObserver], result: IPResultObject) -> None:
+    for observer in observers:
+        try:
+            observer.onResult(result)
+        except Exception as e:
+            logger.warning(f"Observer {observer!r} failed in onResult: {e}")
+
+
+def notifyVote(
+    observers: Sequence[LookupObserver],
+    results: List[IPResultObject],
+    votingResult: Optional[VotingResult],
+) -> None:
+    for observer in observers:
+        try:
+            observer.onVote(results, votingResult)
+        except Exception as e:
+            logger.warning(f"Observer {observer!r} failed in onVote: {e}")
+
+
+def getOutcome(result: IPResultObject) -> str:
+    if result.ipObject.ip is not None:
+        return "success"
+    if isinstance(result.error, asyncio.TimeoutError):
+        return "timeout"
+    if result.error is not None:
+        return "error"
+    return "failure"
+
+
+def getURL(result: IPResultObject) -> str:
+    retriever = result.getRetriever()
+    return getattr(retriever, "url", None) or repr(retriever)
+
+
+class NDJSONObserver(LookupObserver):
+    # Writes a compact JSON line for every retriever result as soon as it
+    # arrives, then one for the vote, so a log pipeline can consume them
+    # while the lookup runs. Only the fields below are written, rather than
+    # walking the results and everything they reference.
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        dumps: Optional[Callable[[Any], str]] = None,
+    ) -> None:
+        if dumps is None:
+            from python_ifconfig_me.utils import fastJSON
+
+            dumps = fastJSON.dumps
+        self.stream = stream or sys.stdout
+        self._dumps = dumps
+
+    def onResult(self, result: IPResultObject) -> None:
+        self._write(
+            {
+                "event": "result",
+                "url": getURL(result),
+                "outcome": getOutcome(result),
+                "ip": result.ipObject.ip,
+                "status": result.status,
+                "elapsed": result.elapsed,
+                "error": None if result.error is None else type(result.error).__name__,
+            }
+        )
+
+    def onVote(
+        self, results: List[IPResultObject], votingResult: Optional[VotingResult]
+    ) -> None:
+        line: Dict[str, Any] = {"event": "vote", "ip": None, "results": len(results)}
+        if votingResult is not None:
+            line["ip"] = votingResult.ip
+            line["confidence"] = votingResult.confidence
+            # Only there when the lookup asked for statistics.
+            if votingResult.statistics:
+                line["statistics"] = [
+                    {
+                        "ip": item.ipObject.ip,
+                        "weight": item.weight,
+                        "priority": item.priority,
+                        "score": item.score,
+                        "urls": [
+                            getattr(r, "url", None) or repr(r) for r in item.retrievers
+                        ],
+                    }
+                    for item in votingResult.statistics
+                ]
+        self._write(line)
+
+    def _write(self, line: Dict[str, Any]) -> None:
+        self.stream.write(self._dumps(line) + "\n")
+        self.stream.flush()
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsCollector(LookupObserver):
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self._histograms: Dict[Labels, List[float]] = {}
+        self._histogramSums: Dict[Labels, float] = defaultdict(float)
+
+    def onResult(self, result: IPResultObject) -> None:
+        url = getURL(result)
+        with self._lock:
+            self._inc("requests_total", (("url", url), ("outcome", getOutcome(result))))
+            if result.status is not None:
+                self._inc(
+                    "responses_total", (("url", url), ("status", str(result.status)))
+                )
+            if result.error is not None:
+                exception = type(result.error).__name__
+                self._inc("exceptions_total", (("url", url), ("exception", exception)))
+            if result.elapsed is not None:
+                self._observe((("url", url),), result.elapsed)
+
+    def onVote(
+        self, results: List[IPResultObject], votingResult: Optional[VotingResult]
+    ) -> None:
+        with self._lock:
+            outcome = "failure" if votingResult is None else "success"
+            self._inc("votes_total", (("outcome", outcome),))
+            if votingResult is None:
+                return
+            for result in results:
+                if result.ipObject.ip is None:
+                    continue
+                agreement = (
+                    "agree" if result.ipObject.ip == votingResult.ip else "disagree"
+                )
+                self._inc(
+                    "vote_agreement_total",
+                    (("url", getURL(result)), ("agreement", agreement)),
+                )
+
+    def getCounter(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def toPrometheusText(self, prefix: str = "ifconfig_me_") -> str:
+        helps = {
+            "requests_total": "Requests made by each retriever, by outcome.",
+            "responses_total": "HTTP responses received by each retriever, by status code.",
+            "exceptions_total": "Exceptions raised by each retriever, by exception class.",
+            "votes_total": "Votes held, by whether a public IP was found.",
+            "vote_agreement_total": "Answers of each retriever that agreed or disagreed with the vote.",
+        }
+        lines = []
+        with self._lock:
+            for name, description in helps.items():
+                if name not in self._counters:
+                    continue
+                lines.append(f"# HELP {prefix}{name} {description}")
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(
+                        f"{prefix}{name}{formatLabels(labels)} {formatValue(value)}"
+                    )
+            if self._histograms:
+                name = f"{prefix}request_duration_seconds"
+                lines.append(f"# HELP {name} Time each retriever took to answer.")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, counts in sorted(self._histograms.items()):
+                    for bound, count in zip(self.buckets, counts):
+                        bucketLabels = labels + (("le", formatValue(bound)),)
+                        lines.append(
+                            f"{name}_bucket{formatLabels(bucketLabels)} {count:g}"
+                        )
+                    total = counts[-1]
+                    lines.append(
+                        f"{name}_bucket{formatLabels(labels + (('le', '+Inf'),))} {total:g}"
+                    )
+                    lines.append(
+                        f"{name}_sum{formatLabels(labels)} {formatValue(self._histogramSums[labels])}"
+                    )
+                    lines.append(f"{name}_count{formatLabels(labels)} {total:g}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _inc(self, name: str, labels: Labels) -> None:
+        self._counters[name][tuple(sorted(labels))] += 1
+
+    def _observe(self, labels: Labels, value: float) -> None:
+        # Buckets are cumulative, the last count is the +Inf bucket.
+        counts = self._histograms.setdefault(labels, [0] * (len(self.buckets) + 1))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        self._histogramSums[labels] += value
+
+
+def formatLabels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return (
+        "{" + ",".join(f'{key}="{escapeLabel(value)}"' for key, value in labels) + "}"
+    )
+
+
+def escapeLabel(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def formatValue(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
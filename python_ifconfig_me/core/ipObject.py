@@ -1,13 +1,53 @@
-from dataclasses import dataclass
-from typing import Optional
+import ipaddress
+from typing import Any, Optional
 
 
-@dataclass
 class IPObject:
-    ip: Optional[str] = None
+    # An IP address parsed once into its integer value and version, so that
+    # equal addresses compare and hash equal whatever their spelling, e.g.
+    # surrounding whitespace or the zeros of an IPv6 address. An empty
+    # IPObject stands for a retriever that found no IP.
+    __slots__ = ("value", "version")
+
+    def __init__(self, ip: Optional[str] = None) -> None:
+        if ip is None:
+            self.value = 0
+            self.version: Optional[int] = None
+            return
+        # Raises ValueError if `ip` isn't an IP address.
+        address = ipaddress.ip_address(ip.strip())
+        self.value = int(address)
+        self.version = address.version
+
+    @classmethod
+    def fromInt(cls, value: int, version: int) -> "IPObject":
+        ipObject = cls.__new__(cls)
+        ipObject.value = value
+        ipObject.version = version
+        return ipObject
+
+    @property
+    def ip(self) -> Optional[str]:
+        # The canonical form, e.g. 2001:db8::1 for 2001:0db8:0:0:0:0:0:0001.
+        if self.version == 4:
+            return str(ipaddress.IPv4Address(self.value))
+        if self.version == 6:
+            return str(ipaddress.IPv6Address(self.value))
+        return None
 
     def isIPv6(self) -> bool:
-        return self.ip is not None and ":" in self.ip
+        return self.version == 6
 
     def isIPv4(self) -> bool:
-        return self.ip is not None and "." in self.ip
+        return self.version == 4
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, IPObject):
+            return NotImplemented
+        return self.version == other.version and self.value == other.value
+
+    def __hash__(self) -> int:
+        return hash((self.version, self.value))
+
+    def __repr__(self) -> str:
+        return f"IPObject(ip={self.ip!r})"
@@ -1,39 +1,44 @@
-import json
-from typing import List
+import os
+from typing import Any, List, Optional
 
-from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
-    SimpleTextIPRetriever,
-)
 from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
-from python_ifconfig_me.core.ipretriever.callbackIPRetriever import CallbackIPRetriever
+from python_ifconfig_me.core.ipretriever.registry import (
+    DEFAULT_RETRIEVER_SPECS,
+    loadEntryPointRetrievers,
+    loadRetrievers,
+    makeRetriever,
+)
+
+# Replaces the built-in retrievers with the ones described in this file.
+RETRIEVERS_FILE_ENV = "IFCONFIG_ME_RETRIEVERS_FILE"
+
 
+_defaultIPRetrievers: Optional[List[IPRetriever]] = None
 
-DEFAULT_IP_RETRIEVERS: List[IPRetriever] = []
+
+def getDefaultIPRetrievers() -> List[IPRetriever]:
+    # Built on first use rather than at import time, which keeps starting the
+    # CLI cheap when the lookup isn't needed, e.g. on a cache hit.
+    global _defaultIPRetrievers
+    if _defaultIPRetrievers is None:
+        ipRetrievers: List[IPRetriever] = []
+        retrieversFile = os.environ.get(RETRIEVERS_FILE_ENV)
+        if retrieversFile:
+            ipRetrievers.extend(loadRetrievers(retrieversFile))
+        else:
+            populateDefaultIPList(ipRetrievers)
+        ipRetrievers.extend(loadEntryPointRetrievers())
+        _defaultIPRetrievers = ipRetrievers
+    return _defaultIPRetrievers
 
 
 def populateDefaultIPList(ipRetrievers: List[IPRetriever]) -> None:
-    URLS = [
-        "https://ifconfig.me/ip",
-        "https://checkip.amazonaws.com",
-        "https://icanhazip.com",
-        "https://ifconfig.co/ip",
-        "https://ipecho.net/plain",
-        "https://ipinfo.io/ip",
-    ]
-    for url in URLS:
-        ipRetrievers.append(SimpleTextIPRetriever(url))
-    ipRetrievers.append(
-        CallbackIPRetriever(
-            "https://httpbin.org/ip",
-            lambda text: json.loads(text).get("origin").strip(),
-        )
-    )
-    ipRetrievers.append(
-        CallbackIPRetriever(
-            "https://api.ipify.org/?format=json",
-            lambda text: json.loads(text).get("ip").strip(),
-        )
-    )
-
-
-populateDefaultIPList(DEFAULT_IP_RETRIEVERS)
+    for spec in DEFAULT_RETRIEVER_SPECS:
+        ipRetrievers.append(makeRetriever(spec))
+
+
+def __getattr__(name: str) -> Any:
+    # DEFAULT_IP_RETRIEVERS is kept for backward compatibility.
+    if name == "DEFAULT_IP_RETRIEVERS":
+        return getDefaultIPRetrievers()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,35 +1,112 @@
+import asyncio
 import logging
+from typing import TYPE_CHECKING, Optional, Sequence
 
 from python_ifconfig_me.core.ipObject import IPObject
 from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject
 from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
 from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetrieverContext
+from python_ifconfig_me.core.rateLimit import ThrottledError, parseRetryAfter
 
-
-import aiohttp
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = logging.getLogger(__name__)
 
+# An IP address, even wrapped in a small JSON document, fits in far less. A
+# captive portal or an error page doesn't, and is rejected without reading it.
+DEFAULT_MAX_BODY_SIZE = 4096
+# Prefixes of the accepted media types. A response without a Content-Type is
+# accepted too.
+DEFAULT_CONTENT_TYPES = ("text/", "application/json")
+
+
+class ResponseRejectedError(Exception):
+    pass
+
 
 class CallbackIPRetriever(IPRetriever):
 
-    def __init__(self, url: str, callback, priority: int = 0) -> None:
+    def __init__(
+        self,
+        url: str,
+        callback,
+        priority: int = 0,
+        max_body_size: Optional[int] = DEFAULT_MAX_BODY_SIZE,
+        content_types: Optional[Sequence[str]] = DEFAULT_CONTENT_TYPES,
+    ) -> None:
         self.url = url
         self.priority = priority
+        # None reads and decodes the whole body like aiohttp's text().
+        self.max_body_size = max_body_size
+        # None accepts any Content-Type.
+        self.content_types = content_types
         self._callback = callback
 
     async def getIPAsync(self, context: IPRetrieverContext) -> IPResultObject:
         session = context.session
-        timeout = aiohttp.ClientTimeout(context.timeout)
+        timeout = context.getClientTimeout()
 
-        ip = None
+        ipObject = IPObject()
+        status = None
+        error = None
         try:
-            async with session.get(self.url, timeout=timeout) as response:
+            if timeout.total is not None and timeout.total <= 0:
+                # aiohttp would take a timeout of 0 as none at all.
+                raise asyncio.TimeoutError("No time left before the deadline")
+            async with session.get(
+                self.url, timeout=timeout, proxy=context.proxy
+            ) as response:
+                status = response.status
                 if response.status == 200:
-                    text = await response.text()
-                    ip = self._callback(text)
+                    # A body that isn't an IP address fails the call here
+                    # rather than taking part in the vote.
+                    ipObject = IPObject(await self._extractAsync(response))
+                elif response.status == 429 or (
+                    response.status == 503 and "Retry-After" in response.headers
+                ):
+                    retryAfter = parseRetryAfter(response.headers.get("Retry-After"))
+                    raise ThrottledError(response.status, retryAfter)
         except Exception as e:
+            # Dropping the traceback keeps the frames of the failed call from
+            # being held by the result.
+            error = e.with_traceback(None)
             logger.warning(
-                f"Run into error making API call to {self.url} due to error {e}"
+                f"Run into error making API call to {self.url} due to error {e!r}"
+            )
+        return IPResultObject(
+            ipObject,
+            retriever=self,
+            priority=self.priority,
+            status=status,
+            error=error,
+        )
+
+    async def _extractAsync(self, response: "aiohttp.ClientResponse") -> Optional[str]:
+        text = await self._readTextAsync(response)
+        return self._callback(text)
+
+    async def _readTextAsync(self, response: "aiohttp.ClientResponse") -> str:
+        contentType = response.headers.get("Content-Type")
+        if self.content_types is not None and contentType is not None:
+            mediaType = contentType.split(";", 1)[0].strip().lower()
+            if not mediaType.startswith(tuple(self.content_types)):
+                raise ResponseRejectedError(f"Unexpected Content-Type {contentType}")
+        if self.max_body_size is None:
+            return await response.text()
+        limit = self.max_body_size
+        if response.content_length is not None and response.content_length > limit:
+            raise ResponseRejectedError(
+                f"Content-Length {response.content_length} exceeds {limit} bytes"
             )
-        return IPResultObject(IPObject(ip), retriever=self, priority=self.priority)
+        # Read one byte more than allowed to tell a body of exactly `limit`
+        # bytes from a longer one without a Content-Length.
+        body = bytearray()
+        while len(body) <= limit:
+            chunk = await response.content.read(limit + 1 - len(body))
+            if not chunk:
+                break
+            body += chunk
+        if len(body) > limit:
+            raise ResponseRejectedError(f"Body exceeds {limit} bytes")
+        return body.decode("ascii")
@@ -0,0 +1,191 @@
+import ipaddress
+import logging
+import os
+import struct
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetriever,
+    IPRetrieverContext,
+)
+from python_ifconfig_me.core.ipretriever.udp import exchangeAsync
+
+logger = logging.getLogger(__name__)
+
+DNS_PORT = 53
+RECORD_TYPES = {"A": 1, "TXT": 16, "AAAA": 28}
+
+_HEADER = struct.Struct("!HHHHHH")
+_RECORD = struct.Struct("!HHIH")
+_FLAG_RESPONSE = 0x8000
+_FLAG_TRUNCATED = 0x0200
+_FLAG_RECURSION_DESIRED = 0x0100
+
+
+class DnsError(Exception):
+    pass
+
+
+def encodeName(name: str) -> bytes:
+    encoded = b""
+    for label in name.strip(".").split("."):
+        raw = label.encode("idna")
+        if not 0 < len(raw) < 64:
+            raise ValueError(f"Invalid DNS name {name!r}")
+        encoded += bytes([len(raw)]) + raw
+    return encoded + b"\0"
+
+
+def encodeQuery(queryID: int, name: str, recordType: int) -> bytes:
+    header = _HEADER.pack(queryID, _FLAG_RECURSION_DESIRED, 1, 0, 0, 0)
+    return header + encodeName(name) + struct.pack("!HH", recordType, 1)
+
+
+def skipName(data: bytes, offset: int) -> int:
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            # A pointer to a name earlier in the message ends the name.
+            return offset + 2
+        offset += 1 + length
+
+
+def decodeRecord(recordType: int, rdata: bytes) -> str:
+    if recordType == RECORD_TYPES["A"]:
+        return str(ipaddress.IPv4Address(rdata))
+    if recordType == RECORD_TYPES["AAAA"]:
+        return str(ipaddress.IPv6Address(rdata))
+    # TXT data is a sequence of length prefixed strings.
+    strings = []
+    offset = 0
+    while offset < len(rdata):
+        length = rdata[offset]
+        strings.append(rdata[offset + 1 : offset + 1 + length])
+        offset += 1 + length
+    return b"".join(strings).decode("ascii")
+
+
+def parseResponse(data: bytes, queryID: int, recordType: int) -> Optional[List[str]]:
+    # Returns the records of `recordType` in the answer, or None for a
+    # datagram that isn't the response to the query.
+    if len(data) < _HEADER.size:
+        return None
+    responseID, flags, questions, answers, _, _ = _HEADER.unpack_from(data)
+    if responseID != queryID or not flags & _FLAG_RESPONSE:
+        return None
+    if flags & _FLAG_TRUNCATED:
+        raise DnsError("Truncated DNS response")
+    rcode = flags & 0x000F
+    if rcode != 0:
+        raise DnsError(f"DNS response with error code {rcode}")
+    try:
+        offset = _HEADER.size
+        for _ in range(questions):
+            offset = skipName(data, offset) + 4
+        records = []
+        for _ in range(answers):
+            offset = skipName(data, offset)
+            answerType, _, _, length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            rdata = data[offset : offset + length]
+            offset += length
+            if answerType == recordType:
+                records.append(decodeRecord(answerType, rdata))
+    except (IndexError, struct.error, ValueError) as e:
+        raise DnsError(f"Malformed DNS response: {e}") from None
+    if not records:
+        raise DnsError("No record of the requested type in the DNS response")
+    return records
+
+
+class DnsIPRetriever(IPRetriever):
+    # Asks a DNS server that answers a special name with the address the
+    # query came from, e.g. myip.opendns.com at resolver1.opendns.com, or the
+    # TXT record of o-o.myaddr.l.google.com at ns1.google.com. That's a single
+    # UDP round trip, against a TCP, TLS and HTTP exchange for the others.
+    # A query without an answer is sent again, up to `attempts` times within
+    # the timeout of the context.
+
+    def __init__(
+        self,
+        name: str,
+        server: str,
+        port: int = DNS_PORT,
+        record_type: str = "A",
+        priority: int = 0,
+        attempts: int = 3,
+    ) -> None:
+        if record_type not in RECORD_TYPES:
+            raise ValueError(f"Unsupported DNS record type {record_type!r}")
+        self.name = name
+        self.server = server
+        self.port = port
+        self.record_type = record_type
+        self.priority = priority
+        self.attempts = attempts
+        host = f"[{server}]" if ":" in server else server
+        netloc = host if port == DNS_PORT else f"{host}:{port}"
+        # Identifies the retriever in the scoreboard and metrics like the URL
+        # of an HTTP retriever.
+        self.url = f"dns://{netloc}/{name}?type={record_type}"
+
+    @classmethod
+    def fromURL(cls, url: str, priority: int = 0, attempts: int = 3):
+        # dns://<server>[:<port>]/<name>[?type=A|AAAA|TXT]
+        parts = urlsplit(url)
+        if parts.scheme != "dns" or not parts.hostname or not parts.path.strip("/"):
+            raise ValueError(f"Invalid DNS retriever URL {url!r}")
+        recordType = parse_qs(parts.query).get("type", ["A"])[0].upper()
+        return cls(
+            parts.path.strip("/"),
+            parts.hostname,
+            parts.port or DNS_PORT,
+            recordType,
+            priority,
+            attempts,
+        )
+
+    async def getIPAsync(self, context: IPRetrieverContext) -> IPResultObject:
+        ipObject = IPObject()
+        error = None
+        try:
+            if context.proxy is not None:
+                # The answer would be the address of this host, not the proxy.
+                raise ValueError("DNS lookups can't be sent through a proxy")
+            recordType = RECORD_TYPES[self.record_type]
+            queryID = int.from_bytes(os.urandom(2), "big")
+            records = await exchangeAsync(
+                self.server,
+                self.port,
+                encodeQuery(queryID, self.name, recordType),
+                lambda data: parseResponse(data, queryID, recordType),
+                context.getTimeout(),
+                self.attempts,
+            )
+            ipObject = IPObject(selectRecord(records))
+        except Exception as e:
+            error = e.with_traceback(None)
+            logger.warning(f"Run into error querying {self.url} due to error {e!r}")
+        return IPResultObject(
+            ipObject, retriever=self, priority=self.priority, error=error
+        )
+
+    def __repr__(self) -> str:
+        return f"DnsIPRetriever({self.url!r})"
+
+
+def selectRecord(records: List[str]) -> str:
+    # Some servers add TXT records about the query, e.g. the EDNS client
+    # subnet, next to the one holding the address.
+    for record in records:
+        try:
+            ipaddress.ip_address(record.strip())
+            return record
+        except ValueError:
+            continue
+    return records[0]
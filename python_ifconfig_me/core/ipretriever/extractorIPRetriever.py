@@ -0,0 +1,62 @@
+from typing import TYPE_CHECKING, Optional, Sequence, Union
+
+from python_ifconfig_me.core.ipretriever.callbackIPRetriever import (
+    DEFAULT_CONTENT_TYPES,
+    DEFAULT_MAX_BODY_SIZE,
+    CallbackIPRetriever,
+)
+from python_ifconfig_me.core.ipretriever.extractors import (
+    HeaderExtractor,
+    JSONKeyExtractor,
+    RegexExtractor,
+    TextExtractor,
+)
+
+if TYPE_CHECKING:
+    import aiohttp
+
+Extractor = Union[TextExtractor, JSONKeyExtractor, RegexExtractor, HeaderExtractor]
+
+
+class ExtractorIPRetriever(CallbackIPRetriever):
+    # A retriever described by data only, see the registry module, so it can
+    # be pickled, e.g. for a process pool.
+
+    def __init__(
+        self,
+        url: str,
+        extractor: Optional[Extractor] = None,
+        priority: int = 0,
+        max_body_size: Optional[int] = DEFAULT_MAX_BODY_SIZE,
+        content_types: Optional[Sequence[str]] = DEFAULT_CONTENT_TYPES,
+    ) -> None:
+        self.extractor = extractor or TextExtractor()
+        super().__init__(url, self.extractor, priority, max_body_size, content_types)
+
+    async def _extractAsync(self, response: "aiohttp.ClientResponse") -> Optional[str]:
+        if isinstance(self.extractor, HeaderExtractor):
+            return self.extractor.fromHeaders(response.headers)
+        return await super()._extractAsync(response)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExtractorIPRetriever):
+            return NotImplemented
+        return (
+            self.url,
+            self.extractor,
+            self.priority,
+            self.max_body_size,
+            self.content_types,
+        ) == (
+            other.url,
+            other.extractor,
+            other.priority,
+            other.max_body_size,
+            other.content_types,
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.url, self.extractor, self.priority))
+
+    def __repr__(self) -> str:
+        return f"ExtractorIPRetriever({self.url!r}, {self.extractor!r})"
@@ -0,0 +1,63 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+# Extractors pull the IP out of a response. They are plain dataclasses rather
+# than lambdas so that retrievers can be pickled, compared and written out by
+# the CLI. Anything costly, like compiling a regex, is done once at creation.
+
+
+@dataclass(frozen=True)
+class TextExtractor:
+    # The whole body is the IP.
+
+    def __call__(self, text: str) -> Optional[str]:
+        return text.strip()
+
+
+@dataclass(frozen=True)
+class JSONKeyExtractor:
+    # The value of `key` in a JSON body. Nested keys are separated by dots,
+    # e.g. "data.ip".
+    key: str
+    _path: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_path", tuple(self.key.split(".")))
+
+    def __call__(self, text: str) -> Optional[str]:
+        value: Any = json.loads(text)
+        for part in self._path:
+            if not isinstance(value, dict) or part not in value:
+                return None
+            value = value[part]
+        return str(value).strip() if value is not None else None
+
+
+@dataclass(frozen=True)
+class RegexExtractor:
+    # The `group` of the first match of `pattern` in the body.
+    pattern: str
+    group: int = 0
+    _regex: "re.Pattern[str]" = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_regex", re.compile(self.pattern))
+
+    def __call__(self, text: str) -> Optional[str]:
+        match = self._regex.search(text)
+        return None if match is None else match.group(self.group).strip()
+
+
+@dataclass(frozen=True)
+class HeaderExtractor:
+    # The value of a response header. The body isn't read.
+    header: str
+
+    def fromHeaders(self, headers: Mapping[str, str]) -> Optional[str]:
+        value = headers.get(self.header)
+        return None if value is None else value.strip()
+
+    def __call__(self, text: str) -> Optional[str]:
+        raise TypeError("HeaderExtractor reads the headers, not the body")
@@ -1,10 +1,12 @@
+import asyncio
 from dataclasses import dataclass
-from typing import Optional, Protocol
-
-import aiohttp
+from typing import TYPE_CHECKING, Optional, Protocol
 
 from python_ifconfig_me.core.ipObject import IPObject
 
+if TYPE_CHECKING:
+    import aiohttp
+
 
 class IPResultObject:
 
@@ -13,10 +15,18 @@ class IPResultObject:
         ipObject: IPObject,
         priority: int = 0,
         retriever: Optional["IPRetriever"] = None,
+        status: Optional[int] = None,
+        error: Optional[Exception] = None,
     ) -> None:
         self.ipObject = ipObject
         self.retreiver = retriever
         self.priority = priority
+        # HTTP status code of the response, if any.
+        self.status = status
+        # The exception that made the retriever fail, if any.
+        self.error = error
+        # Seconds the retriever took to answer, filled in by retrieveIPsAsync.
+        self.elapsed: Optional[float] = None
 
     def getRetriever(self) -> Optional["IPRetriever"]:
         return self.retreiver
@@ -24,8 +34,41 @@ class IPResultObject:
 
 @dataclass
 class IPRetrieverContext:
-    session: aiohttp.ClientSession
-    timeout: int
+    session: "aiohttp.ClientSession"
+    timeout: float
+    # HTTP proxy to send the request through. SOCKS proxies are set up in the
+    # session's connector instead.
+    proxy: Optional[str] = None
+    # Event loop time by which the whole lookup must be over.
+    deadline: Optional[float] = None
+    # See GetPublicIPOptions.
+    connect_timeout: Optional[float] = None
+    tls_timeout: Optional[float] = None
+    read_timeout: Optional[float] = None
+
+    def getTimeout(self) -> float:
+        # Seconds a request started now may take: the timeout, cut to what is
+        # left until the deadline.
+        if self.deadline is None:
+            return self.timeout
+        remaining = self.deadline - asyncio.get_running_loop().time()
+        return min(self.timeout, remaining)
+
+    def getClientTimeout(self) -> "aiohttp.ClientTimeout":
+        # aiohttp doesn't time the TLS handshake on its own. Its connect
+        # timeout covers the TCP connection and the handshake together, so
+        # the TLS budget is added to the TCP one there.
+        import aiohttp
+
+        connect = None
+        if self.tls_timeout is not None:
+            connect = (self.connect_timeout or 0) + self.tls_timeout
+        return aiohttp.ClientTimeout(
+            total=self.getTimeout(),
+            connect=connect,
+            sock_connect=self.connect_timeout,
+            sock_read=self.read_timeout,
+        )
 
 
 class IPRetriever(Protocol):
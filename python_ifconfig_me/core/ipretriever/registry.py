@@ -0,0 +1,142 @@
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Union
+
+from python_ifconfig_me.core.ipretriever.callbackIPRetriever import (
+    DEFAULT_CONTENT_TYPES,
+    DEFAULT_MAX_BODY_SIZE,
+)
+from python_ifconfig_me.core.ipretriever.dnsIPRetriever import DnsIPRetriever
+from python_ifconfig_me.core.ipretriever.extractorIPRetriever import (
+    Extractor,
+    ExtractorIPRetriever,
+)
+from python_ifconfig_me.core.ipretriever.extractors import (
+    HeaderExtractor,
+    JSONKeyExtractor,
+    RegexExtractor,
+    TextExtractor,
+)
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.stunIPRetriever import StunIPRetriever
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "python_ifconfig_me.retrievers"
+
+# A retriever is described by a mapping like
+#   {"url": "https://httpbin.org/ip", "extractor": "json", "key": "origin"}
+# with the extractor one of
+#   text    the whole body (the default)
+#   json    `key` of a JSON body, dotted for nested keys
+#   regex   `group` (default 0) of the first match of `pattern`
+#   header  the value of the response header `header`
+# and optionally `priority`, `max_body_size` and `content_types`. A
+# dns://<server>[:<port>]/<name>?type=A|AAAA|TXT URL makes a DnsIPRetriever
+# and a stun:<host>[:<port>] URL a StunIPRetriever instead, which both take
+# `priority` and `attempts`.
+RetrieverSpec = Mapping[str, Any]
+
+DEFAULT_RETRIEVER_SPECS: List[Dict[str, Any]] = [
+    {"url": "https://ifconfig.me/ip"},
+    {"url": "https://checkip.amazonaws.com"},
+    {"url": "https://icanhazip.com"},
+    {"url": "https://ifconfig.co/ip"},
+    {"url": "https://ipecho.net/plain"},
+    {"url": "https://ipinfo.io/ip"},
+    {"url": "https://httpbin.org/ip", "extractor": "json", "key": "origin"},
+    {"url": "https://api.ipify.org/?format=json", "extractor": "json", "key": "ip"},
+]
+
+
+def makeExtractor(spec: RetrieverSpec) -> Extractor:
+    kind = spec.get("extractor", "text")
+    if kind == "text":
+        return TextExtractor()
+    if kind == "json":
+        return JSONKeyExtractor(spec["key"])
+    if kind == "regex":
+        return RegexExtractor(spec["pattern"], spec.get("group", 0))
+    if kind == "header":
+        return HeaderExtractor(spec["header"])
+    raise ValueError(f"Unknown extractor {kind!r} for {spec.get('url')}")
+
+
+def makeRetriever(spec: RetrieverSpec) -> IPRetriever:
+    try:
+        if spec["url"].startswith("dns://"):
+            return DnsIPRetriever.fromURL(
+                spec["url"],
+                priority=spec.get("priority", 0),
+                attempts=spec.get("attempts", 3),
+            )
+        if spec["url"].startswith("stun:"):
+            return StunIPRetriever.fromURL(
+                spec["url"],
+                priority=spec.get("priority", 0),
+                attempts=spec.get("attempts", 3),
+            )
+        return ExtractorIPRetriever(
+            spec["url"],
+            makeExtractor(spec),
+            priority=spec.get("priority", 0),
+            max_body_size=spec.get("max_body_size", DEFAULT_MAX_BODY_SIZE),
+            content_types=spec.get("content_types", DEFAULT_CONTENT_TYPES),
+        )
+    except KeyError as e:
+        raise ValueError(f"Retriever {dict(spec)} is missing {e}") from None
+
+
+def loadRetrievers(path: Union[str, Path]) -> List[IPRetriever]:
+    # Reads a TOML file with [[retrievers]] tables, or a JSON file with a
+    # "retrievers" list, of retriever descriptions.
+    path = Path(path)
+    if path.suffix == ".toml":
+        if sys.version_info >= (3, 11):
+            import tomllib
+        else:
+            try:
+                import tomli as tomllib
+            except ImportError as e:
+                raise ImportError(
+                    "Reading TOML before Python 3.11 needs the tomli package"
+                ) from e
+        with open(path, "rb") as f:
+            content = tomllib.load(f)
+    else:
+        with open(path) as f:
+            content = json.load(f)
+    specs = content.get("retrievers") if isinstance(content, dict) else None
+    if not isinstance(specs, list):
+        raise ValueError(f"{path} has no list of retrievers")
+    return [makeRetriever(spec) for spec in specs]
+
+
+def loadEntryPointRetrievers() -> List[IPRetriever]:
+    # Third party packages register retrievers with an entry point in the
+    # python_ifconfig_me.retrievers group, pointing to a retriever, a list of
+    # them, or a function returning a list. They are only imported here, when
+    # the default retrievers are first needed.
+    from importlib.metadata import entry_points
+
+    # Selecting a group by keyword is only supported from Python 3.10.
+    if sys.version_info >= (3, 10):
+        entryPoints = entry_points(group=ENTRY_POINT_GROUP)
+    else:
+        entryPoints = entry_points().get(ENTRY_POINT_GROUP, [])
+    ipRetrievers: List[IPRetriever] = []
+    for entryPoint in entryPoints:
+        try:
+            value = entryPoint.load()
+            if callable(value) and not hasattr(value, "getIPAsync"):
+                value = value()
+            if hasattr(value, "getIPAsync"):
+                value = [value]
+            ipRetrievers.extend(value)
+        except Exception as e:
+            logger.warning(
+                f"Ignoring retrievers of entry point {entryPoint.name}: {e!r}"
+            )
+    return ipRetrievers
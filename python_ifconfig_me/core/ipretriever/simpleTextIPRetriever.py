@@ -1,13 +1,25 @@
 import logging
+from typing import Optional, Sequence
 
-from python_ifconfig_me.core.ipretriever.callbackIPRetriever import CallbackIPRetriever
+from python_ifconfig_me.core.ipretriever.callbackIPRetriever import (
+    DEFAULT_CONTENT_TYPES,
+    DEFAULT_MAX_BODY_SIZE,
+    CallbackIPRetriever,
+)
+from python_ifconfig_me.core.ipretriever.extractors import TextExtractor
 
 logger = logging.getLogger(__name__)
 
 
 class SimpleTextIPRetriever(CallbackIPRetriever):
 
-    def __init__(self, url: str, priority: int = 0) -> None:
+    def __init__(
+        self,
+        url: str,
+        priority: int = 0,
+        max_body_size: Optional[int] = DEFAULT_MAX_BODY_SIZE,
+        content_types: Optional[Sequence[str]] = DEFAULT_CONTENT_TYPES,
+    ) -> None:
         self.url = url
         self.priority = priority
-        super().__init__(url, lambda text: text, priority)
+        super().__init__(url, TextExtractor(), priority, max_body_size, content_types)
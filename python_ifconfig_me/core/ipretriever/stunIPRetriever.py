@@ -0,0 +1,165 @@
+import ipaddress
+import logging
+import os
+import socket
+import struct
+from typing import Dict, Optional
+
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetriever,
+    IPRetrieverContext,
+)
+from python_ifconfig_me.core.ipretriever.udp import exchangeAsync
+
+logger = logging.getLogger(__name__)
+
+STUN_PORT = 3478
+MAGIC_COOKIE = 0x2112A442
+BINDING_REQUEST = 0x0001
+BINDING_SUCCESS = 0x0101
+BINDING_ERROR = 0x0111
+ATTRIBUTE_MAPPED_ADDRESS = 0x0001
+ATTRIBUTE_ERROR_CODE = 0x0009
+ATTRIBUTE_XOR_MAPPED_ADDRESS = 0x0020
+FAMILY_IPV4 = 0x01
+FAMILY_IPV6 = 0x02
+
+HEADER = struct.Struct("!HHI12s")
+_ATTRIBUTE = struct.Struct("!HH")
+
+
+class StunError(Exception):
+    pass
+
+
+def encodeBindingRequest(transactionID: bytes) -> bytes:
+    return HEADER.pack(BINDING_REQUEST, 0, MAGIC_COOKIE, transactionID)
+
+
+def xorAddress(address: bytes, transactionID: bytes) -> bytes:
+    # XOR-MAPPED-ADDRESS hides the address from NATs rewriting it, with the
+    # magic cookie for IPv4 and the cookie followed by the transaction ID for
+    # IPv6.
+    key = struct.pack("!I", MAGIC_COOKIE) + transactionID
+    return bytes(a ^ k for a, k in zip(address, key))
+
+
+def decodeAddress(value: bytes, transactionID: bytes, xor: bool) -> str:
+    family = value[1]
+    size = {FAMILY_IPV4: 4, FAMILY_IPV6: 16}.get(family)
+    if size is None or len(value) < 4 + size:
+        raise StunError(f"Malformed STUN address attribute of family {family}")
+    address = value[4 : 4 + size]
+    if xor:
+        address = xorAddress(address, transactionID)
+    return str(ipaddress.ip_address(address))
+
+
+def parseAttributes(body: bytes) -> Dict[int, bytes]:
+    attributes: Dict[int, bytes] = {}
+    offset = 0
+    while offset + _ATTRIBUTE.size <= len(body):
+        attributeType, length = _ATTRIBUTE.unpack_from(body, offset)
+        offset += _ATTRIBUTE.size
+        # The first occurrence of an attribute counts, later ones are ignored.
+        attributes.setdefault(attributeType, body[offset : offset + length])
+        # Values are padded to a multiple of 4 bytes.
+        offset += (length + 3) & ~3
+    return attributes
+
+
+def parseResponse(data: bytes, transactionID: bytes) -> Optional[str]:
+    # Returns the address mapped by the server, or None for a datagram that
+    # isn't the response to the request.
+    if len(data) < HEADER.size:
+        return None
+    messageType, length, cookie, responseID = HEADER.unpack_from(data)
+    if cookie != MAGIC_COOKIE or responseID != transactionID:
+        return None
+    attributes = parseAttributes(data[HEADER.size : HEADER.size + length])
+    if messageType == BINDING_ERROR:
+        value = attributes.get(ATTRIBUTE_ERROR_CODE, b"")
+        code = value[2] * 100 + value[3] if len(value) >= 4 else None
+        reason = value[4:].decode("utf-8", "replace")
+        raise StunError(f"STUN binding error {code} {reason}".rstrip())
+    if messageType != BINDING_SUCCESS:
+        return None
+    if ATTRIBUTE_XOR_MAPPED_ADDRESS in attributes:
+        value = attributes[ATTRIBUTE_XOR_MAPPED_ADDRESS]
+        return decodeAddress(value, transactionID, xor=True)
+    # Servers implementing only RFC 3489 send the plain address.
+    if ATTRIBUTE_MAPPED_ADDRESS in attributes:
+        value = attributes[ATTRIBUTE_MAPPED_ADDRESS]
+        return decodeAddress(value, transactionID, xor=False)
+    raise StunError("No mapped address in the STUN response")
+
+
+class StunIPRetriever(IPRetriever):
+    # Sends an RFC 5389 Binding Request to a STUN server, which answers with
+    # the address and port the request came from, as seen past any NAT. The
+    # exchange is a single pair of small datagrams. The request is sent
+    # again, up to `attempts` times within the timeout of the context, as
+    # RFC 5389 does over UDP. `family` picks IPv4 or IPv6 when the server has
+    # both.
+
+    def __init__(
+        self,
+        host: str,
+        port: int = STUN_PORT,
+        priority: int = 0,
+        attempts: int = 3,
+        family: socket.AddressFamily = socket.AF_UNSPEC,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.priority = priority
+        self.attempts = attempts
+        self.family = family
+        # Identifies the retriever in the scoreboard and metrics like the URL
+        # of an HTTP retriever, in the form of RFC 7064.
+        self.url = f"stun:{f'[{host}]' if ':' in host else host}:{port}"
+
+    @classmethod
+    def fromURL(cls, url: str, priority: int = 0, attempts: int = 3):
+        # stun:<host>[:<port>]
+        scheme, _, address = url.partition(":")
+        if scheme != "stun" or not address:
+            raise ValueError(f"Invalid STUN retriever URL {url!r}")
+        if address.startswith("["):
+            host, _, rest = address[1:].partition("]")
+            port = rest[1:] if rest.startswith(":") else ""
+        elif address.count(":") == 1:
+            host, _, port = address.partition(":")
+        else:
+            host, port = address, ""
+        return cls(host, int(port) if port else STUN_PORT, priority, attempts)
+
+    async def getIPAsync(self, context: IPRetrieverContext) -> IPResultObject:
+        ipObject = IPObject()
+        error = None
+        try:
+            if context.proxy is not None:
+                # The answer would be the address of this host, not the proxy.
+                raise ValueError("STUN requests can't be sent through a proxy")
+            transactionID = os.urandom(12)
+            address = await exchangeAsync(
+                self.host,
+                self.port,
+                encodeBindingRequest(transactionID),
+                lambda data: parseResponse(data, transactionID),
+                context.getTimeout(),
+                self.attempts,
+                self.family,
+            )
+            ipObject = IPObject(address)
+        except Exception as e:
+            error = e.with_traceback(None)
+            logger.warning(f"Run into error querying {self.url} due to error {e!r}")
+        return IPResultObject(
+            ipObject, retriever=self, priority=self.priority, error=error
+        )
+
+    def __repr__(self) -> str:
+        return f"StunIPRetriever({self.url!r})"
@@ -0,0 +1,73 @@
+import asyncio
+import socket
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Parses a datagram into the answer, returns None for a datagram that isn't
+# the answer to our request, e.g. a late reply to an earlier one, or raises to
+# fail the exchange.
+DatagramParser = Callable[[bytes], Optional[T]]
+
+
+class _ExchangeProtocol(asyncio.DatagramProtocol, Generic[T]):
+
+    def __init__(self, parse: DatagramParser[T]) -> None:
+        self._parse = parse
+        self.future: "asyncio.Future[T]" = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        if self.future.done():
+            return
+        try:
+            result = self._parse(data)
+        except Exception as e:
+            self.future.set_exception(e)
+            return
+        if result is not None:
+            self.future.set_result(result)
+
+    def error_received(self, exc: Exception) -> None:
+        # E.g. an ICMP port unreachable for the previous datagram.
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if not self.future.done():
+            self.future.cancel()
+
+
+async def exchangeAsync(
+    host: str,
+    port: int,
+    request: bytes,
+    parse: DatagramParser[T],
+    timeout: float,
+    attempts: int = 3,
+    family: socket.AddressFamily = socket.AF_UNSPEC,
+) -> T:
+    # Sends `request` to host:port and waits for the answer, sending it again
+    # if none arrives. Like the retransmissions of STUN, each wait is twice the
+    # previous one, and all of them fit in `timeout`.
+    if timeout <= 0:
+        raise asyncio.TimeoutError("No time left before the deadline")
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _ExchangeProtocol(parse), remote_addr=(host, port), family=family
+    )
+    try:
+        deadline = loop.time() + timeout
+        interval = timeout / (2**attempts - 1)
+        for attempt in range(attempts):
+            transport.sendto(request)
+            remaining = deadline - loop.time()
+            wait = remaining if attempt == attempts - 1 else min(interval, remaining)
+            try:
+                return await asyncio.wait_for(asyncio.shield(protocol.future), wait)
+            except asyncio.TimeoutError:
+                if attempt == attempts - 1:
+                    raise
+            interval *= 2
+        raise asyncio.TimeoutError()
+    finally:
+        transport.close()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import os
+import stat
+import tempfile
+from typing import TYPE_CHECKING, List, Optional
+
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+
+if TYPE_CHECKING:
+    from python_ifconfig_me.core.getPublicIP import PublicIPClient
+
+logger = logging.getLogger(__name__)
+
+MAX_RESPONSE_SIZE = 64 * 1024
+
+
+class UntrustedSocketError(OSError):
+    pass
+
+
+def getDefaultSocketPath() -> str:
+    runtimeDir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtimeDir:
+        return os.path.join(runtimeDir, "ifconfig-me.sock")
+    return os.path.join(getFallbackSocketDir(), "ifconfig-me.sock")
+
+
+def getFallbackSocketDir() -> str:
+    # Without a runtime directory, the socket goes in a directory of our own
+    # under the world writable temporary directory, which only we can enter.
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(tempfile.gettempdir(), f"ifconfig-me-{uid}")
+
+
+def ensureSocketDir(socketPath: str) -> None:
+    # Sockets elsewhere are in a directory of the caller's choice.
+    directory = os.path.dirname(socketPath)
+    if directory != getFallbackSocketDir():
+        return
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    checkPrivateDir(directory)
+
+
+def checkPrivateDir(directory: str) -> None:
+    # Created first by another user, it could hold a socket of theirs.
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_mode & 0o077:
+        raise UntrustedSocketError(f"{directory} isn't a private directory")
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise UntrustedSocketError(f"{directory} is owned by another user")
+
+
+def checkSocket(socketPath: str) -> None:
+    # A server of another local user could otherwise answer with any IP.
+    if os.path.dirname(socketPath) == getFallbackSocketDir():
+        checkPrivateDir(os.path.dirname(socketPath))
+    info = os.lstat(socketPath)
+    if not stat.S_ISSOCK(info.st_mode):
+        raise UntrustedSocketError(f"{socketPath} isn't a socket")
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise UntrustedSocketError(f"{socketPath} is owned by another user")
+
+
+def matchesOptions(result: VotingResult, options: Optional[GetPublicIPOptions]) -> bool:
+    # The server answers for its own options, so an answer of the other
+    # family can't be used.
+    if options is None:
+        return True
+    ipObject = IPObject(result.ip)
+    if options.ipv4 and not ipObject.isIPv4():
+        return False
+    if options.ipv6 and not ipObject.isIPv6():
+        return False
+    return True
+
+
+async def queryLocalServerAsync(
+    socketPath: Optional[str] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    timeout: float = 1,
+) -> Optional[VotingResult]:
+    # Talks to a server started by `ifconfig-me serve`, over TCP when a port is
+    # given and over the Unix socket otherwise.
+    async def query() -> Optional[VotingResult]:
+        if port is not None:
+            reader, writer = await asyncio.open_connection(host or "127.0.0.1", port)
+        else:
+            path = socketPath or getDefaultSocketPath()
+            checkSocket(path)
+            reader, writer = await asyncio.open_unix_connection(path)
+        try:
+            writer.write(b"GET /json HTTP/1.0\r\n\r\n")
+            await writer.drain()
+            response = b""
+            while len(response) < MAX_RESPONSE_SIZE:
+                chunk = await reader.read(MAX_RESPONSE_SIZE - len(response))
+                if not chunk:
+                    break
+                response += chunk
+        finally:
+            writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.0 200"):
+            return None
+        return VotingResult(ip=json.loads(body)["ip"], statistics=[])
+
+    return await asyncio.wait_for(query(), timeout)
+
+
+async def getPublicIPLocalAsync(
+    socketPath: Optional[str] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    timeout: float = 1,
+    fallback: bool = True,
+    options: Optional[GetPublicIPOptions] = None,
+    ipRetrievers: Optional[List[IPRetriever]] = None,
+    client: Optional["PublicIPClient"] = None,
+) -> Optional[VotingResult]:
+    try:
+        result = await queryLocalServerAsync(socketPath, host, port, timeout)
+        if result is None:
+            logger.info("The local server has no public IP yet")
+        elif not matchesOptions(result, options):
+            logger.info(f"The local server answered {result.ip} of another family")
+        else:
+            return result
+    except (OSError, asyncio.TimeoutError, ValueError, KeyError) as e:
+        logger.info(f"Can't query the local server: {e!r}")
+    if not fallback:
+        return None
+    from python_ifconfig_me.core.getPublicIP import getPublicIPAsync
+
+    return await getPublicIPAsync(options, ipRetrievers, client=client)
+
+
+def getPublicIPLocal(
+    socketPath: Optional[str] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    timeout: float = 1,
+    fallback: bool = True,
+    options: Optional[GetPublicIPOptions] = None,
+    ipRetrievers: Optional[List[IPRetriever]] = None,
+) -> Optional[VotingResult]:
+    from python_ifconfig_me.core.getPublicIP import getSharedClient
+
+    backgroundLoop, client = getSharedClient()
+    return backgroundLoop.run(
+        getPublicIPLocalAsync(
+            socketPath, host, port, timeout, fallback, options, ipRetrievers, client
+        )
+    )
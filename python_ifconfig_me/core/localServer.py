@@ -0,0 +1,206 @@
+import asyncio
+import errno
+import json
+import logging
+import os
+import stat
+import time
+from typing import Dict, List, Optional
+
+from python_ifconfig_me.core.getPublicIP import PublicIPClient
+from python_ifconfig_me.core.instrumentation import MetricsCollector
+from python_ifconfig_me.core.localClient import ensureSocketDir, getDefaultSocketPath
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUEST_SIZE = 8 * 1024
+# Local clients send their request right away, so a connection that doesn't
+# is dropped rather than left holding a handler.
+REQUEST_TIMEOUT = 5
+
+
+def makeResponse(status: str, contentType: str, body: bytes) -> bytes:
+    head = (
+        f"HTTP/1.0 {status}\r\n"
+        f"Content-Type: {contentType}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("ascii") + body
+
+
+NOT_READY_RESPONSE = makeResponse(
+    "503 Service Unavailable", "text/plain", b"No public IP yet\n"
+)
+NOT_FOUND_RESPONSE = makeResponse("404 Not Found", "text/plain", b"Not found\n")
+BAD_REQUEST_RESPONSE = makeResponse("400 Bad Request", "text/plain", b"Bad request\n")
+
+
+async def removeStaleSocket(socketPath: str) -> None:
+    # Left behind by a server that didn't exit cleanly. A socket that still
+    # accepts connections belongs to a running server, and anything else
+    # isn't ours to remove.
+    try:
+        info = os.lstat(socketPath)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode):
+        raise FileExistsError(f"{socketPath} exists and isn't a socket")
+    try:
+        _, writer = await asyncio.open_unix_connection(socketPath)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(socketPath)
+        return
+    writer.close()
+    raise OSError(errno.EADDRINUSE, f"A server is already listening on {socketPath}")
+
+
+class PublicIPServer:
+    # Keeps the voted public IP fresh in the background and answers local
+    # clients from memory over a Unix socket and/or loopback HTTP:
+    #   GET /      the IP as text
+    #   GET /json  {"ip": ..., "updatedAt": ...}
+    #   GET /metrics  Prometheus metrics, when a MetricsCollector is given
+
+    def __init__(
+        self,
+        options: Optional[GetPublicIPOptions] = None,
+        client: Optional[PublicIPClient] = None,
+        refresh_interval: float = 30,
+        socket_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        metrics: Optional[MetricsCollector] = None,
+        request_timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        self.options = options
+        self.refresh_interval = refresh_interval
+        self.request_timeout = request_timeout
+        # Listens on the Unix socket unless only a port is given.
+        self.socket_path = (
+            socket_path
+            if socket_path is not None or port is not None
+            else getDefaultSocketPath()
+        )
+        self.host = host
+        self.port = port
+        self.result: Optional[VotingResult] = None
+        self._ownsClient = client is None
+        self._client = client or PublicIPClient()
+        self.metrics = metrics
+        if metrics is not None and metrics not in self._client.observers:
+            self._client.observers.append(metrics)
+        self._responses: Dict[bytes, bytes] = {}
+        self._servers: List[asyncio.AbstractServer] = []
+        self._refreshTask: Optional[asyncio.Task] = None
+        # Identifies the socket we bound, to not remove another one in its
+        # place on close.
+        self._socketInode: Optional[int] = None
+
+    async def __aenter__(self) -> "PublicIPServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self.socket_path is not None:
+            ensureSocketDir(self.socket_path)
+            await removeStaleSocket(self.socket_path)
+            self._servers.append(
+                await asyncio.start_unix_server(
+                    self._handle, self.socket_path, limit=MAX_REQUEST_SIZE
+                )
+            )
+            self._socketInode = os.lstat(self.socket_path).st_ino
+        if self.port is not None:
+            server = await asyncio.start_server(
+                self._handle, self.host, self.port, limit=MAX_REQUEST_SIZE
+            )
+            self.port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+        self._refreshTask = asyncio.ensure_future(self._refreshForever())
+
+    async def serveForever(self) -> None:
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def close(self) -> None:
+        if self._refreshTask is not None:
+            self._refreshTask.cancel()
+            await asyncio.gather(self._refreshTask, return_exceptions=True)
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        if self.socket_path is not None and self._socketInode is not None:
+            try:
+                if os.lstat(self.socket_path).st_ino == self._socketInode:
+                    os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+            self._socketInode = None
+        if self._ownsClient:
+            await self._client.close()
+
+    async def refresh(self) -> None:
+        result = await self._client.getPublicIPAsync(self.options)
+        if result is None:
+            # Keep serving the last known IP rather than nothing.
+            logger.warning("No successful API call while refreshing the public IP")
+            return
+        self.result = result
+        # Responses are rendered once per refresh, so answering a client is a
+        # dictionary lookup and a socket write.
+        text = makeResponse("200 OK", "text/plain", f"{result.ip}\n".encode())
+        body = json.dumps({"ip": result.ip, "updatedAt": time.time()})
+        self._responses = {
+            b"/": text,
+            b"/ip": text,
+            b"/json": makeResponse("200 OK", "application/json", body.encode()),
+        }
+
+    async def _refreshForever(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Run into error refreshing the public IP: {e}")
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"), self.request_timeout
+            )
+            response = self._route(head)
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            asyncio.TimeoutError,
+        ):
+            response = BAD_REQUEST_RESPONSE
+        try:
+            writer.write(response)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _route(self, head: bytes) -> bytes:
+        parts = head.split(b"\r\n", 1)[0].split(b" ")
+        if len(parts) != 3 or parts[0] != b"GET":
+            return BAD_REQUEST_RESPONSE
+        path = parts[1].split(b"?", 1)[0]
+        if path == b"/metrics" and self.metrics is not None:
+            text = self.metrics.toPrometheusText()
+            return makeResponse("200 OK", "text/plain; version=0.0.4", text.encode())
+        if not self._responses:
+            return NOT_READY_RESPONSE
+        return self._responses.get(path, NOT_FOUND_RESPONSE)
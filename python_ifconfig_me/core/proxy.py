@@ -0,0 +1,26 @@
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import aiohttp
+
+SOCKS_SCHEMES = ("socks4", "socks4a", "socks5", "socks5h")
+
+
+def isSocksProxy(proxy: str) -> bool:
+    return urlsplit(proxy).scheme.lower() in SOCKS_SCHEMES
+
+
+def openSocksSession(proxy: str) -> "aiohttp.ClientSession":
+    # aiohttp only speaks HTTP to proxies. SOCKS needs a connector from the
+    # optional aiohttp-socks package, and so a session per proxy.
+    import aiohttp
+
+    try:
+        from aiohttp_socks import ProxyConnector  # type: ignore[import-not-found]
+    except ImportError as e:
+        raise ImportError(
+            "SOCKS proxies need the aiohttp-socks package:"
+            " pip install python-ifconfig-me[socks]"
+        ) from e
+    return aiohttp.ClientSession(connector=ProxyConnector.from_url(proxy))
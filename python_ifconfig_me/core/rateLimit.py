@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject, IPRetriever
+
+logger = logging.getLogger(__name__)
+
+
+def getHost(url: str) -> str:
+    return urlsplit(url).netloc or url
+
+
+class ThrottledError(Exception):
+    # A service answered 429 Too Many Requests, or 503 with a Retry-After.
+
+    def __init__(self, status: int, retry_after: Optional[float] = None) -> None:
+        super().__init__(
+            f"Throttled with status {status}"
+            + ("" if retry_after is None else f", retry after {retry_after:g}s")
+        )
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parseRetryAfter(
+    value: Optional[str], now: Callable[[], float] = time.time
+) -> Optional[float]:
+    # Seconds to wait according to a Retry-After header, which holds either
+    # a number of seconds or an HTTP date.
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if date.tzinfo is None:
+        return None
+    return max(date.timestamp() - now(), 0.0)
+
+
+class TokenBucket:
+    # Allows `rate` acquisitions per second on average and bursts of up to
+    # `burst`. Waiters are served in the order they arrived.
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = burst
+        self._updatedAt = clock()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def tryAcquire(self) -> bool:
+        # Takes a token if one is available, without waiting.
+        if not self.hasToken():
+            return False
+        self._tokens -= 1
+        return True
+
+    def hasToken(self) -> bool:
+        self._refill()
+        return self._tokens >= 1
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updatedAt) * self.rate
+        )
+        self._updatedAt = now
+
+    async def acquire(self) -> None:
+        # The lock is created lazily so that it belongs to the running loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await self._sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class RateLimiter:
+    # One token bucket per key, e.g. per provider host.
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+
+    def getBucket(self, key: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(
+                self.rate, self.burst, self._clock, self._sleep
+            )
+        return bucket
+
+    async def acquire(self, key: Hashable) -> None:
+        await self.getBucket(key).acquire()
+
+
+@dataclass
+class EndpointThrottle:
+    # Event loop independent monotonic time until which the endpoint isn't
+    # called, and until which it is called after the others.
+    suppressedUntil: float = 0
+    deprioritizedUntil: float = 0
+    throttles: int = 0
+
+
+class RateLimitScheduler:
+    # Picks the retrievers a lookup may call, per endpoint, i.e. host:
+    # - an endpoint that answered 429, or 503 with a Retry-After, isn't
+    #   called until the Retry-After, `default_retry_after` seconds without
+    #   one, at most `max_retry_after`;
+    # - after that it is called after the other retrievers for `cooldown`
+    #   seconds, so an early exit or a quorum usually spares it;
+    # - with `rate`, an endpoint is called at most `rate` times per second on
+    #   average, with bursts of `burst`, and is skipped in lookups while it
+    #   is out of budget. `budgets` sets (rate, burst) for single hosts,
+    #   e.g. {"ipinfo.io": (1 / 60, 5)}. A token is only taken by
+    #   tryAcquire, when a request is actually sent, so retrievers spared by
+    #   an early exit or not selected don't use up the budget.
+    # It is thread safe and doesn't wait, so it can be shared by clients on
+    # any event loop.
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: float = 1,
+        budgets: Optional[Mapping[str, Tuple[float, float]]] = None,
+        default_retry_after: float = 60,
+        max_retry_after: float = 3600,
+        cooldown: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.budgets = dict(budgets or {})
+        self.default_retry_after = default_retry_after
+        self.max_retry_after = max_retry_after
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._throttles: Dict[str, EndpointThrottle] = {}
+
+    def admit(self, retrievers: List[IPRetriever]) -> List[IPRetriever]:
+        # Throttled endpoints are all called when there is nothing else to
+        # call, rather than failing without trying. Budgets are never
+        # exceeded.
+        now = self._clock()
+        admitted = []
+        deprioritized = []
+        suppressed = []
+        with self._lock:
+            for retriever in retrievers:
+                key = getEndpointKey(retriever)
+                bucket = self._getBucket(key)
+                if bucket is not None and not bucket.hasToken():
+                    continue
+                throttle = self._throttles.get(key)
+                if throttle is not None and now < throttle.suppressedUntil:
+                    suppressed.append(retriever)
+                elif throttle is not None and now < throttle.deprioritizedUntil:
+                    deprioritized.append(retriever)
+                else:
+                    admitted.append(retriever)
+        if not admitted and not deprioritized:
+            if suppressed:
+                logger.warning("All endpoints are throttled, calling them anyway")
+                return suppressed
+            if retrievers:
+                logger.warning("All endpoints are out of budget")
+        return admitted + deprioritized
+
+    def tryAcquire(self, retriever: IPRetriever) -> bool:
+        # Takes a token of the retriever's endpoint right before calling it.
+        with self._lock:
+            bucket = self._getBucket(getEndpointKey(retriever))
+            return bucket is None or bucket.tryAcquire()
+
+    def record(self, results: List[IPResultObject]) -> None:
+        now = self._clock()
+        with self._lock:
+            for result in results:
+                retriever = result.getRetriever()
+                if retriever is None or not isinstance(result.error, ThrottledError):
+                    continue
+                retryAfter = result.error.retry_after
+                if retryAfter is None:
+                    retryAfter = self.default_retry_after
+                retryAfter = min(retryAfter, self.max_retry_after)
+                key = getEndpointKey(retriever)
+                throttle = self._throttles.setdefault(key, EndpointThrottle())
+                throttle.throttles += 1
+                throttle.suppressedUntil = max(
+                    throttle.suppressedUntil, now + retryAfter
+                )
+                throttle.deprioritizedUntil = throttle.suppressedUntil + self.cooldown
+                logger.info(f"{key} throttled, not calling it for {retryAfter:g}s")
+
+    def getThrottle(self, retriever: IPRetriever) -> EndpointThrottle:
+        with self._lock:
+            throttle = self._throttles.get(getEndpointKey(retriever))
+            return (
+                EndpointThrottle()
+                if throttle is None
+                else EndpointThrottle(
+                    throttle.suppressedUntil,
+                    throttle.deprioritizedUntil,
+                    throttle.throttles,
+                )
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._throttles.clear()
+
+    def _getBucket(self, key: str) -> Optional[TokenBucket]:
+        rate, burst = self.budgets.get(key, (self.rate, self.burst))
+        if rate is None:
+            return None
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, self._clock)
+        return bucket
+
+
+def getEndpointKey(retriever: IPRetriever) -> str:
+    url = getattr(retriever, "url", None)
+    return getHost(url) if url else repr(retriever)
+
+
+_defaultRateLimitScheduler: Optional[RateLimitScheduler] = None
+_defaultRateLimitSchedulerLock = threading.Lock()
+
+
+def getDefaultRateLimitScheduler() -> RateLimitScheduler:
+    # Shared by every client in the process that isn't given its own. It only
+    # honours Retry-After, without a budget of its own.
+    global _defaultRateLimitScheduler
+    with _defaultRateLimitSchedulerLock:
+        if _defaultRateLimitScheduler is None:
+            _defaultRateLimitScheduler = RateLimitScheduler()
+        return _defaultRateLimitScheduler
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from python_ifconfig_me.core.instrumentation import LookupObserver, notifyResult
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetriever,
+    IPRetrieverContext,
+)
+
+logger = logging.getLogger(__name__)
+
+SettledCallback = Callable[[List[IPResultObject], List[IPRetriever]], bool]
+
+
+@dataclass
+class HedgeStatistics:
+    lookups: int = 0
+    # Lookups in which at least one hedge request had to be launched.
+    hedgedLookups: int = 0
+    # Requests launched because the hedge delay expired.
+    hedgesFired: int = 0
+    # Requests launched because another request failed.
+    failovers: int = 0
+    requests: int = 0
+
+
+async def getIPTimedAsync(
+    ipRetriever: IPRetriever,
+    context: IPRetrieverContext,
+    observers: Sequence[LookupObserver] = (),
+) -> IPResultObject:
+    start = time.perf_counter()
+    result = await ipRetriever.getIPAsync(context)
+    result.elapsed = time.perf_counter() - start
+    notifyResult(observers, result)
+    return result
+
+
+async def retrieveUntilSettledAsync(
+    ipRetrievers: List[IPRetriever],
+    context: IPRetrieverContext,
+    isSettled: SettledCallback,
+    initial: Optional[int] = None,
+    hedgeDelay: Optional[float] = None,
+    statistics: Optional[HedgeStatistics] = None,
+    observers: Sequence[LookupObserver] = (),
+    deadline: Optional[float] = None,
+    tryAcquire: Optional[Callable[[IPRetriever], bool]] = None,
+) -> List[IPResultObject]:
+    # Starts the first `initial` retrievers, then launches one more whenever a
+    # request fails or nothing was launched for `hedgeDelay` seconds, until the
+    # vote is settled. By default every retriever is launched right away.
+    # Whatever is pending at `deadline`, in event loop time, is cancelled.
+    # Retrievers for which `tryAcquire` returns False when their turn comes
+    # are skipped.
+    if statistics is None:
+        statistics = HedgeStatistics()
+    statistics.lookups += 1
+    loop = asyncio.get_running_loop()
+    pending: Dict[asyncio.Future, int] = {}
+    completed: Dict[int, IPResultObject] = {}
+    nextIndex = 0
+    nextHedgeAt = 0.0
+    hedged = False
+
+    def launch() -> bool:
+        nonlocal nextIndex, nextHedgeAt
+        while nextIndex < len(ipRetrievers) and not (
+            tryAcquire is None or tryAcquire(ipRetrievers[nextIndex])
+        ):
+            nextIndex += 1
+        if nextIndex >= len(ipRetrievers):
+            return False
+        task = asyncio.ensure_future(
+            getIPTimedAsync(ipRetrievers[nextIndex], context, observers)
+        )
+        pending[task] = nextIndex
+        nextIndex += 1
+        statistics.requests += 1
+        if hedgeDelay is not None:
+            nextHedgeAt = loop.time() + hedgeDelay
+        return True
+
+    for _ in range(len(ipRetrievers) if initial is None else max(initial, 1)):
+        launch()
+    try:
+        while pending:
+            timeout = None
+            if hedgeDelay is not None and nextIndex < len(ipRetrievers):
+                timeout = max(nextHedgeAt - loop.time(), 0)
+            if deadline is not None:
+                remaining = max(deadline - loop.time(), 0)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done and deadline is not None and loop.time() >= deadline:
+                logger.debug(
+                    f"Deadline expired with {len(pending)} pending retrievers"
+                    " cancelled"
+                )
+                break
+            if not done:
+                if launch():
+                    hedged = True
+                    statistics.hedgesFired += 1
+                continue
+            for task in done:
+                result = task.result()
+                completed[pending.pop(task)] = result
+                if result.ipObject.ip is None and launch():
+                    statistics.failovers += 1
+            # Results are kept in retriever order so the vote doesn't depend
+            # on which endpoint happened to answer first.
+            results = [completed[i] for i in sorted(completed)]
+            pendingRetrievers = [ipRetrievers[i] for i in pending.values()]
+            if isSettled(results, pendingRetrievers + ipRetrievers[nextIndex:]):
+                logger.debug(
+                    f"Vote settled with {len(pending)} pending retrievers cancelled"
+                    f" and {len(ipRetrievers) - nextIndex} retrievers not started"
+                )
+                break
+            if not pending:
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if hedged:
+            statistics.hedgedLookups += 1
+    return [completed[i] for i in sorted(completed)]
@@ -0,0 +1,128 @@
+import json
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject, IPRetriever
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+from python_ifconfig_me.utils.atomicWrite import writeFileAtomic
+
+logger = logging.getLogger(__name__)
+
+
+def getRetrieverKey(retriever: IPRetriever) -> str:
+    return getattr(retriever, "url", None) or repr(retriever)
+
+
+@dataclass
+class RetrieverScore:
+    # Exponentially weighted moving averages. Retrievers start with an
+    # optimistic success rate so that unknown ones get tried.
+    latency: Optional[float] = None
+    successRate: float = 1.0
+    disagreementRate: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    disagreements: int = 0
+    updatedAt: Optional[float] = None
+
+    def getReliability(self) -> float:
+        return self.successRate * (1 - self.disagreementRate)
+
+
+class Scoreboard:
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        default_latency: float = 0.5,
+        exploration: float = 0.1,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        # Weight of the newest sample in the moving averages.
+        self.alpha = alpha
+        # Latency assumed for retrievers that haven't answered yet.
+        self.default_latency = default_latency
+        # Probability of giving the last selected slot to a random other
+        # retriever, so that degraded retrievers get a chance to recover.
+        self.exploration = exploration
+        self._rng = rng or random.Random()
+        self._scores: Dict[str, RetrieverScore] = {}
+
+    def getScore(self, retriever: IPRetriever) -> RetrieverScore:
+        return self._scores.get(getRetrieverKey(retriever), RetrieverScore())
+
+    def record(
+        self, results: List[IPResultObject], votingResult: Optional[VotingResult]
+    ) -> None:
+        winner = None if votingResult is None else IPObject(votingResult.ip)
+        now = time.time()
+        for result in results:
+            retriever = result.getRetriever()
+            if retriever is None:
+                continue
+            score = self._scores.setdefault(
+                getRetrieverKey(retriever), RetrieverScore()
+            )
+            score.requests += 1
+            score.updatedAt = now
+            if result.elapsed is not None:
+                score.latency = self._average(score.latency, result.elapsed)
+            ipObject = result.ipObject
+            success = ipObject.ip is not None
+            if not success:
+                score.failures += 1
+            score.successRate = self._average(score.successRate, float(success))
+            # Only answers of the same address family as the winner can
+            # disagree with it.
+            if success and winner is not None and ipObject.isIPv6() == winner.isIPv6():
+                disagrees = ipObject.ip != winner.ip
+                score.disagreements += disagrees
+                score.disagreementRate = self._average(
+                    score.disagreementRate, float(disagrees)
+                )
+
+    def rank(self, retrievers: List[IPRetriever]) -> List[IPRetriever]:
+        def getRankKey(retriever: IPRetriever) -> float:
+            score = self.getScore(retriever)
+            latency = self.default_latency if score.latency is None else score.latency
+            # Smoothing the latency keeps a few milliseconds of difference
+            # from outweighing a retriever that is often wrong or down.
+            return score.getReliability() / (latency + self.default_latency)
+
+        return sorted(retrievers, key=getRankKey, reverse=True)
+
+    def select(self, retrievers: List[IPRetriever], k: int) -> List[IPRetriever]:
+        ranked = self.rank(retrievers)
+        selected, others = ranked[:k], ranked[k:]
+        if selected and others and self._rng.random() < self.exploration:
+            selected[-1] = self._rng.choice(others)
+        return selected
+
+    def snapshot(self) -> Dict[str, RetrieverScore]:
+        return {key: RetrieverScore(**asdict(s)) for key, s in self._scores.items()}
+
+    def save(self, path: Union[str, Path]) -> None:
+        content = json.dumps({k: asdict(v) for k, v in self._scores.items()})
+        writeFileAtomic(path, content)
+
+    def load(self, path: Union[str, Path]) -> None:
+        try:
+            with open(path) as f:
+                content = json.load(f)
+            self._scores.update(
+                {key: RetrieverScore(**value) for key, value in content.items()}
+            )
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable scoreboard file {path}: {e}")
+
+    def _average(self, average: Optional[float], sample: float) -> float:
+        if average is None:
+            return sample
+        return (1 - self.alpha) * average + self.alpha * sample
@@ -0,0 +1,143 @@
+import time
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Tuple
+
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject, IPRetriever
+from python_ifconfig_me.core.scoreboard import Scoreboard
+from python_ifconfig_me.core.vote.statisticsInformationItem import VotingStatisticsItem
+from python_ifconfig_me.core.vote.votingStrategy import (
+    IVotingStrategy,
+    VotingResult,
+    VotingStrategyContext,
+)
+
+
+class ReliabilityWeightedVotingStrategy(IVotingStrategy):
+    # Weights every vote by how often its retriever agreed with past votes, as
+    # recorded by the scoreboard. Priorities still override any weight.
+
+    def __init__(
+        self,
+        scoreboard: Scoreboard,
+        prior: float = 0.5,
+        half_life: float = 7 * 24 * 3600,
+        min_weight: float = 0.05,
+        min_confidence: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.scoreboard = scoreboard
+        # Weight of a retriever without history. Older history counts less,
+        # halving every `half_life` seconds, so weights drift back to it.
+        self.prior = prior
+        self.half_life = half_life
+        # Keeps a retriever that was often wrong from being ignored entirely.
+        self.min_weight = min_weight
+        # isSettled then also waits until the winner keeps this confidence
+        # even if every pending retriever disagrees.
+        self.min_confidence = min_confidence
+        self._clock = clock
+
+    def getWeight(self, retriever: Optional[IPRetriever]) -> float:
+        if retriever is None:
+            return self.prior
+        score = self.scoreboard.getScore(retriever)
+        if score.requests == 0 or score.updatedAt is None:
+            return self.prior
+        age = max(self._clock() - score.updatedAt, 0)
+        freshness = 0.5 ** (age / self.half_life)
+        agreement = 1 - score.disagreementRate
+        weight = self.prior + freshness * (agreement - self.prior)
+        return max(weight, self.min_weight)
+
+    def isSettled(
+        self,
+        results: List[IPResultObject],
+        pendingRetrievers: List[IPRetriever],
+        context: VotingStrategyContext,
+        quorum: Optional[int] = None,
+    ) -> bool:
+        votingResult = self.vote(results, replace(context, return_statistics=True))
+        if votingResult is None:
+            return False
+        leader, *others = votingResult.statistics
+        pending = [
+            (getattr(r, "priority", 0), self.getWeight(r)) for r in pendingRetrievers
+        ]
+        if any(priority > leader.priority for priority, _ in pending):
+            return False
+        if quorum is not None and leader.weight >= quorum:
+            return True
+        leaderScore = leader.score or 0
+        pendingScore = sum(w for p, w in pending if p == leader.priority)
+        otherScores = [
+            item.score or 0 for item in others if item.priority == leader.priority
+        ]
+        # Settling on a winner the pending retrievers could still overturn
+        # would answer differently than waiting for all of them.
+        if leaderScore <= max(otherScores, default=0) + pendingScore:
+            return False
+        if self.min_confidence is None or votingResult.confidence is None:
+            return True
+        # The confidence if every pending retriever answered something else.
+        worstConfidence = leaderScore / (
+            leaderScore / votingResult.confidence + pendingScore
+        )
+        return worstConfidence >= self.min_confidence
+
+    def vote(
+        self, results: List[IPResultObject], context: VotingStrategyContext
+    ) -> Optional[VotingResult]:
+        statisticsDict: Dict[Tuple[IPObject, int], VotingStatisticsItem] = {}
+        for result in results:
+            ipObject = result.ipObject
+            if context.ipv6 and not ipObject.isIPv6():
+                continue
+            if context.ipv4 and not ipObject.isIPv4():
+                continue
+            if ipObject.version is None:
+                continue
+            retriever = result.getRetriever()
+            weight = self.getWeight(retriever)
+            key = (ipObject, result.priority)
+            item = statisticsDict.get(key)
+            if item is None:
+                item = statisticsDict[key] = VotingStatisticsItem(
+                    ipObject, weight=0, priority=result.priority, score=0.0
+                )
+            item.weight += 1
+            item.score = (item.score or 0) + weight
+            if retriever is not None:
+                item.retrievers.append(retriever)
+        if not statisticsDict:
+            return None
+
+        preference = 1 if context.prefer_ipv6 else -1
+        statistics = sorted(
+            statisticsDict.values(),
+            key=lambda item: (
+                item.priority,
+                item.score,
+                int(item.ipObject.isIPv6()) * preference,
+                item.ipObject.value,
+            ),
+            reverse=True,
+        )
+        leader = statistics[0]
+        ip = leader.ipObject.ip
+        if ip is None:
+            return None
+        # A dual-stack host has an IPv4 and an IPv6 address, so only answers of
+        # the winner's family dispute it.
+        rivals = [
+            item.score or 0
+            for item in statistics
+            if item.priority == leader.priority
+            and item.ipObject.version == leader.ipObject.version
+        ]
+        confidence = (leader.score or 0) / sum(rivals)
+        return VotingResult(
+            ip=ip,
+            statistics=statistics if context.return_statistics else [],
+            confidence=confidence,
+        )
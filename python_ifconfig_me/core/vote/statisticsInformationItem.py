@@ -1,6 +1,6 @@
 import sys
 from dataclasses import dataclass, field
-from typing import Any, List, TypedDict
+from typing import Any, List, Optional, TypedDict
 
 from python_ifconfig_me.core.ipObject import IPObject
 from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
@@ -21,14 +21,16 @@ class VotingStatisticsItem:
     weight: int = 1
     priority: int = 0
     retrievers: List[IPRetriever] = field(default_factory=list)
+    # Sum of the weights of the votes, for strategies that don't count every
+    # vote as 1.
+    score: Optional[float] = None
 
     def getSortKey(self, **kwargs: Unpack[GetSortKeyKwargs]) -> Any:
         prefer_ipv6 = kwargs.get("prefer_ipv6", False)
-        ip = self.ipObject.ip
         is_ipv6 = int(self.ipObject.isIPv6())
         return (
             self.priority,
             self.weight,
             (is_ipv6 * (1 if prefer_ipv6 else -1)),
-            ip,
+            self.ipObject.value,
         )
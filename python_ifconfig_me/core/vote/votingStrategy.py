@@ -1,7 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Dict, List, Optional, Protocol, Tuple
 
-from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject, IPRetriever
 from python_ifconfig_me.core.vote.statisticsInformationItem import VotingStatisticsItem
 
 
@@ -9,6 +10,9 @@ from python_ifconfig_me.core.vote.statisticsInformationItem import VotingStatist
 class VotingResult:
     ip: str
     statistics: list[VotingStatisticsItem]
+    # Share of the vote the winner got, from 0 to 1, for strategies that can
+    # tell how much to trust the answer.
+    confidence: Optional[float] = None
 
 
 @dataclass
@@ -26,9 +30,46 @@ class IVotingStrategy(Protocol):
     ) -> Optional[VotingResult]:
         pass
 
+    def isSettled(
+        self,
+        results: List[IPResultObject],
+        pendingRetrievers: List[IPRetriever],
+        context: VotingStrategyContext,
+        quorum: Optional[int] = None,
+    ) -> bool:
+        # Strategies that can't tell whether the outcome is final wait for
+        # every retriever.
+        return False
+
 
 class SimpleVotingStrategy(IVotingStrategy):
 
+    def isSettled(
+        self,
+        results: List[IPResultObject],
+        pendingRetrievers: List[IPRetriever],
+        context: VotingStrategyContext,
+        quorum: Optional[int] = None,
+    ) -> bool:
+        votingResult = self.vote(results, replace(context, return_statistics=True))
+        if votingResult is None:
+            return False
+        leader, *others = votingResult.statistics
+        pendingPriorities = [getattr(r, "priority", 0) for r in pendingRetrievers]
+        # A pending retriever with a higher priority overrides any weight.
+        if any(priority > leader.priority for priority in pendingPriorities):
+            return False
+        if quorum is not None and leader.weight >= quorum:
+            return True
+        # Otherwise the vote is settled only when no combination of the
+        # pending answers can catch up with the leader.
+        pendingVotes = sum(1 for p in pendingPriorities if p == leader.priority)
+        runnerUpWeight = max(
+            (item.weight for item in others if item.priority == leader.priority),
+            default=0,
+        )
+        return leader.weight > runnerUpWeight + pendingVotes
+
     def vote(
         self, results: List[IPResultObject], context: VotingStrategyContext
     ) -> Optional[VotingResult]:
@@ -51,17 +92,14 @@ class SimpleVotingStrategy(IVotingStrategy):
         if not candidates:
             return None
 
-        statisticsDict: Dict[Tuple[str, int], VotingStatisticsItem] = {}
+        # IPObjects hash by value, so no address is formatted while counting.
+        statisticsDict: Dict[Tuple[IPObject, int], VotingStatisticsItem] = {}
         for candidate in candidates:
-            ip = candidate.ipObject.ip
-            if ip is None:
-                continue
+            ipObject = candidate.ipObject
             priority = candidate.priority
-            key = (ip, priority)
+            key = (ipObject, priority)
             if key not in statisticsDict:
-                statisticsDict[key] = VotingStatisticsItem(
-                    candidate.ipObject, priority=priority
-                )
+                statisticsDict[key] = VotingStatisticsItem(ipObject, priority=priority)
             else:
                 statisticsDict[key].weight += 1
             retriever = candidate.getRetriever()
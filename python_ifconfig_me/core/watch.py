@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from python_ifconfig_me.core.getPublicIP import PublicIPClient
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IPChangeEvent:
+    ip: str
+    # None for the first IP found by the watcher.
+    previousIP: Optional[str]
+    result: VotingResult
+    timestamp: float
+
+
+@dataclass
+class WatchOptions:
+    min_interval: float = 5
+    max_interval: float = 300
+    # The interval is multiplied by this factor after every poll that didn't
+    # find a new IP, and reset to min_interval when the IP changes.
+    backoff_factor: float = 2
+
+
+async def watchPublicIPAsync(
+    options: Optional[GetPublicIPOptions] = None,
+    watchOptions: Optional[WatchOptions] = None,
+    client: Optional[PublicIPClient] = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> AsyncIterator[IPChangeEvent]:
+    if watchOptions is None:
+        watchOptions = WatchOptions()
+    ownsClient = client is None
+    if client is None:
+        client = PublicIPClient()
+    previousIP: Optional[str] = None
+    interval = watchOptions.min_interval
+    try:
+        while True:
+            result = await client.getPublicIPAsync(options)
+            if result is None:
+                logger.warning("No successful API call while watching the public IP")
+            elif result.ip != previousIP:
+                logger.info(f"Public IP changed from {previousIP} to {result.ip}")
+                yield IPChangeEvent(result.ip, previousIP, result, time.time())
+                previousIP = result.ip
+                interval = watchOptions.min_interval
+            else:
+                interval = min(
+                    interval * watchOptions.backoff_factor, watchOptions.max_interval
+                )
+            await sleep(interval)
+    finally:
+        if ownsClient:
+            await client.close()
+
+
+async def runWatchHookAsync(command: str, event: IPChangeEvent) -> int:
+    # Runs a shell command with the new and the previous IP in the
+    # environment, and returns its exit status.
+    env = dict(
+        os.environ,
+        IFCONFIG_ME_IP=event.ip,
+        IFCONFIG_ME_PREVIOUS_IP=event.previousIP or "",
+    )
+    process = await asyncio.create_subprocess_shell(command, env=env)
+    return await process.wait()
@@ -0,0 +1,111 @@
+import asyncio
+import ipaddress
+import struct
+from typing import Optional, Tuple
+
+from python_ifconfig_me.core.ipretriever.dnsIPRetriever import (
+    RECORD_TYPES,
+    skipName,
+)
+
+_HEADER = struct.Struct("!HHHHHH")
+
+
+class _DnsServerProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, server: "DnsServer") -> None:
+        self._server = server
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        response = self._server.handle(data)
+        if response is None:
+            return
+        if self._server.latency:
+            asyncio.get_running_loop().call_later(
+                self._server.latency, self._send, response, addr
+            )
+        else:
+            self._send(response, addr)
+
+    def _send(self, response: bytes, addr: Tuple) -> None:
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(response, addr)
+
+
+class DnsServer:
+    # A local stand-in for a DNS server reporting the address of the client,
+    # like resolver1.opendns.com. Every A, AAAA or TXT query is answered with
+    # `ip`, when of the right family, whatever the name. The first `drop`
+    # queries are ignored to exercise retransmissions.
+
+    def __init__(
+        self,
+        ip: str = "203.0.113.1",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0,
+        drop: int = 0,
+    ) -> None:
+        self.ip = ip
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.drop = drop
+        self.requests = 0
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def __aenter__(self) -> "DnsServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DnsServerProtocol(self), local_addr=(self.host, self.port)
+        )
+        self.port = self._transport.get_extra_info("sockname")[1]
+
+    async def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def url(self, name: str = "myip.example.com", record_type: str = "A") -> str:
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"dns://{host}:{self.port}/{name}?type={record_type}"
+
+    def handle(self, data: bytes) -> Optional[bytes]:
+        self.requests += 1
+        if self.requests <= self.drop or len(data) < _HEADER.size:
+            return None
+        queryID = _HEADER.unpack_from(data)[0]
+        end = skipName(data, _HEADER.size)
+        question = data[_HEADER.size : end + 4]
+        recordType = struct.unpack_from("!H", data, end)[0]
+        rdata = self._getRecord(recordType)
+        answers = 0 if rdata is None else 1
+        # Response, recursion desired and available, no error.
+        response = _HEADER.pack(queryID, 0x8180, 1, answers, 0, 0) + question
+        if rdata is not None:
+            # The name of the answer points to the one of the question.
+            response += struct.pack("!HHHIH", 0xC00C, recordType, 1, 0, len(rdata))
+            response += rdata
+        return response
+
+    def _getRecord(self, recordType: int) -> Optional[bytes]:
+        address = ipaddress.ip_address(self.ip)
+        if recordType == RECORD_TYPES["TXT"]:
+            text = self.ip.encode()
+            return bytes([len(text)]) + text
+        if recordType == RECORD_TYPES["A"] and address.version == 4:
+            return address.packed
+        if recordType == RECORD_TYPES["AAAA"] and address.version == 6:
+            return address.packed
+        return None
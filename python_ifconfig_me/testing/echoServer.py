@@ -0,0 +1,109 @@
+import asyncio
+import json
+import random
+from typing import Callable, List, Optional
+
+from aiohttp import web
+
+# A latency distribution returns the delay in seconds of one response.
+LatencyDistribution = Callable[[random.Random], float]
+
+
+def constantLatency(seconds: float) -> LatencyDistribution:
+    return lambda rng: seconds
+
+
+def uniformLatency(low: float, high: float) -> LatencyDistribution:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormalLatency(median: float, sigma: float) -> LatencyDistribution:
+    return lambda rng: median * rng.lognormvariate(0, sigma)
+
+
+class EchoServer:
+    # A local stand-in for the public IP services. Every response reports
+    # `ip`, optionally after a random delay, as an error, or padded to
+    # `body_size` bytes:
+    #   GET /ip    the IP as text
+    #   GET /json  {"ip": ...}
+    # With `echo_header`, the value of that request header is reported instead
+    # when present, e.g. the X-Forwarded-For set by a ProxyServer.
+
+    def __init__(
+        self,
+        ip: str = "203.0.113.1",
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0,
+        body_size: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+        echo_header: Optional[str] = None,
+    ) -> None:
+        self.ip = ip
+        self.echo_header = echo_header
+        self.latency = latency
+        self.error_rate = error_rate
+        self.body_size = body_size
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def __aenter__(self) -> "EchoServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/ip", self._handleText)
+        app.router.add_get("/json", self._handleJSON)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def url(self, path: str = "/ip") -> str:
+        return f"http://{self.host}:{self.port}{path}"
+
+    def urls(self, count: int, path: str = "/ip") -> List[str]:
+        # Distinct URLs for the same endpoint, so that many retrievers can
+        # share one server.
+        return [f"{self.url(path)}?n={i}" for i in range(count)]
+
+    async def _respond(self, body: str, contentType: str) -> web.Response:
+        self.requests += 1
+        if self.latency is not None:
+            await asyncio.sleep(max(self.latency(self._rng), 0))
+        if self._rng.random() < self.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        return web.Response(text=body, content_type=contentType)
+
+    def _pad(self, body: str) -> str:
+        if self.body_size is None or len(body) >= self.body_size:
+            return body
+        return body + " " * (self.body_size - len(body))
+
+    def _getIP(self, request: web.Request) -> str:
+        if self.echo_header is not None:
+            return request.headers.get(self.echo_header, self.ip)
+        return self.ip
+
+    async def _handleText(self, request: web.Request) -> web.Response:
+        return await self._respond(self._pad(self._getIP(request)), "text/plain")
+
+    async def _handleJSON(self, request: web.Request) -> web.Response:
+        return await self._respond(
+            self._pad(json.dumps({"ip": self._getIP(request)})), "application/json"
+        )
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_HEAD_SIZE = 64 * 1024
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authorization",
+    "proxy-connection",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+class ProxyServer:
+    # A local stand-in for an HTTP forward proxy. It forwards plain HTTP GET
+    # requests, one per connection, and tags them with
+    # `X-Forwarded-For: <egress_ip>` so that an EchoServer with
+    # echo_header="X-Forwarded-For" reports the egress IP of the proxy.
+    # CONNECT, and so HTTPS, isn't supported.
+
+    def __init__(
+        self,
+        egress_ip: str = "198.51.100.1",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0,
+    ) -> None:
+        self.egress_ip = egress_ip
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def __aenter__(self) -> "ProxyServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_HEAD_SIZE
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            response = await self._forward(head)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            response = b"HTTP/1.1 400 Bad Request\r\nConnection: close\r\n\r\n"
+        except (OSError, ValueError) as e:
+            logger.info(f"Can't forward the request: {e!r}")
+            response = b"HTTP/1.1 502 Bad Gateway\r\nConnection: close\r\n\r\n"
+        try:
+            writer.write(response)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _forward(self, head: bytes) -> bytes:
+        self.requests += 1
+        requestLine, *headerLines = head.decode("latin-1").split("\r\n")
+        method, target, _ = requestLine.split(" ")
+        url = urlsplit(target)
+        if method != "GET" or url.scheme != "http" or url.hostname is None:
+            return b"HTTP/1.1 405 Method Not Allowed\r\nConnection: close\r\n\r\n"
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = url.path or "/"
+        if url.query:
+            path += f"?{url.query}"
+        headers = [
+            line
+            for line in headerLines
+            if line and line.split(":", 1)[0].strip().lower() not in HOP_BY_HOP_HEADERS
+        ]
+        headers += [f"X-Forwarded-For: {self.egress_ip}", "Connection: close"]
+        request = f"GET {path} HTTP/1.1\r\n" + "".join(f"{h}\r\n" for h in headers)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        try:
+            writer.write(request.encode("latin-1") + b"\r\n")
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
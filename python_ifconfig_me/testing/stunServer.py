@@ -0,0 +1,119 @@
+import asyncio
+import ipaddress
+import struct
+from typing import Optional, Tuple
+
+from python_ifconfig_me.core.ipretriever.stunIPRetriever import (
+    ATTRIBUTE_MAPPED_ADDRESS,
+    ATTRIBUTE_XOR_MAPPED_ADDRESS,
+    BINDING_REQUEST,
+    BINDING_SUCCESS,
+    FAMILY_IPV4,
+    FAMILY_IPV6,
+    HEADER,
+    MAGIC_COOKIE,
+    xorAddress,
+)
+
+
+def encodeAddressAttribute(
+    attributeType: int, ip: str, port: int, transactionID: bytes
+) -> bytes:
+    address = ipaddress.ip_address(ip)
+    family = FAMILY_IPV4 if address.version == 4 else FAMILY_IPV6
+    packed = address.packed
+    if attributeType == ATTRIBUTE_XOR_MAPPED_ADDRESS:
+        port ^= MAGIC_COOKIE >> 16
+        packed = xorAddress(packed, transactionID)
+    value = struct.pack("!BBH", 0, family, port) + packed
+    return struct.pack("!HH", attributeType, len(value)) + value
+
+
+class _StunServerProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, server: "StunServer") -> None:
+        self._server = server
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        response = self._server.handle(data, addr)
+        if response is None:
+            return
+        if self._server.latency:
+            asyncio.get_running_loop().call_later(
+                self._server.latency, self._send, response, addr
+            )
+        else:
+            self._send(response, addr)
+
+    def _send(self, response: bytes, addr: Tuple) -> None:
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(response, addr)
+
+
+class StunServer:
+    # A local stand-in for a STUN server answering Binding Requests. It
+    # reports `ip`, or the address the request came from when `ip` is None,
+    # in an XOR-MAPPED-ADDRESS, or in a MAPPED-ADDRESS with `legacy` like an
+    # RFC 3489 server. The first `drop` requests are ignored to exercise
+    # retransmissions.
+
+    def __init__(
+        self,
+        ip: Optional[str] = "203.0.113.1",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0,
+        drop: int = 0,
+        legacy: bool = False,
+    ) -> None:
+        self.ip = ip
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.drop = drop
+        self.legacy = legacy
+        self.requests = 0
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def __aenter__(self) -> "StunServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StunServerProtocol(self), local_addr=(self.host, self.port)
+        )
+        self.port = self._transport.get_extra_info("sockname")[1]
+
+    async def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def url(self) -> str:
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"stun:{host}:{self.port}"
+
+    def handle(self, data: bytes, addr: Tuple) -> Optional[bytes]:
+        self.requests += 1
+        if self.requests <= self.drop or len(data) < HEADER.size:
+            return None
+        messageType, _, cookie, transactionID = HEADER.unpack_from(data)
+        if messageType != BINDING_REQUEST or cookie != MAGIC_COOKIE:
+            return None
+        attributeType = (
+            ATTRIBUTE_MAPPED_ADDRESS if self.legacy else ATTRIBUTE_XOR_MAPPED_ADDRESS
+        )
+        attribute = encodeAddressAttribute(
+            attributeType, self.ip or addr[0], addr[1], transactionID
+        )
+        header = HEADER.pack(BINDING_SUCCESS, len(attribute), cookie, transactionID)
+        return header + attribute
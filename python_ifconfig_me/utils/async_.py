@@ -1,28 +1,90 @@
 import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
 import threading
+from typing import Awaitable, Callable, Coroutine, List, Optional, TypeVar
 
+logger = logging.getLogger(__name__)
 
-class RunThread(threading.Thread):
-    def __init__(self, func, args, kwargs):
-        self.func = func
-        self.args = args
-        self.kwargs = kwargs
-        self.result = None
-        super().__init__()
-
-    def run(self):
-        self.result = asyncio.run(self.func(*self.args, **self.kwargs))
-
-
-def run_async(func, *args, **kwargs):
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
-    if loop and loop.is_running():
-        thread = RunThread(func, args, kwargs)
-        thread.start()
-        thread.join()
-        return thread.result
-    else:
-        return asyncio.run(func(*args, **kwargs))
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    # An event loop running forever in a daemon thread, so that synchronous
+    # callers can share one loop, and the sessions bound to it, instead of
+    # creating a loop for every call. Coroutines are submitted from any thread.
+
+    def __init__(self, name: str = "ifconfig-me-loop") -> None:
+        self.loop = asyncio.new_event_loop()
+        self.pid = os.getpid()
+        self.closed = False
+        self._closeCallbacks: List[Callable[[], Awaitable[None]]] = []
+        self._thread = threading.Thread(target=self._runForever, name=name, daemon=True)
+        self._thread.start()
+
+    def _runForever(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine[None, None, T]) -> "concurrent.futures.Future[T]":
+        if self.closed:
+            coro.close()
+            raise RuntimeError("The background loop is closed")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[None, None, T], timeout: Optional[float] = None) -> T:
+        if threading.current_thread() is self._thread:
+            # Blocking the loop on its own coroutine would never return.
+            coro.close()
+            raise RuntimeError("Can't wait for the background loop from itself")
+        return self.submit(coro).result(timeout)
+
+    def addCloseCallback(self, callback: Callable[[], Awaitable[None]]) -> None:
+        # Run on the loop by close(), e.g. to close sessions bound to it.
+        self._closeCallbacks.append(callback)
+
+    def close(self, timeout: float = 5) -> None:
+        if self.closed:
+            return
+        if self._closeCallbacks:
+            try:
+                self.run(self._runCloseCallbacks(), timeout)
+            except Exception as e:
+                logger.warning(f"Run into error closing the background loop: {e!r}")
+        self.closed = True
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+    async def _runCloseCallbacks(self) -> None:
+        await asyncio.gather(
+            *(callback() for callback in self._closeCallbacks),
+            return_exceptions=True,
+        )
+
+
+_backgroundLoop: Optional[BackgroundLoop] = None
+_backgroundLoopLock = threading.Lock()
+
+
+def getBackgroundLoop() -> BackgroundLoop:
+    # A forked child, e.g. a prefork WSGI worker, doesn't inherit the thread
+    # running the parent's loop, so it starts its own.
+    global _backgroundLoop
+    with _backgroundLoopLock:
+        if (
+            _backgroundLoop is None
+            or _backgroundLoop.closed
+            or _backgroundLoop.pid != os.getpid()
+        ):
+            _backgroundLoop = BackgroundLoop()
+        return _backgroundLoop
+
+
+@atexit.register
+def _closeBackgroundLoop() -> None:
+    if _backgroundLoop is not None and _backgroundLoop.pid == os.getpid():
+        _backgroundLoop.close()
@@ -0,0 +1,28 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+
+def writeFileAtomic(
+    path: Union[str, Path], content: str, mode: Optional[int] = None
+) -> None:
+    # Readers see either the old or the new content, never a partial write,
+    # and a failed write leaves the old file and no temporary file behind.
+    # The temporary file is only readable by the owner unless a mode is given.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmpPath = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmpPath, mode)
+        os.replace(tmpPath, path)
+    except BaseException:
+        os.unlink(tmpPath)
+        raise
@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import IO, Any, AsyncIterator, Callable, Dict, Optional, Union
+
+from python_ifconfig_me.utils.atomicWrite import writeFileAtomic
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_VERSION = 1
+
+
+def getDefaultCacheFile() -> Path:
+    cacheHome = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return Path(cacheHome) / "ifconfig-me" / "result.json"
+
+
+# A small JSON cache shared by every process on the host. Writes replace the
+# file atomically, so readers never need a lock. Writers serialize on a sibling
+# lock file, which also lets a process that missed the cache wait for another
+# process that is already refreshing it instead of querying the services too.
+class FileCache:
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self._clock = clock
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._load().get(key)
+        if entry is None:
+            return None
+        age = self._clock() - entry.get("createdAt", 0)
+        if not 0 <= age < self.ttl:
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        entries = self._load()
+        now = self._clock()
+        entries = {
+            k: v
+            for k, v in entries.items()
+            if 0 <= now - v.get("createdAt", 0) < self.ttl
+        }
+        entries[key] = {"createdAt": now, "value": value}
+        content = json.dumps({"version": CACHE_FILE_VERSION, "entries": entries})
+        writeFileAtomic(self.path, content)
+
+    @asynccontextmanager
+    async def lockAsync(self, pollInterval: float = 0.05) -> AsyncIterator[None]:
+        # Polls for the lock instead of blocking the event loop while another
+        # process holds it. asyncio is only imported here, so that a cache hit
+        # of the CLI doesn't import it.
+        import asyncio
+
+        with self._openLockFile() as lockFile:
+            if fcntl is not None:
+                while True:
+                    try:
+                        fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        await asyncio.sleep(pollInterval)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lockFile.fileno(), fcntl.LOCK_UN)
+
+    def _openLockFile(self) -> IO[str]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return open(self.path.with_name(self.path.name + ".lock"), "a")
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache file {self.path}: {e}")
+            return {}
+        if (
+            not isinstance(content, dict)
+            or content.get("version") != CACHE_FILE_VERSION
+        ):
+            return {}
+        entries = content.get("entries")
+        return entries if isinstance(entries, dict) else {}
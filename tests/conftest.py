@@ -0,0 +1,21 @@
+import pytest
+
+from python_ifconfig_me.core.circuitBreaker import getDefaultCircuitBreakers
+from python_ifconfig_me.core.rateLimit import getDefaultRateLimitScheduler
+
+
+@pytest.fixture(autouse=True)
+def resetCircuitBreakers():
+    # The breakers are shared by the whole process, so failures in one test
+    # would otherwise skip retrievers in the next.
+    getDefaultCircuitBreakers().reset()
+    yield
+    getDefaultCircuitBreakers().reset()
+
+
+@pytest.fixture(autouse=True)
+def resetRateLimits():
+    # Likewise a 429 in one test would suppress the endpoint in the next.
+    getDefaultRateLimitScheduler().reset()
+    yield
+    getDefaultRateLimitScheduler().reset()
@@ -0,0 +1,52 @@
+import asyncio
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MockStream:
+    def __init__(self, data, chunk_size):
+        self._data = data
+        self._chunk_size = chunk_size
+        self.bytesRead = 0
+
+    async def read(self, n=-1):
+        if n < 0:
+            n = len(self._data)
+        size = min(n, self._chunk_size)
+        chunk = self._data[self.bytesRead : self.bytesRead + size]
+        self.bytesRead += len(chunk)
+        return chunk
+
+
+class MockResponse:
+    def __init__(self, text, status, delay=0, headers=None, chunk_size=1024):
+        self._text = text
+        self.status = status
+        self._delay = delay
+        self.headers = {"Content-Type": "text/plain"} if headers is None else headers
+        data = text if isinstance(text, bytes) else text.encode()
+        self.content = MockStream(data, chunk_size)
+
+    @property
+    def content_length(self):
+        contentLength = self.headers.get("Content-Length")
+        return None if contentLength is None else int(contentLength)
+
+    async def text(self):
+        return self._text
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def __aenter__(self):
+        # The same response may be returned for several requests.
+        self.content.bytesRead = 0
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        return self
@@ -0,0 +1,29 @@
+import os
+import stat
+
+import pytest
+
+from python_ifconfig_me.utils.atomicWrite import writeFileAtomic
+
+
+def test_failed_write_keeps_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / "state.json"
+    writeFileAtomic(path, "old")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        writeFileAtomic(path, "new")
+
+    assert path.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_write_applies_the_mode(tmp_path):
+    path = tmp_path / "metrics" / "ifconfig_me.prom"
+    writeFileAtomic(path, "ifconfig_me_lookups_total 1\n", mode=0o644)
+
+    assert path.read_text() == "ifconfig_me_lookups_total 1\n"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
@@ -0,0 +1,105 @@
+import asyncio
+import concurrent.futures
+import socket
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import getPublicIP, getPublicIPFuture
+from python_ifconfig_me.core.getPublicIP import getSharedClient
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.utils.async_ import BackgroundLoop, getBackgroundLoop
+from tests.mocks import MockResponse
+
+RETRIEVERS = [SimpleTextIPRetriever("a.com"), SimpleTextIPRetriever("b.com")]
+
+
+@pytest.fixture(autouse=True)
+def closeBackgroundLoop():
+    yield
+    getBackgroundLoop().close()
+
+
+async def getThreadIdent() -> int:
+    return threading.get_ident()
+
+
+def test_background_loop_runs_every_call_on_one_thread():
+    backgroundLoop = BackgroundLoop()
+    try:
+        idents = {backgroundLoop.run(getThreadIdent()) for _ in range(3)}
+        future = backgroundLoop.submit(getThreadIdent())
+
+        assert isinstance(future, concurrent.futures.Future)
+        assert idents == {future.result(timeout=1)}
+        assert threading.get_ident() not in idents
+    finally:
+        backgroundLoop.close()
+    with pytest.raises(RuntimeError):
+        backgroundLoop.submit(getThreadIdent())
+
+
+def test_background_loop_refuses_to_wait_for_itself():
+    backgroundLoop = BackgroundLoop()
+
+    async def nested() -> int:
+        return backgroundLoop.run(getThreadIdent())
+
+    try:
+        with pytest.raises(RuntimeError):
+            backgroundLoop.run(nested())
+    finally:
+        backgroundLoop.close()
+
+
+@patch("aiohttp.ClientSession.get")
+def test_get_public_ip_reuses_the_session_of_the_shared_client(mock_get):
+    mock_get.return_value = MockResponse("127.0.0.1", 200)
+
+    first = getPublicIP(ipRetrievers=RETRIEVERS)
+    _, client = getSharedClient()
+    session = client._sessions.get(socket.AF_UNSPEC)
+    second = getPublicIP(ipRetrievers=RETRIEVERS)
+
+    assert first is not None and second is not None
+    assert first.ip == second.ip == "127.0.0.1"
+    assert session is not None and client._sessions.get(socket.AF_UNSPEC) is session
+    assert getSharedClient()[1] is client
+
+
+@patch("aiohttp.ClientSession.get")
+def test_get_public_ip_future_does_not_block(mock_get):
+    mock_get.return_value = MockResponse("127.0.0.1", 200, delay=0.1)
+
+    future = getPublicIPFuture(ipRetrievers=RETRIEVERS)
+
+    assert not future.done()
+    result = future.result(timeout=5)
+    assert result is not None
+    assert result.ip == "127.0.0.1"
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_get_public_ip_can_be_called_from_a_running_loop(mock_get):
+    mock_get.return_value = MockResponse("127.0.0.1", 200)
+
+    result = getPublicIP(ipRetrievers=RETRIEVERS)
+
+    assert result is not None
+    assert result.ip == "127.0.0.1"
+    assert asyncio.get_running_loop() is not getBackgroundLoop().loop
+
+
+def test_closed_background_loop_is_replaced_with_a_new_one():
+    backgroundLoop = getBackgroundLoop()
+    _, client = getSharedClient()
+
+    backgroundLoop.close()
+
+    assert backgroundLoop.closed
+    assert getBackgroundLoop() is not backgroundLoop
+    assert getSharedClient()[1] is not client
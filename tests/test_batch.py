@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from python_ifconfig_me.cli import getArgs
+from python_ifconfig_me.core.batch import resolveProxiesAsync
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.callbackIPRetriever import CallbackIPRetriever
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetriever,
+    IPRetrieverContext,
+)
+from python_ifconfig_me.core.rateLimit import TokenBucket
+from python_ifconfig_me.testing.echoServer import EchoServer
+from python_ifconfig_me.testing.proxyServer import ProxyServer
+
+
+@pytest.mark.asyncio
+async def test_resolve_proxies_reports_the_egress_ip_of_every_proxy():
+    async with EchoServer(echo_header="X-Forwarded-For") as echo, ProxyServer(
+        "198.51.100.1"
+    ) as first, ProxyServer("198.51.100.2") as second:
+        retrievers = [CallbackIPRetriever(url, str.strip) for url in echo.urls(3)]
+        proxies = [first.url(), second.url(), "http://127.0.0.1:1"]
+
+        results = {
+            result.proxy: result
+            async for result in resolveProxiesAsync(proxies, ipRetrievers=retrievers)
+        }
+
+    assert results[first.url()].ip == "198.51.100.1"
+    assert results[second.url()].ip == "198.51.100.2"
+    assert results["http://127.0.0.1:1"].ip is None
+    assert results["http://127.0.0.1:1"].error is not None
+    assert first.requests > 0 and second.requests > 0
+
+
+class ProxyEchoRetriever(IPRetriever):
+    # Answers with the last number of the proxy URL, and tracks how many
+    # lookups run at the same time.
+
+    def __init__(self) -> None:
+        self.url = "http://echo.local/ip"
+        self.active = 0
+        self.maxActive = 0
+
+    async def getIPAsync(self, context: IPRetrieverContext) -> IPResultObject:
+        self.active += 1
+        self.maxActive = max(self.maxActive, self.active)
+        try:
+            await asyncio.sleep(0.001)
+            assert context.proxy is not None
+            suffix = context.proxy.rsplit(".", 1)[1]
+            return IPResultObject(IPObject(f"198.51.100.{suffix}"), retriever=self)
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_proxies_bounds_concurrency_and_reads_lazily():
+    retriever = ProxyEchoRetriever()
+    produced = []
+
+    def proxies():
+        for i in range(50):
+            produced.append(i)
+            yield f"http://proxy.{i}"
+
+    seen = []
+    async for result in resolveProxiesAsync(
+        proxies(), ipRetrievers=[retriever], concurrency=5
+    ):
+        if not seen:
+            assert len(produced) <= 5
+        seen.append(result)
+
+    assert retriever.maxActive <= 5
+    assert len(seen) == 50
+    assert all(r.ip == f"198.51.100.{r.proxy.rsplit('.', 1)[1]}" for r in seen)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_bursts_then_limits_the_rate():
+    now = 0.0
+    sleeps = []
+
+    async def sleep(seconds):
+        nonlocal now
+        sleeps.append(seconds)
+        now += seconds
+
+    bucket = TokenBucket(rate=10, burst=2, clock=lambda: now, sleep=sleep)
+    for _ in range(5):
+        await bucket.acquire()
+
+    assert len(sleeps) == 3
+    assert now == pytest.approx(0.3)
+
+
+def test_batch_args():
+    args = getArgs(
+        ["--timeout", "3", "batch", "--concurrency", "10", "--rate-limit", "5"]
+    )
+
+    assert args is not None
+    assert args.command == "batch"
+    assert (args.timeout, args.concurrency, args.rate_limit) == (3, 10, 5)
+    assert args.input == "-"
@@ -0,0 +1,122 @@
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.benchmarkSuite import (
+    BenchmarkConfig,
+    compareReports,
+    runBenchmarksAsync,
+)
+from benchmarks.stressHarness import StressConfig, runStressAsync
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient, getPublicIPAsync
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.testing.echoServer import EchoServer
+
+
+@pytest.mark.asyncio
+async def test_echo_server_stands_in_for_ip_services():
+    async with EchoServer(ip="203.0.113.7") as good, EchoServer(error_rate=1) as bad:
+        retrievers = [SimpleTextIPRetriever(url) for url in good.urls(2)]
+        retrievers.append(SimpleTextIPRetriever(bad.url()))
+        options = GetPublicIPOptions(return_statistics=True)
+
+        result = await getPublicIPAsync(options, retrievers)
+
+    assert result is not None
+    assert result.ip == "203.0.113.7"
+    assert result.statistics[0].weight == 2
+    assert (good.requests, bad.requests) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_suite_reports_every_metric():
+    config = BenchmarkConfig(
+        iterations=2,
+        lookups=4,
+        concurrency=2,
+        latency_median=0,
+        vote_sizes=(8,),
+        startup_repeat=1,
+    )
+
+    report = await runBenchmarksAsync(config)
+
+    assert set(report.results) == {
+        "latency.getPublicIPAsync",
+        "latency.PublicIPClient",
+        "throughput.PublicIPClient",
+        "memory.concurrentLookups",
+        "voting.SimpleVotingStrategy.8",
+        "startup.import.python_ifconfig_me",
+        "startup.import.python_ifconfig_me.cli",
+        "startup.cli.help",
+    }
+    assert report.results["latency.PublicIPClient"]["p50"] > 0
+    lines = compareReports({"results": report.results}, {"results": report.results})
+    assert all(line.endswith("(1.00x)") for line in lines)
+
+
+def test_cli_import_only_loads_what_a_cache_hit_needs():
+    # Asserting on the imported modules rather than on the import time keeps
+    # the test independent of the speed of the machine.
+    script = (
+        "import sys\n"
+        "import python_ifconfig_me.cli\n"
+        "for module in ['asyncio', 'aiohttp', 'python_ifconfig_me.core.getPublicIP',"
+        " 'python_ifconfig_me.core.ipretriever']:\n"
+        "    assert module not in sys.modules, module\n"
+    )
+
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+def test_importing_the_package_defers_aiohttp_and_default_retrievers():
+    script = (
+        "import sys\n"
+        "import python_ifconfig_me.cli\n"
+        "import python_ifconfig_me.core.getPublicIP\n"
+        "import python_ifconfig_me.core.ipretriever as ipretriever\n"
+        "assert 'aiohttp' not in sys.modules\n"
+        "assert ipretriever._defaultIPRetrievers is None\n"
+        "assert len(ipretriever.DEFAULT_IP_RETRIEVERS) == 8\n"
+    )
+
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["getPublicIPAsync", "PublicIPClient"])
+async def test_stress_harness_finds_no_leaks(mode):
+    config = StressConfig(mode=mode, lookups=20, concurrency=10, latency_median=0)
+
+    report = await runStressAsync(config)
+
+    assert report.failedLookups == 0
+    assert report.leaks == []
+    assert report.fds["peak"] > report.fds["before"]
+    assert report.connections["peak"] > 0
+    assert report.tracedPeakBytes > 0
+
+
+@pytest.mark.asyncio
+async def test_stress_harness_flags_an_unclosed_session(monkeypatch):
+    clients = []
+    close = PublicIPClient.close
+
+    async def leakSessions(self):
+        clients.append(self)
+
+    monkeypatch.setattr(PublicIPClient, "close", leakSessions)
+    config = StressConfig(
+        mode="PublicIPClient", lookups=4, concurrency=2, latency_median=0
+    )
+
+    report = await runStressAsync(config)
+    for client in clients:
+        await close(client)
+
+    assert report.leakedObjects["ClientSession"] == 1
+    assert any("ClientSession" in leak for leak in report.leaks)
@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from python_ifconfig_me.core.ipretriever.callbackIPRetriever import (
+    CallbackIPRetriever,
+    ResponseRejectedError,
+)
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetrieverContext
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.testing.echoServer import EchoServer
+from tests.mocks import MockResponse
+
+
+async def getIPAsync(retriever):
+    async with aiohttp.ClientSession() as session:
+        return await retriever.getIPAsync(IPRetrieverContext(session, timeout=5))
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_content_length_over_the_limit_is_rejected_before_reading(mock_get):
+    response = MockResponse(
+        "x" * 1000, 200, headers={"Content-Type": "text/html", "Content-Length": "1000"}
+    )
+    mock_get.return_value = response
+
+    result = await getIPAsync(SimpleTextIPRetriever("a.com", max_body_size=100))
+
+    assert result.ipObject.ip is None
+    assert isinstance(result.error, ResponseRejectedError)
+    assert response.content.bytesRead == 0
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_body_over_the_limit_is_aborted_early(mock_get):
+    response = MockResponse("x" * 100_000, 200, chunk_size=16)
+    mock_get.return_value = response
+
+    result = await getIPAsync(SimpleTextIPRetriever("a.com", max_body_size=100))
+
+    assert isinstance(result.error, ResponseRejectedError)
+    assert response.content.bytesRead == 101
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_body_at_the_limit_is_accepted(mock_get):
+    mock_get.return_value = MockResponse("127.0.0.1", 200, chunk_size=4)
+
+    result = await getIPAsync(SimpleTextIPRetriever("a.com", max_body_size=9))
+
+    assert result.ipObject.ip == "127.0.0.1"
+    assert result.error is None
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_non_text_content_type_is_rejected(mock_get):
+    mock_get.return_value = MockResponse(
+        "127.0.0.1", 200, headers={"Content-Type": "image/png"}
+    )
+
+    rejected = await getIPAsync(SimpleTextIPRetriever("a.com"))
+    accepted = await getIPAsync(SimpleTextIPRetriever("a.com", content_types=None))
+
+    assert isinstance(rejected.error, ResponseRejectedError)
+    assert accepted.ipObject.ip == "127.0.0.1"
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_non_ascii_body_is_rejected(mock_get):
+    mock_get.return_value = MockResponse("127.0.0.1 ".encode("utf-8"), 200)
+
+    result = await getIPAsync(SimpleTextIPRetriever("a.com"))
+
+    assert isinstance(result.error, UnicodeDecodeError)
+
+
+@pytest.mark.asyncio
+async def test_bounded_read_against_a_real_server():
+    async with EchoServer(ip="203.0.113.7", body_size=10_000) as server:
+        bounded = await getIPAsync(CallbackIPRetriever(server.url(), str.strip))
+        unbounded = await getIPAsync(
+            CallbackIPRetriever(server.url(), str.strip, max_body_size=None)
+        )
+        json = await getIPAsync(
+            CallbackIPRetriever(
+                server.url("/json"), lambda text: text[8:19], max_body_size=20_000
+            )
+        )
+
+    assert isinstance(bounded.error, ResponseRejectedError)
+    assert unbounded.ipObject.ip == "203.0.113.7"
+    assert json.ipObject.ip == "203.0.113.7"
@@ -0,0 +1,114 @@
+import asyncio
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient, getPublicIPAsync
+from python_ifconfig_me.core.cache import PublicIPCache
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.vote.votingStrategy import (
+    VotingResult,
+    VotingStatisticsItem,
+)
+from tests.mocks import FakeClock, MockResponse
+
+
+@pytest.fixture
+def retrievers() -> List[IPRetriever]:
+    return [SimpleTextIPRetriever("example.com")]
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_concurrent_callers_share_one_lookup(mock_get, retrievers):
+    ip = "127.0.0.1"
+    mock_get.side_effect = lambda url, **kwargs: MockResponse(ip, 200, delay=0.05)
+    cache = PublicIPCache(ttl=60)
+
+    results = await asyncio.gather(
+        *[getPublicIPAsync(ipRetrievers=retrievers, cache=cache) for _ in range(50)]
+    )
+
+    assert mock_get.call_count == 1
+    assert all(result == VotingResult(ip=ip, statistics=[]) for result in results)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_cache_keeps_statistics(mock_get, retrievers):
+    ip = "127.0.0.1"
+    mock_get.return_value = MockResponse(ip, 200)
+    cache = PublicIPCache(ttl=60)
+
+    async with PublicIPClient(ipRetrievers=retrievers, cache=cache) as client:
+        withoutStatistics = await client.getPublicIPAsync()
+        withStatistics = await client.getPublicIPAsync(
+            GetPublicIPOptions(return_statistics=True)
+        )
+
+    assert mock_get.call_count == 1
+    assert withoutStatistics == VotingResult(ip=ip, statistics=[])
+    assert withStatistics == VotingResult(
+        ip=ip,
+        statistics=[VotingStatisticsItem(ipObject=IPObject(ip), retrievers=retrievers)],
+    )
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_cache_expires_and_can_be_invalidated(mock_get, retrievers):
+    mock_get.return_value = MockResponse("127.0.0.1", 200)
+    clock = FakeClock()
+    cache = PublicIPCache(ttl=10, clock=clock)
+
+    await getPublicIPAsync(ipRetrievers=retrievers, cache=cache)
+    await getPublicIPAsync(ipRetrievers=retrievers, cache=cache)
+    assert mock_get.call_count == 1
+
+    clock.now += 10
+    await getPublicIPAsync(ipRetrievers=retrievers, cache=cache)
+    assert mock_get.call_count == 2
+
+    cache.invalidate()
+    await getPublicIPAsync(ipRetrievers=retrievers, cache=cache)
+    assert mock_get.call_count == 3
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_cache_returns_stale_value_while_refreshing(mock_get, retrievers):
+    mock_get.return_value = MockResponse("127.0.0.1", 200)
+    clock = FakeClock()
+    cache = PublicIPCache(ttl=10, stale_ttl=10, clock=clock)
+    await getPublicIPAsync(ipRetrievers=retrievers, cache=cache)
+
+    mock_get.return_value = MockResponse("127.0.0.2", 200)
+    clock.now += 15
+    stale = await getPublicIPAsync(ipRetrievers=retrievers, cache=cache)
+    assert stale == VotingResult(ip="127.0.0.1", statistics=[])
+
+    await asyncio.sleep(0.05)
+    fresh = await getPublicIPAsync(ipRetrievers=retrievers, cache=cache)
+    assert fresh == VotingResult(ip="127.0.0.2", statistics=[])
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_cache_is_bounded(mock_get, retrievers):
+    mock_get.return_value = MockResponse("127.0.0.1", 200)
+    cache = PublicIPCache(ttl=60, maxsize=2)
+
+    for options in [
+        GetPublicIPOptions(ipv4=True),
+        GetPublicIPOptions(prefer_ipv6=True),
+        GetPublicIPOptions(),
+    ]:
+        await getPublicIPAsync(options, ipRetrievers=retrievers, cache=cache)
+
+    assert len(cache) == 2
@@ -0,0 +1,211 @@
+import asyncio
+import random
+import socket
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient
+from python_ifconfig_me.core.circuitBreaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreakers,
+)
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.rateLimit import RateLimitScheduler, ThrottledError
+from python_ifconfig_me.core.scoreboard import Scoreboard
+from tests.mocks import FakeClock, MockResponse
+
+UP = SimpleTextIPRetriever("up.com")
+DOWN = SimpleTextIPRetriever("down.com")
+
+
+def makeResult(retriever, ip=None, error=None):
+    return IPResultObject(IPObject(ip), retriever=retriever, error=error)
+
+
+def makeBreakers(clock):
+    return CircuitBreakers(failure_threshold=2, base_delay=10, jitter=0, clock=clock)
+
+
+def failLookup(breakers, error=None):
+    admitted = breakers.admit([UP, DOWN])
+    breakers.record(
+        admitted,
+        [makeResult(UP, "203.0.113.1")]
+        + [makeResult(DOWN, error=error) for r in admitted if r is DOWN],
+    )
+    return admitted
+
+
+def test_breaker_opens_after_consecutive_failures():
+    clock = FakeClock()
+    breakers = makeBreakers(clock)
+
+    failLookup(breakers)
+    assert breakers.getState(DOWN).state == CLOSED
+    failLookup(breakers, asyncio.TimeoutError())
+
+    state = breakers.getState(DOWN)
+    assert (state.state, state.failures, state.timeouts) == (OPEN, 2, 1)
+    assert state.retryAt == clock.now + 10
+    assert breakers.admit([UP, DOWN]) == [UP]
+    assert breakers.getState(UP).state == CLOSED
+
+
+def test_single_probe_closes_the_breaker():
+    clock = FakeClock()
+    breakers = makeBreakers(clock)
+    failLookup(breakers)
+    failLookup(breakers)
+    clock.now += 10
+
+    admitted = breakers.admit([UP, DOWN])
+    assert admitted == [UP, DOWN]
+    assert breakers.getState(DOWN).state == HALF_OPEN
+    # Lookups running while the probe is in flight skip the retriever.
+    assert breakers.admit([UP, DOWN]) == [UP]
+
+    breakers.record(admitted, [makeResult(DOWN, "203.0.113.1")])
+    state = breakers.getState(DOWN)
+    assert (state.state, state.failures, state.trips) == (CLOSED, 0, 0)
+
+
+def test_failed_probe_doubles_the_backoff():
+    clock = FakeClock()
+    breakers = makeBreakers(clock)
+    failLookup(breakers)
+    failLookup(breakers)
+    clock.now += 10
+
+    failLookup(breakers)
+
+    state = breakers.getState(DOWN)
+    assert (state.state, state.trips) == (OPEN, 2)
+    assert state.retryAt == clock.now + 20
+
+
+def test_cancelled_probe_is_given_back():
+    clock = FakeClock()
+    breakers = makeBreakers(clock)
+    failLookup(breakers)
+    failLookup(breakers)
+    clock.now += 10
+
+    admitted = breakers.admit([DOWN])
+    breakers.record(admitted, [])
+
+    assert breakers.getState(DOWN).state == OPEN
+    assert breakers.admit([UP, DOWN]) == [UP, DOWN]
+
+
+def test_jitter_shortens_the_backoff():
+    clock = FakeClock()
+    breakers = CircuitBreakers(
+        failure_threshold=1,
+        base_delay=10,
+        jitter=0.5,
+        clock=clock,
+        rng=random.Random(0),
+    )
+    breakers.record([DOWN], [makeResult(DOWN)])
+
+    assert clock.now + 5 <= breakers.getState(DOWN).retryAt <= clock.now + 10
+
+
+def test_every_retriever_is_called_when_all_breakers_are_open():
+    breakers = CircuitBreakers(failure_threshold=1)
+    breakers.record([DOWN], [makeResult(DOWN)])
+
+    assert breakers.admit([DOWN]) == [DOWN]
+
+
+def test_families_have_breakers_of_their_own():
+    breakers = CircuitBreakers(failure_threshold=1)
+    breakers.record([DOWN], [makeResult(DOWN)], socket.AF_INET6)
+
+    assert breakers.getState(DOWN, socket.AF_INET6).state == OPEN
+    assert breakers.admit([UP, DOWN]) == [UP, DOWN]
+
+
+def test_breakers_are_persisted(tmp_path):
+    clock = FakeClock()
+    breakers = makeBreakers(clock)
+    failLookup(breakers)
+    failLookup(breakers)
+    clock.now += 10
+    breakers.admit([DOWN])
+    path = tmp_path / "breakers.json"
+    breakers.save(path)
+
+    loaded = makeBreakers(clock)
+    loaded.load(path)
+
+    state = loaded.getState(DOWN)
+    assert (state.state, state.failures, state.trips) == (OPEN, 2, 1)
+    assert loaded.admit([UP, DOWN]) == [UP, DOWN]
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_client_skips_retrievers_with_open_breakers(mock_get):
+    responses = {
+        "up.com": MockResponse("203.0.113.1", 200),
+        "down.com": MockResponse("Service Unavailable", 503),
+    }
+    requested = []
+
+    def get(url, **kwargs):
+        requested.append(url)
+        return responses[url]
+
+    mock_get.side_effect = get
+    breakers = CircuitBreakers(failure_threshold=2)
+    async with PublicIPClient([UP, DOWN], circuit_breakers=breakers) as client:
+        for _ in range(4):
+            result = await client.getPublicIPAsync(GetPublicIPOptions())
+            assert result.ip == "203.0.113.1"
+
+    assert requested.count("up.com") == 4
+    assert requested.count("down.com") == 2
+    assert breakers.getState(DOWN).state == OPEN
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_probes_dropped_by_later_filters_are_given_back(mock_get):
+    mock_get.side_effect = lambda url, **kwargs: (
+        MockResponse("203.0.113.1", 200)
+        if url == "up.com"
+        else MockResponse("Service Unavailable", 503)
+    )
+    breakers = CircuitBreakers(failure_threshold=1, base_delay=0, jitter=0)
+    rateLimits = RateLimitScheduler()
+    scoreboard = Scoreboard(exploration=0)
+    async with PublicIPClient(
+        [UP, DOWN],
+        scoreboard=scoreboard,
+        circuit_breakers=breakers,
+        rate_limits=rateLimits,
+    ) as client:
+        await client.getPublicIPAsync()
+        assert breakers.getState(DOWN).state == OPEN
+
+        # Probing DOWN is dropped by the scoreboard, which ranks UP first.
+        await client.getPublicIPAsync(GetPublicIPOptions(max_retrievers=1))
+        assert breakers.getState(DOWN).state == OPEN
+
+        # Then by the rate limits, while DOWN is throttled.
+        rateLimits.record([makeResult(DOWN, error=ThrottledError(429, 60))])
+        await client.getPublicIPAsync()
+        assert breakers.getState(DOWN).state == OPEN
+
+        rateLimits.reset()
+        await client.getPublicIPAsync()
+
+    assert [call.args[0] for call in mock_get.call_args_list].count("down.com") == 2
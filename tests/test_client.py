@@ -0,0 +1,40 @@
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import PublicIPClient
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+from tests.mocks import MockResponse
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_client_reuses_session_across_lookups(mock_get):
+    ip = "127.0.0.1"
+    mock_get.return_value = MockResponse(ip, 200)
+    retrievers: List[IPRetriever] = [SimpleTextIPRetriever("example.com")]
+
+    async with PublicIPClient(ipRetrievers=retrievers) as client:
+        first = await client.getPublicIPAsync()
+        session = client.getSession()
+        second = await client.getPublicIPAsync()
+        assert client.getSession() is session
+        assert not session.closed
+
+    assert session.closed
+    assert first == second == VotingResult(ip=ip, statistics=[])
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_client_connector_settings():
+    async with PublicIPClient(limit=10, limit_per_host=2) as client:
+        connector = client.getSession().connector
+        assert connector is not None
+        assert connector.limit == 10
+        assert connector.limit_per_host == 2
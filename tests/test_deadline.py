@@ -0,0 +1,92 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient
+from python_ifconfig_me.cli import getArgs, getOptions
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetrieverContext
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.testing.echoServer import EchoServer, constantLatency
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_the_best_vote_so_far():
+    fast = EchoServer(latency=constantLatency(0.01))
+    slow = EchoServer("198.51.100.1", latency=constantLatency(1))
+    async with fast, slow:
+        retrievers = [SimpleTextIPRetriever(url) for url in fast.urls(2)]
+        retrievers += [SimpleTextIPRetriever(url) for url in slow.urls(3)]
+        async with PublicIPClient(retrievers) as client:
+            start = time.perf_counter()
+            result = await client.getPublicIPAsync(
+                GetPublicIPOptions(return_statistics=True, deadline=0.3)
+            )
+            elapsed = time.perf_counter() - start
+
+    assert result.ip == "203.0.113.1"
+    assert result.statistics[0].weight == 2
+    assert elapsed < 0.8
+
+
+@pytest.mark.asyncio
+async def test_deadline_without_any_answer_returns_none():
+    async with EchoServer(latency=constantLatency(1)) as server:
+        async with PublicIPClient([SimpleTextIPRetriever(server.url())]) as client:
+            start = time.perf_counter()
+            result = await client.getPublicIPAsync(GetPublicIPOptions(deadline=0.1))
+            elapsed = time.perf_counter() - start
+
+    assert result is None
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_request_timeout_is_cut_to_the_deadline():
+    loop = asyncio.get_running_loop()
+    context = IPRetrieverContext(None, timeout=5, deadline=loop.time() + 0.2)
+
+    assert 0 < context.getTimeout() <= 0.2
+    assert context.getClientTimeout().total <= 0.2
+
+
+def test_phase_budgets_map_to_aiohttp_timeouts():
+    context = IPRetrieverContext(
+        None, timeout=0.3, connect_timeout=0.05, tls_timeout=0.1, read_timeout=0.15
+    )
+
+    timeout = context.getClientTimeout()
+
+    assert timeout.total == 0.3
+    assert timeout.sock_connect == 0.05
+    assert timeout.connect == pytest.approx(0.15)
+    assert timeout.sock_read == 0.15
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_no_request_is_sent_past_the_deadline(mock_get):
+    loop = asyncio.get_running_loop()
+    context = IPRetrieverContext(None, timeout=5, deadline=loop.time() - 1)
+
+    result = await SimpleTextIPRetriever("a.com").getIPAsync(context)
+
+    assert isinstance(result.error, asyncio.TimeoutError)
+    mock_get.assert_not_called()
+
+
+def test_deadline_options_from_the_command_line():
+    args = getArgs(
+        ["--deadline", "0.3", "--connect-timeout", "0.05", "--timeout", "0.25"]
+    )
+
+    options = getOptions(args, return_statistics=False)
+
+    assert (options.deadline, options.connect_timeout, options.timeout) == (
+        0.3,
+        0.05,
+        0.25,
+    )
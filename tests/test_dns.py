@@ -0,0 +1,149 @@
+import asyncio
+import json
+import pickle
+
+import aiohttp
+import pytest
+
+from python_ifconfig_me.cli import getArgs, mainAsync
+from python_ifconfig_me.core.getPublicIP import getPublicIPAsync
+from python_ifconfig_me.core.ipretriever.dnsIPRetriever import (
+    DnsIPRetriever,
+    encodeQuery,
+    parseResponse,
+)
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetrieverContext
+from python_ifconfig_me.core.ipretriever.registry import makeRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.testing.dnsServer import DnsServer
+from python_ifconfig_me.testing.echoServer import EchoServer
+
+
+async def getIPAsync(retriever, timeout=2, proxy=None):
+    async with aiohttp.ClientSession() as session:
+        return await retriever.getIPAsync(
+            IPRetrieverContext(session, timeout=timeout, proxy=proxy)
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "ip, recordType",
+    [("203.0.113.1", "A"), ("2001:db8::1", "AAAA"), ("203.0.113.1", "TXT")],
+)
+async def test_dns_retriever(ip, recordType):
+    async with DnsServer(ip) as server:
+        retriever = DnsIPRetriever.fromURL(server.url(record_type=recordType))
+        result = await getIPAsync(retriever)
+
+    assert result.ipObject.ip == ip
+    assert result.error is None
+    assert server.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_dns_query_is_sent_again_without_an_answer():
+    async with DnsServer(drop=2) as server:
+        result = await getIPAsync(DnsIPRetriever.fromURL(server.url()), timeout=1)
+
+    assert result.ipObject.ip == "203.0.113.1"
+    assert server.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_dns_query_times_out_within_the_context_timeout():
+    async with DnsServer(drop=100) as server:
+        start = asyncio.get_running_loop().time()
+        result = await getIPAsync(DnsIPRetriever.fromURL(server.url()), timeout=0.3)
+        elapsed = asyncio.get_running_loop().time() - start
+
+    assert result.ipObject.ip is None
+    assert isinstance(result.error, asyncio.TimeoutError)
+    assert server.requests == 3
+    assert elapsed < 1
+
+
+@pytest.mark.asyncio
+async def test_dns_retriever_without_a_record_of_the_family_fails():
+    async with DnsServer("203.0.113.1") as server:
+        result = await getIPAsync(
+            DnsIPRetriever.fromURL(server.url(record_type="AAAA"))
+        )
+
+    assert result.ipObject.ip is None
+    assert result.error is not None
+
+
+@pytest.mark.asyncio
+async def test_dns_retriever_refuses_proxies():
+    async with DnsServer() as server:
+        result = await getIPAsync(
+            DnsIPRetriever.fromURL(server.url()), proxy="http://127.0.0.1:3128"
+        )
+
+    assert isinstance(result.error, ValueError)
+    assert server.requests == 0
+
+
+def test_response_to_another_query_is_ignored():
+    server = DnsServer()
+    response = server.handle(encodeQuery(1, "myip.example.com", 1))
+
+    assert parseResponse(response, 2, 1) is None
+    assert parseResponse(response, 1, 1) == ["203.0.113.1"]
+
+
+@pytest.mark.asyncio
+async def test_dns_and_http_retrievers_vote_together():
+    async with DnsServer() as dnsServer, EchoServer() as echoServer:
+        retrievers = [
+            makeRetriever({"url": dnsServer.url()}),
+            SimpleTextIPRetriever(echoServer.url()),
+        ]
+        result = await getPublicIPAsync(
+            GetPublicIPOptions(return_statistics=True), retrievers
+        )
+
+    assert result.ip == "203.0.113.1"
+    assert result.statistics[0].weight == 2
+
+
+def test_dns_retriever_url_round_trip_and_pickle():
+    retriever = DnsIPRetriever(
+        "o-o.myaddr.l.google.com", "2001:4860:4802:32::a", record_type="TXT"
+    )
+    copy = pickle.loads(pickle.dumps(DnsIPRetriever.fromURL(retriever.url)))
+
+    assert (
+        retriever.url == "dns://[2001:4860:4802:32::a]/o-o.myaddr.l.google.com?type=TXT"
+    )
+    assert (copy.name, copy.server, copy.port, copy.record_type) == (
+        "o-o.myaddr.l.google.com",
+        "2001:4860:4802:32::a",
+        53,
+        "TXT",
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("extraArgs", [["--show-statistics"], ["--cache-ttl", "60"]])
+async def test_cli_prints_statistics_of_dns_retrievers(tmp_path, capsys, extraArgs):
+    async with DnsServer() as server:
+        retrieversFile = tmp_path / "retrievers.json"
+        retrieversFile.write_text(json.dumps({"retrievers": [{"url": server.url()}]}))
+        args = getArgs(
+            ["--retrievers-file", str(retrieversFile)]
+            + ["--cache-file", str(tmp_path / "cache.json")]
+            + extraArgs
+        )
+        assert args is not None
+
+        await mainAsync(args)
+
+    output = capsys.readouterr().out
+    assert output.endswith("203.0.113.1\n")
+    if "--show-statistics" in extraArgs:
+        assert f'"url": "{server.url()}"' in output
@@ -0,0 +1,114 @@
+import socket
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import (
+    GetPublicIPOptions,
+    PublicIPClient,
+    getDualStackPublicIPAsync,
+)
+from python_ifconfig_me.cli import dualStackAsync, getArgs
+from python_ifconfig_me.core.ipretriever.callbackIPRetriever import CallbackIPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.testing.echoServer import EchoServer
+from tests.mocks import MockResponse
+
+RETRIEVERS = [SimpleTextIPRetriever(f"http://ip{i}.com") for i in range(3)]
+ANSWERS = {socket.AF_INET: "203.0.113.1", socket.AF_INET6: "2001:db8::1"}
+
+
+def makeSideEffect(families):
+    # Answers over whichever family the session was pinned to.
+    def side_effect(session, url, **kwargs):
+        family = session.connector.family
+        families[family] += 1
+        return MockResponse(ANSWERS.get(family, "203.0.113.1"), 200)
+
+    return side_effect
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get", autospec=True)
+async def test_family_option_pins_the_connections(mock_get):
+    families: Counter = Counter()
+    mock_get.side_effect = makeSideEffect(families)
+
+    async with PublicIPClient(ipRetrievers=RETRIEVERS) as client:
+        result = await client.getPublicIPAsync(GetPublicIPOptions(ipv6=True))
+
+    assert result is not None
+    assert result.ip == "2001:db8::1"
+    assert families == {socket.AF_INET6: 3}
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get", autospec=True)
+async def test_dual_stack_looks_up_both_families_with_separate_options(mock_get):
+    families: Counter = Counter()
+    mock_get.side_effect = makeSideEffect(families)
+
+    result = await getDualStackPublicIPAsync(
+        GetPublicIPOptions(quorum=1),
+        GetPublicIPOptions(return_statistics=True),
+        RETRIEVERS,
+    )
+
+    assert result.ipv4 is not None and result.ipv4.ip == "203.0.113.1"
+    assert result.ipv6 is not None and result.ipv6.ip == "2001:db8::1"
+    assert result.ipv6.statistics[0].weight == 3
+    assert families[socket.AF_UNSPEC] == 0
+    assert families[socket.AF_INET6] == 3
+
+
+@pytest.mark.asyncio
+async def test_pinned_family_only_connects_over_that_family():
+    async with EchoServer(ip="203.0.113.7", host="127.0.0.1") as server:
+        # localhost resolves to 127.0.0.1, and maybe to ::1 where nothing
+        # listens, so only the IPv4 lookup can succeed.
+        url = f"http://localhost:{server.port}/ip"
+        retrievers = [CallbackIPRetriever(url, str.strip)]
+
+        result = await getDualStackPublicIPAsync(ipRetrievers=retrievers)
+
+    assert result.ipv4 is not None and result.ipv4.ip == "203.0.113.7"
+    assert result.ipv6 is None
+
+
+def test_dual_stack_conflicts_with_a_single_family():
+    assert getArgs(["--dual-stack", "--ipv4"]) is None
+    assert getArgs(["--dual-stack", "--cache-ttl", "60"]) is None
+    args = getArgs(["--dual-stack"])
+    assert args is not None and args.dual_stack
+
+
+@pytest.mark.asyncio
+async def test_dual_stack_cli_keeps_the_scoreboard_and_metrics(tmp_path, capsys):
+    scoreboardFile = tmp_path / "scoreboard.json"
+    metricsFile = tmp_path / "metrics.prom"
+    async with EchoServer(ip="203.0.113.7", host="127.0.0.1") as server:
+        retrieversFile = tmp_path / "retrievers.json"
+        retrieversFile.write_text(f'{{"retrievers": [{{"url": "{server.url()}"}}]}}')
+        args = getArgs(
+            [
+                "--dual-stack",
+                "--retrievers-file",
+                str(retrieversFile),
+                "--scoreboard-file",
+                str(scoreboardFile),
+                "--metrics-file",
+                str(metricsFile),
+                "--voting-strategy",
+                "reliability",
+            ]
+        )
+        assert args is not None
+
+        await dualStackAsync(args)
+
+    assert capsys.readouterr().out == "203.0.113.7\n"
+    assert scoreboardFile.exists()
+    assert "ifconfig_me_" in metricsFile.read_text()
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+
+from python_ifconfig_me.utils.fileCache import FileCache
+from tests.mocks import FakeClock
+
+
+def test_file_cache_round_trip_and_expiry(tmp_path):
+    clock = FakeClock()
+    cache = FileCache(tmp_path / "cache.json", ttl=10, clock=clock)
+    value = {"ip": "127.0.0.1", "statistics": []}
+
+    assert cache.get("key") is None
+    cache.set("key", value)
+    assert cache.get("key") == value
+
+    clock.now += 10
+    assert cache.get("key") is None
+
+
+def test_file_cache_ignores_corrupted_file(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json")
+    cache = FileCache(path, ttl=10)
+
+    assert cache.get("key") is None
+    cache.set("key", {"ip": "127.0.0.1"})
+    assert cache.get("key") == {"ip": "127.0.0.1"}
+
+
+@pytest.mark.asyncio
+async def test_file_cache_lock_serializes_writers(tmp_path):
+    cache = FileCache(tmp_path / "cache.json", ttl=60)
+    refreshes = []
+
+    async def worker():
+        async with cache.lockAsync(pollInterval=0.01):
+            if cache.get("key") is None:
+                # Let the other writers try to take the lock meanwhile.
+                await asyncio.sleep(0.02)
+                refreshes.append(1)
+                cache.set("key", {"ip": "127.0.0.1"})
+
+    await asyncio.gather(*(worker() for _ in range(10)))
+
+    assert len(refreshes) == 1
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+@pytest.mark.asyncio
+async def test_file_cache_lock_async_keeps_the_event_loop_running(tmp_path):
+    cache = FileCache(tmp_path / "cache.json", ttl=60)
+
+    async def refresh():
+        async with cache.lockAsync(pollInterval=0.01):
+            cache.set("key", {"ip": "127.0.0.1"})
+
+    async with cache.lockAsync():
+        task = asyncio.ensure_future(refresh())
+        # Other tasks keep running while the refresh waits for the lock.
+        await asyncio.sleep(0.05)
+        assert not task.done()
+    await asyncio.wait_for(task, 1)
+
+    assert cache.get("key") == {"ip": "127.0.0.1"}
+
+
+def test_cli_cache_hit_does_not_import_aiohttp(tmp_path):
+    path = tmp_path / "cache.json"
+    FileCache(path, ttl=60).set(
+        "ipv4=0,ipv6=0,prefer_ipv6=0", {"ip": "127.0.0.1", "statistics": []}
+    )
+    script = (
+        "import sys\n"
+        "from python_ifconfig_me.cli import main\n"
+        f"sys.argv = ['ifconfig-me', '--cache-ttl', '60', '--cache-file', {str(path)!r}]\n"
+        "main()\n"
+        "print(json.dumps('aiohttp' in sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", "import json\n" + script],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+
+    assert output == ["127.0.0.1", json.dumps(False)]
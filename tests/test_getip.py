@@ -13,6 +13,7 @@ from python_ifconfig_me.core.vote.votingStrategy import (
     VotingResult,
     VotingStatisticsItem,
 )
+from tests.mocks import MockResponse
 
 
 @pytest.fixture
@@ -30,21 +31,6 @@ def retriever3():
     return SimpleTextIPRetriever("example3.com", priority=1)
 
 
-class MockResponse:
-    def __init__(self, text, status):
-        self._text = text
-        self.status = status
-
-    async def text(self):
-        return self._text
-
-    async def __aexit__(self, exc_type, exc, tb):
-        pass
-
-    async def __aenter__(self):
-        return self
-
-
 @pytest.mark.asyncio
 @patch("aiohttp.ClientSession.get")
 async def test_getIPs_default(mock_get, retriever1):
@@ -139,7 +125,7 @@ async def test_getIPs_most_common_ip_only_return_ipv6(mock_get, retriever1, retr
     result = await getPublicIPAsync(options=options, ipRetrievers=retrievers)
 
     assert result == VotingResult(
-        ip=ipv6,
+        ip="2001:db8:85a3::8a2e:370:7334",
         statistics=[
             VotingStatisticsItem(
                 ipObject=IPObject(ipv6), weight=1, retrievers=[retriever2]
@@ -219,7 +205,7 @@ async def test_getIPs_most_common_ip_prefer_ipv6_works_when_both_have_the_same_w
     result = await getPublicIPAsync(options=options, ipRetrievers=retrievers)
 
     assert result == VotingResult(
-        ip=ipv6,
+        ip="2001:db8:85a3::8a2e:370:7334",
         statistics=[
             VotingStatisticsItem(
                 ipObject=IPObject(ipv6), weight=1, retrievers=[retriever2]
@@ -0,0 +1,98 @@
+import time
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient, getPublicIPAsync
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.scheduler import HedgeStatistics
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+from tests.mocks import MockResponse
+
+IP = "127.0.0.1"
+SLOW_DELAY = 5
+
+
+@pytest.fixture
+def retrievers() -> List[IPRetriever]:
+    return [SimpleTextIPRetriever(f"example{i}.com") for i in range(4)]
+
+
+def calledUrls(mock_get):
+    return [call.args[0] for call in mock_get.call_args_list]
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_hedging_only_queries_primary_retrievers_when_they_agree(
+    mock_get, retrievers
+):
+    mock_get.side_effect = lambda url, **kwargs: MockResponse(IP, 200)
+    options = GetPublicIPOptions(hedge_delay=1, hedge_initial=2)
+
+    async with PublicIPClient(ipRetrievers=retrievers) as client:
+        result = await client.getPublicIPAsync(options)
+
+    assert result == VotingResult(ip=IP, statistics=[])
+    assert calledUrls(mock_get) == ["example0.com", "example1.com"]
+    assert client.hedgeStatistics == HedgeStatistics(lookups=1, requests=2)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_hedge_fires_after_delay(mock_get, retrievers):
+    def side_effect(url, **kwargs):
+        delay = SLOW_DELAY if url == "example1.com" else 0
+        return MockResponse(IP, 200, delay=delay)
+
+    mock_get.side_effect = side_effect
+    options = GetPublicIPOptions(hedge_delay=0.05, hedge_initial=2)
+
+    start = time.monotonic()
+    async with PublicIPClient(ipRetrievers=retrievers) as client:
+        result = await client.getPublicIPAsync(options)
+
+    assert time.monotonic() - start < SLOW_DELAY
+    assert result == VotingResult(ip=IP, statistics=[])
+    assert calledUrls(mock_get) == ["example0.com", "example1.com", "example2.com"]
+    assert client.hedgeStatistics == HedgeStatistics(
+        lookups=1, hedgedLookups=1, hedgesFired=1, requests=3
+    )
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_failed_request_launches_another_retriever(mock_get, retrievers):
+    def side_effect(url, **kwargs):
+        return MockResponse(IP, 500 if url == "example0.com" else 200)
+
+    mock_get.side_effect = side_effect
+    options = GetPublicIPOptions(hedge_delay=1, hedge_initial=2)
+
+    async with PublicIPClient(ipRetrievers=retrievers) as client:
+        result = await client.getPublicIPAsync(options)
+
+    assert result == VotingResult(ip=IP, statistics=[])
+    assert calledUrls(mock_get) == ["example0.com", "example1.com", "example2.com"]
+    assert client.hedgeStatistics == HedgeStatistics(lookups=1, failovers=1, requests=3)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_one_shot_lookup_counts_in_the_given_statistics(mock_get, retrievers):
+    def side_effect(url, **kwargs):
+        return MockResponse(IP, 500 if url == "example0.com" else 200)
+
+    mock_get.side_effect = side_effect
+    options = GetPublicIPOptions(hedge_delay=1, hedge_initial=2)
+    statistics = HedgeStatistics()
+
+    for _ in range(2):
+        result = await getPublicIPAsync(options, retrievers, hedgeStatistics=statistics)
+        assert result == VotingResult(ip=IP, statistics=[])
+
+    assert statistics == HedgeStatistics(lookups=2, failovers=2, requests=6)
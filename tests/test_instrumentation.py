@@ -0,0 +1,84 @@
+import asyncio
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import PublicIPClient
+from python_ifconfig_me.core.instrumentation import LookupObserver, MetricsCollector
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from tests.mocks import MockResponse
+
+
+@pytest.fixture
+def retrievers() -> List[IPRetriever]:
+    return [
+        SimpleTextIPRetriever("ok.com"),
+        SimpleTextIPRetriever("other.com"),
+        SimpleTextIPRetriever("notfound.com"),
+        SimpleTextIPRetriever("timeout.com"),
+        SimpleTextIPRetriever("ok2.com"),
+    ]
+
+
+def side_effect(url, **kwargs):
+    if url == "timeout.com":
+        raise asyncio.TimeoutError()
+    if url == "notfound.com":
+        return MockResponse("", 404)
+    if url == "other.com":
+        return MockResponse("127.0.0.2", 200)
+    return MockResponse("127.0.0.1", 200)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_metrics_collector_counts_requests_and_votes(mock_get, retrievers):
+    mock_get.side_effect = side_effect
+    metrics = MetricsCollector()
+
+    async with PublicIPClient(ipRetrievers=retrievers, observers=[metrics]) as c:
+        await c.getPublicIPAsync()
+
+    counter = metrics.getCounter
+    assert counter("requests_total", url="ok.com", outcome="success") == 1
+    assert counter("requests_total", url="notfound.com", outcome="failure") == 1
+    assert counter("requests_total", url="timeout.com", outcome="timeout") == 1
+    assert counter("responses_total", url="notfound.com", status="404") == 1
+    assert counter("exceptions_total", url="timeout.com", exception="TimeoutError") == 1
+    assert counter("votes_total", outcome="success") == 1
+    assert counter("vote_agreement_total", url="ok2.com", agreement="agree") == 1
+    assert counter("vote_agreement_total", url="other.com", agreement="disagree") == 1
+
+    text = metrics.toPrometheusText()
+    assert "# TYPE ifconfig_me_requests_total counter" in text
+    assert 'ifconfig_me_requests_total{outcome="success",url="ok.com"} 1' in text
+    assert 'ifconfig_me_request_duration_seconds_count{url="ok.com"} 1' in text
+    assert (
+        'ifconfig_me_request_duration_seconds_bucket{le="+Inf",url="ok.com"}'
+        not in text
+    )
+    assert (
+        'ifconfig_me_request_duration_seconds_bucket{url="ok.com",le="+Inf"} 1' in text
+    )
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_failing_observer_does_not_break_lookups(mock_get, retrievers):
+    mock_get.side_effect = side_effect
+
+    class BrokenObserver(LookupObserver):
+        def onResult(self, result):
+            raise RuntimeError("broken")
+
+    async with PublicIPClient(
+        ipRetrievers=retrievers, observers=[BrokenObserver()]
+    ) as client:
+        result = await client.getPublicIPAsync()
+
+    assert result is not None
+    assert result.ip == "127.0.0.1"
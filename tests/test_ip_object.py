@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, getPublicIPAsync
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from tests.mocks import MockResponse
+
+
+def test_ip_object_is_canonical():
+    ipv6 = IPObject("2001:0db8:0000:0000:0000:0000:0000:0001")
+
+    assert ipv6.ip == "2001:db8::1"
+    assert ipv6 == IPObject("2001:DB8::1")
+    assert hash(ipv6) == hash(IPObject("2001:db8::1"))
+    assert IPObject(" 1.2.3.4\n") == IPObject("1.2.3.4")
+    assert IPObject("1.2.3.4").value == 0x01020304
+    assert IPObject.fromInt(0x01020304, 4) == IPObject("1.2.3.4")
+    # The same integer in another family is another address.
+    assert IPObject.fromInt(0x01020304, 6) != IPObject("1.2.3.4")
+
+
+def test_ip_object_classifies_by_version():
+    assert IPObject("1.2.3.4").isIPv4() and not IPObject("1.2.3.4").isIPv6()
+    assert IPObject("::1").isIPv6() and not IPObject("::1").isIPv4()
+    empty = IPObject()
+    assert empty.ip is None
+    assert not empty.isIPv4() and not empty.isIPv6()
+
+
+@pytest.mark.parametrize("text", ["", "a.b", "1.2.3", "1.2.3.4.5", "<html>1.2.3.4"])
+def test_ip_object_rejects_non_ip_text(text):
+    with pytest.raises(ValueError):
+        IPObject(text)
+
+
+def test_ip_object_is_slotted():
+    assert not hasattr(IPObject("1.2.3.4"), "__dict__")
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_equal_ips_spelled_differently_share_a_vote(mock_get):
+    bodies = {
+        "a.com": "1.2.3.4\n",
+        "b.com": "1.2.3.4",
+        "c.com": "5.6.7.8",
+        "d.com": "no.ip.here",
+    }
+    mock_get.side_effect = lambda url, **kwargs: MockResponse(bodies[url], 200)
+    retrievers = [SimpleTextIPRetriever(url) for url in bodies]
+
+    result = await getPublicIPAsync(
+        GetPublicIPOptions(return_statistics=True), retrievers
+    )
+
+    assert result is not None
+    assert result.ip == "1.2.3.4"
+    assert [item.weight for item in result.statistics] == [2, 1]
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import socket
+import stat
+import tempfile
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient
+from python_ifconfig_me.cli import getArgs, mainAsync
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.localClient import (
+    UntrustedSocketError,
+    ensureSocketDir,
+    getDefaultSocketPath,
+    getPublicIPLocalAsync,
+    queryLocalServerAsync,
+)
+from python_ifconfig_me.core.localServer import PublicIPServer
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+from python_ifconfig_me.testing.echoServer import EchoServer
+from tests.mocks import MockResponse
+
+IP = "127.0.0.1"
+
+
+@pytest.fixture
+def retrievers() -> List[IPRetriever]:
+    return [SimpleTextIPRetriever("example.com")]
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_server_answers_over_unix_socket_and_tcp(mock_get, retrievers, tmp_path):
+    mock_get.return_value = MockResponse(IP, 200)
+    socketPath = str(tmp_path / "ifconfig-me.sock")
+    client = PublicIPClient(ipRetrievers=retrievers)
+
+    async with PublicIPServer(client=client, socket_path=socketPath, port=0) as server:
+        for _ in range(3):
+            assert await getPublicIPLocalAsync(socketPath=socketPath) == VotingResult(
+                ip=IP, statistics=[]
+            )
+        assert await queryLocalServerAsync(port=server.port) == VotingResult(
+            ip=IP, statistics=[]
+        )
+
+    # The lookups were answered from memory.
+    assert mock_get.call_count == 1
+    assert not (tmp_path / "ifconfig-me.sock").exists()
+    await client.close()
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_client_falls_back_without_server(mock_get, retrievers, tmp_path):
+    mock_get.return_value = MockResponse(IP, 200)
+    socketPath = str(tmp_path / "missing.sock")
+
+    result = await getPublicIPLocalAsync(socketPath=socketPath, ipRetrievers=retrievers)
+    assert result == VotingResult(ip=IP, statistics=[])
+
+    assert await getPublicIPLocalAsync(socketPath=socketPath, fallback=False) is None
+
+
+def test_serve_arguments():
+    args = getArgs(["--ipv4", "serve", "--port", "8080", "--refresh-interval", "10"])
+
+    assert args is not None
+    assert args.command == "serve"
+    assert args.ipv4
+    assert args.port == 8080
+    assert args.refresh_interval == 10
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_default_socket_is_in_a_private_directory(
+    mock_get, retrievers, tmp_path, monkeypatch
+):
+    mock_get.return_value = MockResponse(IP, 200)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    client = PublicIPClient(ipRetrievers=retrievers)
+
+    async with PublicIPServer(client=client) as server:
+        directory = os.path.dirname(server.socket_path)
+        assert directory.startswith(str(tmp_path))
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+        assert await getPublicIPLocalAsync(fallback=False) == VotingResult(
+            ip=IP, statistics=[]
+        )
+    await client.close()
+
+
+def test_server_refuses_a_shared_socket_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    directory = os.path.dirname(getDefaultSocketPath())
+    os.mkdir(directory)
+    os.chmod(directory, 0o777)
+
+    with pytest.raises(UntrustedSocketError):
+        ensureSocketDir(getDefaultSocketPath())
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_socket_of_another_user_is_not_trusted(
+    mock_get, retrievers, tmp_path, monkeypatch
+):
+    mock_get.return_value = MockResponse(IP, 200)
+    socketPath = str(tmp_path / "ifconfig-me.sock")
+    client = PublicIPClient(ipRetrievers=retrievers)
+
+    async with PublicIPServer(client=client, socket_path=socketPath):
+        uid = os.getuid()
+        monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+        with pytest.raises(UntrustedSocketError):
+            await queryLocalServerAsync(socketPath)
+        assert await getPublicIPLocalAsync(socketPath, fallback=False) is None
+    await client.close()
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_running_server_socket_is_not_replaced(mock_get, retrievers, tmp_path):
+    mock_get.return_value = MockResponse(IP, 200)
+    socketPath = str(tmp_path / "ifconfig-me.sock")
+    client = PublicIPClient(ipRetrievers=retrievers)
+
+    async with PublicIPServer(client=client, socket_path=socketPath):
+        with pytest.raises(OSError):
+            await PublicIPServer(client=client, socket_path=socketPath).start()
+        assert await queryLocalServerAsync(socketPath) is not None
+
+    # A stale socket is replaced.
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(socketPath)
+    stale.close()
+    async with PublicIPServer(client=client, socket_path=socketPath):
+        assert await queryLocalServerAsync(socketPath) is not None
+    await client.close()
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_answer_of_another_family_falls_back(mock_get, retrievers, tmp_path):
+    socketPath = str(tmp_path / "ifconfig-me.sock")
+    mock_get.return_value = MockResponse("2001:db8::1", 200)
+    client = PublicIPClient(ipRetrievers=retrievers)
+
+    async with PublicIPServer(client=client, socket_path=socketPath):
+        mock_get.return_value = MockResponse(IP, 200)
+        result = await getPublicIPLocalAsync(
+            socketPath,
+            options=GetPublicIPOptions(ipv4=True),
+            ipRetrievers=retrievers,
+        )
+        assert result.ip == IP
+        assert (
+            await getPublicIPLocalAsync(
+                socketPath, fallback=False, options=GetPublicIPOptions(ipv4=True)
+            )
+            is None
+        )
+    await client.close()
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_silent_connection_is_answered_with_bad_request(
+    mock_get, retrievers, tmp_path
+):
+    mock_get.return_value = MockResponse(IP, 200)
+    client = PublicIPClient(ipRetrievers=retrievers)
+
+    async with PublicIPServer(
+        client=client, socket_path=str(tmp_path / "s.sock"), request_timeout=0.05
+    ) as server:
+        reader, writer = await asyncio.open_unix_connection(server.socket_path)
+        response = await asyncio.wait_for(reader.read(), 1)
+        writer.close()
+
+    assert response.startswith(b"HTTP/1.0 400 Bad Request")
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_serve_cli_keeps_the_scoreboard_and_metrics(tmp_path, capsys):
+    scoreboardFile = tmp_path / "scoreboard.json"
+    metricsFile = tmp_path / "metrics.prom"
+    async with EchoServer(ip="203.0.113.7", host="127.0.0.1") as server:
+        retrieversFile = tmp_path / "retrievers.json"
+        retrieversFile.write_text(f'{{"retrievers": [{{"url": "{server.url()}"}}]}}')
+        args = getArgs(
+            [
+                "--retrievers-file",
+                str(retrieversFile),
+                "--scoreboard-file",
+                str(scoreboardFile),
+                "--metrics-file",
+                str(metricsFile),
+                "--voting-strategy",
+                "reliability",
+                "serve",
+                "--socket",
+                str(tmp_path / "server.sock"),
+            ]
+        )
+        assert args is not None
+
+        # The server looks the IP up before it starts serving.
+        task = asyncio.ensure_future(mainAsync(args))
+        output = ""
+        while "Serving the public IP" not in output:
+            await asyncio.sleep(0.01)
+            output += capsys.readouterr().out
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert scoreboardFile.exists()
+    assert "ifconfig_me_" in metricsFile.read_text()
@@ -0,0 +1,87 @@
+import asyncio
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient
+from python_ifconfig_me.cli import getArgs, mainAsync
+from python_ifconfig_me.core.instrumentation import NDJSONObserver
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.utils import fastJSON
+from tests.mocks import MockResponse
+
+
+def side_effect(url, **kwargs):
+    if url == "https://timeout.com":
+        raise asyncio.TimeoutError()
+    if url == "https://slow.com":
+        return MockResponse("203.0.113.1", 200, delay=0.05)
+    return MockResponse("203.0.113.1", 200)
+
+
+def readLines(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_results_are_written_as_they_arrive(mock_get):
+    mock_get.side_effect = side_effect
+    stream = io.StringIO()
+    retrievers = [
+        SimpleTextIPRetriever(url)
+        for url in ("https://slow.com", "https://fast.com", "https://timeout.com")
+    ]
+
+    async with PublicIPClient(retrievers, observers=[NDJSONObserver(stream)]) as c:
+        await c.getPublicIPAsync(GetPublicIPOptions(return_statistics=True))
+
+    lines = readLines(stream.getvalue())
+    results, vote = lines[:-1], lines[-1]
+    assert [line["url"] for line in results][-1] == "https://slow.com"
+    timeout = next(line for line in results if line["url"] == "https://timeout.com")
+    assert timeout["outcome"] == "timeout"
+    assert timeout["error"] == "TimeoutError"
+    fast = next(line for line in results if line["url"] == "https://fast.com")
+    assert (fast["ip"], fast["status"]) == ("203.0.113.1", 200)
+    assert fast["elapsed"] >= 0
+    assert vote["event"] == "vote"
+    assert (vote["ip"], vote["results"]) == ("203.0.113.1", 3)
+    assert vote["statistics"][0]["weight"] == 2
+    assert sorted(vote["statistics"][0]["urls"]) == [
+        "https://fast.com",
+        "https://slow.com",
+    ]
+
+
+def test_lines_are_compact_with_either_backend(monkeypatch):
+    line = {"event": "vote", "ip": None, "results": 0}
+    lines = [fastJSON.dumps(line)]
+    monkeypatch.setattr(fastJSON, "orjson", None)
+    lines.append(fastJSON.dumps(line))
+
+    assert lines == ['{"event":"vote","ip":null,"results":0}'] * 2
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_cli_prints_ndjson(mock_get, tmp_path, capsys):
+    mock_get.side_effect = side_effect
+    path = tmp_path / "retrievers.json"
+    specs = [{"url": "https://fast.com"}, {"url": "https://timeout.com"}]
+    path.write_text(json.dumps({"retrievers": specs}))
+
+    await mainAsync(getArgs(["--output", "ndjson", "--retrievers-file", str(path)]))
+
+    lines = readLines(capsys.readouterr().out)
+    assert [line["event"] for line in lines] == ["result", "result", "vote"]
+    assert lines[-1]["ip"] == "203.0.113.1"
+    assert "statistics" not in lines[-1]
+
+
+def test_ndjson_is_not_available_for_commands():
+    assert getArgs(["--output", "ndjson", "--dual-stack"]) is None
@@ -0,0 +1,140 @@
+import time
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, getPublicIPAsync
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.vote.votingStrategy import (
+    SimpleVotingStrategy,
+    VotingResult,
+)
+from tests.mocks import MockResponse
+
+SLOW_DELAY = 5
+
+
+def makeSideEffect(answers):
+    def side_effect(url, **kwargs):
+        ip, delay = answers[url]
+        return MockResponse(ip, 200, delay=delay)
+
+    return side_effect
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_quorum_returns_without_waiting_for_slow_retrievers(mock_get):
+    ip = "127.0.0.1"
+    mock_get.side_effect = makeSideEffect(
+        {
+            "fast1.com": (ip, 0),
+            "fast2.com": (ip, 0),
+            "slow.com": ("127.0.0.2", SLOW_DELAY),
+        }
+    )
+    retrievers: List[IPRetriever] = [
+        SimpleTextIPRetriever("fast1.com"),
+        SimpleTextIPRetriever("slow.com"),
+        SimpleTextIPRetriever("fast2.com"),
+    ]
+    options = GetPublicIPOptions(quorum=2)
+
+    start = time.monotonic()
+    result = await getPublicIPAsync(options=options, ipRetrievers=retrievers)
+
+    assert time.monotonic() - start < SLOW_DELAY
+    assert result == VotingResult(ip=ip, statistics=[])
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_early_exit_once_majority_is_settled(mock_get):
+    ip = "127.0.0.1"
+    mock_get.side_effect = makeSideEffect(
+        {
+            "fast1.com": (ip, 0),
+            "fast2.com": (ip, 0),
+            "fast3.com": (ip, 0),
+            "slow1.com": ("127.0.0.2", SLOW_DELAY),
+            "slow2.com": ("127.0.0.2", SLOW_DELAY),
+        }
+    )
+    retrievers: List[IPRetriever] = [
+        SimpleTextIPRetriever(url)
+        for url in ["slow1.com", "fast1.com", "slow2.com", "fast2.com", "fast3.com"]
+    ]
+    options = GetPublicIPOptions(early_exit=True, return_statistics=True)
+
+    start = time.monotonic()
+    result = await getPublicIPAsync(options=options, ipRetrievers=retrievers)
+
+    assert time.monotonic() - start < SLOW_DELAY
+    assert result is not None
+    assert result.ip == ip
+    assert [r.url for r in result.statistics[0].retrievers] == [
+        "fast1.com",
+        "fast2.com",
+        "fast3.com",
+    ]
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_quorum_waits_for_pending_retrievers_with_higher_priority(mock_get):
+    ip = "127.0.0.1"
+    ip2 = "127.0.0.2"
+    mock_get.side_effect = makeSideEffect(
+        {
+            "fast1.com": (ip, 0),
+            "fast2.com": (ip, 0),
+            "priority.com": (ip2, 0.05),
+        }
+    )
+    retrievers: List[IPRetriever] = [
+        SimpleTextIPRetriever("fast1.com"),
+        SimpleTextIPRetriever("fast2.com"),
+        SimpleTextIPRetriever("priority.com", priority=1),
+    ]
+    options = GetPublicIPOptions(quorum=2)
+
+    result = await getPublicIPAsync(options=options, ipRetrievers=retrievers)
+
+    assert result == VotingResult(ip=ip2, statistics=[])
+
+
+class StructuralVotingStrategy:
+    # Implements IVotingStrategy without subclassing it, so without isSettled.
+
+    def vote(self, results, context):
+        return SimpleVotingStrategy().vote(results, context)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_strategy_without_is_settled_waits_for_every_retriever(mock_get):
+    ip = "127.0.0.1"
+    mock_get.side_effect = makeSideEffect({"fast.com": (ip, 0), "slow.com": (ip, 0.05)})
+    retrievers: List[IPRetriever] = [
+        SimpleTextIPRetriever("fast.com"),
+        SimpleTextIPRetriever("slow.com"),
+    ]
+    options = GetPublicIPOptions(quorum=1, return_statistics=True)
+
+    result = await getPublicIPAsync(
+        options=options,
+        ipRetrievers=retrievers,
+        votingStrategy=StructuralVotingStrategy(),
+    )
+
+    assert result is not None
+    assert result.statistics[0].weight == 2
+
+
+def test_quorum_must_be_positive():
+    with pytest.raises(ValueError):
+        GetPublicIPOptions(quorum=0)
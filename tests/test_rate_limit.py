@@ -0,0 +1,154 @@
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetrieverContext,
+)
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.rateLimit import (
+    RateLimitScheduler,
+    ThrottledError,
+    parseRetryAfter,
+)
+from tests.mocks import FakeClock, MockResponse
+
+FAST = SimpleTextIPRetriever("https://fast.com/ip")
+SLOW = SimpleTextIPRetriever("https://slow.com/ip")
+SLOW_OTHER_PATH = SimpleTextIPRetriever("https://slow.com/other")
+
+
+def throttled(retriever, retryAfter=None):
+    return IPResultObject(
+        IPObject(), retriever=retriever, error=ThrottledError(429, retryAfter)
+    )
+
+
+def test_retry_after_in_seconds_or_as_a_date():
+    assert parseRetryAfter("120") == 120
+    assert parseRetryAfter("Wed, 21 Oct 2015 07:28:30 GMT", lambda: 1445412480) == 30
+    assert parseRetryAfter("Wed, 21 Oct 2015 07:28:00 GMT", lambda: 1445412480) == 0
+    assert parseRetryAfter("soon") is None
+    assert parseRetryAfter(None) is None
+
+
+def test_throttled_endpoint_is_suppressed_until_retry_after():
+    clock = FakeClock()
+    limits = RateLimitScheduler(cooldown=60, clock=clock)
+
+    limits.record([throttled(SLOW, 30)])
+
+    # Every retriever of the host is suppressed.
+    assert limits.admit([SLOW, FAST, SLOW_OTHER_PATH]) == [FAST]
+    clock.now += 30
+    # Then called after the others during the cooldown.
+    assert limits.admit([SLOW, FAST]) == [FAST, SLOW]
+    clock.now += 60
+    assert limits.admit([SLOW, FAST]) == [SLOW, FAST]
+
+
+def test_retry_after_defaults_and_is_capped():
+    clock = FakeClock()
+    limits = RateLimitScheduler(
+        default_retry_after=10, max_retry_after=100, clock=clock
+    )
+
+    limits.record([throttled(FAST), throttled(SLOW, 10**6)])
+
+    assert limits.getThrottle(FAST).suppressedUntil == clock.now + 10
+    assert limits.getThrottle(SLOW).suppressedUntil == clock.now + 100
+    assert limits.getThrottle(SLOW).throttles == 1
+
+
+def test_all_throttled_endpoints_are_called_anyway():
+    limits = RateLimitScheduler(clock=FakeClock())
+
+    limits.record([throttled(SLOW), throttled(FAST)])
+
+    assert limits.admit([SLOW, FAST]) == [SLOW, FAST]
+
+
+def test_endpoints_out_of_budget_are_skipped():
+    clock = FakeClock()
+    limits = RateLimitScheduler(
+        rate=1, burst=2, budgets={"slow.com": (0.1, 1)}, clock=clock
+    )
+
+    # Only calling an endpoint takes from its budget.
+    assert limits.admit([FAST, SLOW]) == [FAST, SLOW]
+    assert limits.admit([FAST, SLOW]) == [FAST, SLOW]
+    assert limits.tryAcquire(FAST) and limits.tryAcquire(SLOW)
+    assert limits.admit([FAST, SLOW]) == [FAST]
+    assert limits.tryAcquire(FAST)
+    assert not limits.tryAcquire(FAST)
+    assert limits.admit([FAST, SLOW]) == []
+    clock.now += 1
+    assert limits.admit([FAST, SLOW]) == [FAST]
+    clock.now += 9
+    assert limits.admit([FAST, SLOW]) == [FAST, SLOW]
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_429_is_reported_as_throttled(mock_get):
+    mock_get.return_value = MockResponse(
+        "Too Many Requests", 429, headers={"Retry-After": "5"}
+    )
+
+    async with aiohttp.ClientSession() as session:
+        context = IPRetrieverContext(session, timeout=5)
+        result = await SimpleTextIPRetriever("a.com").getIPAsync(context)
+
+    assert isinstance(result.error, ThrottledError)
+    assert (result.status, result.error.retry_after) == (429, 5)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_client_stops_calling_a_throttled_endpoint(mock_get):
+    responses = {
+        FAST.url: MockResponse("203.0.113.1", 200),
+        SLOW.url: MockResponse("", 503, headers={"Retry-After": "60"}),
+    }
+    requested = []
+
+    def get(url, **kwargs):
+        requested.append(url)
+        return responses[url]
+
+    mock_get.side_effect = get
+    limits = RateLimitScheduler()
+    async with PublicIPClient([SLOW, FAST], rate_limits=limits) as client:
+        for _ in range(3):
+            result = await client.getPublicIPAsync(GetPublicIPOptions())
+            assert result.ip == "203.0.113.1"
+
+    assert requested.count(FAST.url) == 3
+    assert requested.count(SLOW.url) == 1
+    assert limits.getThrottle(SLOW).throttles == 1
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_retrievers_spared_by_an_early_exit_keep_their_budget(mock_get):
+    mock_get.return_value = MockResponse("203.0.113.1", 200)
+    limits = RateLimitScheduler(rate=1 / 3600, burst=1)
+    options = GetPublicIPOptions(quorum=1, hedge_delay=10)
+
+    async with PublicIPClient([FAST, SLOW], rate_limits=limits) as client:
+        for _ in range(2):
+            result = await client.getPublicIPAsync(options)
+            assert result.ip == "203.0.113.1"
+
+    # The first lookup settled without calling SLOW, whose token was left
+    # for the second one, FAST being out of budget by then.
+    assert [call.args[0] for call in mock_get.call_args_list] == [
+        FAST.url,
+        SLOW.url,
+    ]
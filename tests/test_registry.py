@@ -0,0 +1,137 @@
+import json
+import pickle
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from python_ifconfig_me.core.ipretriever import getDefaultIPRetrievers
+from python_ifconfig_me.core.ipretriever.extractorIPRetriever import (
+    ExtractorIPRetriever,
+)
+from python_ifconfig_me.core.ipretriever.extractors import (
+    HeaderExtractor,
+    JSONKeyExtractor,
+    RegexExtractor,
+    TextExtractor,
+)
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetrieverContext
+from python_ifconfig_me.core.ipretriever.registry import (
+    loadRetrievers,
+    makeRetriever,
+)
+from tests.mocks import MockResponse
+
+
+@pytest.mark.parametrize(
+    "extractor, text, expected",
+    [
+        (TextExtractor(), " 203.0.113.1\n", "203.0.113.1"),
+        (JSONKeyExtractor("ip"), '{"ip": "203.0.113.1"}', "203.0.113.1"),
+        (JSONKeyExtractor("origin"), '{"origin": " 203.0.113.1 "}', "203.0.113.1"),
+        # Only the top level key counts.
+        (
+            JSONKeyExtractor("ip"),
+            '{"proxy": {"ip": "198.51.100.1"}, "ip": "203.0.113.1"}',
+            "203.0.113.1",
+        ),
+        (JSONKeyExtractor("ip"), '{"data": {"ip": "198.51.100.1"}}', None),
+        (JSONKeyExtractor("ip"), '{"ip": 5, "x": {"ip": "198.51.100.1"}}', "5"),
+        (JSONKeyExtractor("data.ip"), '{"data": {"ip": "203.0.113.1"}}', "203.0.113.1"),
+        (JSONKeyExtractor("data.ip"), '{"data": {}}', None),
+        (
+            RegexExtractor(r"Address: ([\d.]+)", 1),
+            "Address: 203.0.113.1",
+            "203.0.113.1",
+        ),
+        (RegexExtractor(r"\d+\.\d+\.\d+\.\d+"), "<b>203.0.113.1</b>", "203.0.113.1"),
+        (RegexExtractor(r"\d+\.\d+\.\d+\.\d+"), "nothing here", None),
+    ],
+)
+def test_extractors(extractor, text, expected):
+    assert extractor(text) == expected
+
+
+def test_default_retrievers_are_picklable():
+    retrievers = getDefaultIPRetrievers()
+
+    assert pickle.loads(pickle.dumps(retrievers)) == retrievers
+
+
+def test_load_retrievers_from_toml(tmp_path):
+    path = tmp_path / "retrievers.toml"
+    path.write_text(
+        "[[retrievers]]\n"
+        'url = "https://a.com"\n'
+        "\n"
+        "[[retrievers]]\n"
+        'url = "https://b.com"\n'
+        'extractor = "json"\n'
+        'key = "ip"\n'
+        "priority = 1\n"
+    )
+
+    retrievers = loadRetrievers(path)
+
+    assert retrievers == [
+        ExtractorIPRetriever("https://a.com"),
+        ExtractorIPRetriever("https://b.com", JSONKeyExtractor("ip"), priority=1),
+    ]
+
+
+def test_load_retrievers_from_json(tmp_path):
+    path = tmp_path / "retrievers.json"
+    specs = [
+        {"url": "https://a.com", "extractor": "regex", "pattern": "[0-9.]+"},
+        {"url": "https://b.com", "extractor": "header", "header": "X-Client-IP"},
+    ]
+    path.write_text(json.dumps({"retrievers": specs}))
+
+    retrievers = loadRetrievers(path)
+
+    assert retrievers == [
+        ExtractorIPRetriever("https://a.com", RegexExtractor("[0-9.]+")),
+        ExtractorIPRetriever("https://b.com", HeaderExtractor("X-Client-IP")),
+    ]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"url": "https://a.com", "extractor": "xml"},
+        {"url": "https://a.com", "extractor": "json"},
+        {"extractor": "text"},
+    ],
+)
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        makeRetriever(spec)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_header_extractor_does_not_read_the_body(mock_get):
+    response = MockResponse(
+        "<html>" + "x" * 10000,
+        200,
+        headers={"Content-Type": "text/html", "X-Client-IP": "203.0.113.1"},
+    )
+    mock_get.return_value = response
+    retriever = ExtractorIPRetriever("a.com", HeaderExtractor("X-Client-IP"))
+
+    async with aiohttp.ClientSession() as session:
+        result = await retriever.getIPAsync(IPRetrieverContext(session, timeout=5))
+
+    assert result.ipObject.ip == "203.0.113.1"
+    assert response.content.bytesRead == 0
+
+
+def test_retrievers_file_replaces_the_defaults(tmp_path, monkeypatch):
+    import python_ifconfig_me.core.ipretriever as ipretriever
+
+    path = tmp_path / "retrievers.json"
+    path.write_text(json.dumps({"retrievers": [{"url": "https://a.com"}]}))
+    monkeypatch.setenv("IFCONFIG_ME_RETRIEVERS_FILE", str(path))
+    monkeypatch.setattr(ipretriever, "_defaultIPRetrievers", None)
+
+    assert getDefaultIPRetrievers() == [ExtractorIPRetriever("https://a.com")]
@@ -0,0 +1,124 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPResultObject
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.scoreboard import Scoreboard
+from python_ifconfig_me.core.vote.reliabilityWeightedVotingStrategy import (
+    ReliabilityWeightedVotingStrategy,
+)
+from python_ifconfig_me.core.vote.votingStrategy import (
+    SimpleVotingStrategy,
+    VotingResult,
+    VotingStrategyContext,
+)
+from tests.mocks import MockResponse
+
+HONEST = [SimpleTextIPRetriever(f"honest{i}.com") for i in range(3)]
+LIARS = [SimpleTextIPRetriever(f"liar{i}.com") for i in range(2)]
+CONTEXT = VotingStrategyContext(prefer_ipv6=False, ipv4=False, ipv6=False)
+
+
+def makeResult(retriever, ip):
+    return IPResultObject(IPObject(ip), retriever=retriever)
+
+
+def makeTrainedScoreboard():
+    # The liars agree with each other but not with the majority.
+    scoreboard = Scoreboard()
+    results = [makeResult(r, "127.0.0.1") for r in HONEST]
+    results += [makeResult(r, "127.0.0.2") for r in LIARS]
+    for _ in range(10):
+        scoreboard.record(results, VotingResult(ip="127.0.0.1", statistics=[]))
+    return scoreboard
+
+
+def test_reliable_retrievers_outvote_unreliable_ones():
+    results = [makeResult(HONEST[0], "127.0.0.1")]
+    results += [makeResult(r, "127.0.0.2") for r in LIARS]
+    strategy = ReliabilityWeightedVotingStrategy(makeTrainedScoreboard())
+
+    weighted = strategy.vote(results, CONTEXT)
+    simple = SimpleVotingStrategy().vote(results, CONTEXT)
+
+    assert simple is not None and simple.ip == "127.0.0.2"
+    assert weighted is not None and weighted.ip == "127.0.0.1"
+    assert weighted.confidence is not None and weighted.confidence > 0.9
+
+
+def test_retrievers_without_history_count_equally():
+    strategy = ReliabilityWeightedVotingStrategy(Scoreboard())
+    results = [makeResult(r, "127.0.0.1") for r in HONEST[:2]]
+    results.append(makeResult(HONEST[2], "127.0.0.2"))
+    results.append(makeResult(LIARS[0], "::1"))
+
+    votingResult = strategy.vote(results, CONTEXT)
+
+    assert votingResult is not None
+    assert votingResult.ip == "127.0.0.1"
+    # The IPv6 answer doesn't dispute an IPv4 winner.
+    assert votingResult.confidence == pytest.approx(2 / 3)
+
+
+def test_stale_history_decays_to_the_prior():
+    results = [makeResult(HONEST[0], "127.0.0.1")]
+    results += [makeResult(r, "127.0.0.2") for r in LIARS]
+    strategy = ReliabilityWeightedVotingStrategy(
+        makeTrainedScoreboard(),
+        half_life=60,
+        clock=lambda: time.time() + 3600,
+    )
+
+    votingResult = strategy.vote(results, CONTEXT)
+
+    assert strategy.getWeight(LIARS[0]) == pytest.approx(0.5, abs=1e-6)
+    assert votingResult is not None and votingResult.ip == "127.0.0.2"
+
+
+def test_is_settled_with_min_confidence():
+    scoreboard = makeTrainedScoreboard()
+    results = [makeResult(HONEST[0], "127.0.0.1")]
+    strategy = ReliabilityWeightedVotingStrategy(scoreboard)
+    lenient = ReliabilityWeightedVotingStrategy(scoreboard, min_confidence=0.1)
+    demanding = ReliabilityWeightedVotingStrategy(scoreboard, min_confidence=0.95)
+
+    # A pending honest retriever could still overturn the vote, whatever the
+    # confidence asked for.
+    pending = [HONEST[1]] + LIARS
+    assert not strategy.isSettled(results, pending, CONTEXT)
+    assert not lenient.isSettled(results, pending, CONTEXT)
+    # The liars can't, but together they would bring the confidence to about
+    # 0.9.
+    assert strategy.isSettled(results, LIARS, CONTEXT)
+    assert not demanding.isSettled(results, LIARS, CONTEXT)
+    assert demanding.isSettled(results, LIARS[:1], CONTEXT)
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_client_with_reliability_weighted_voting(mock_get):
+    mock_get.side_effect = lambda url, **kwargs: MockResponse(
+        "127.0.0.2" if url.startswith("liar") else "127.0.0.1", 200
+    )
+    scoreboard = makeTrainedScoreboard()
+    strategy = ReliabilityWeightedVotingStrategy(scoreboard)
+
+    async with PublicIPClient(
+        ipRetrievers=[HONEST[0]] + LIARS,
+        votingStrategy=strategy,
+        scoreboard=scoreboard,
+    ) as client:
+        result = await client.getPublicIPAsync(
+            GetPublicIPOptions(return_statistics=True)
+        )
+
+    assert result is not None
+    assert result.ip == "127.0.0.1"
+    assert result.confidence is not None
+    assert [item.weight for item in result.statistics] == [1, 2]
@@ -0,0 +1,137 @@
+import os
+import random
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import GetPublicIPOptions, PublicIPClient
+from python_ifconfig_me.core.ipObject import IPObject
+from python_ifconfig_me.core.ipretriever.ipRetriever import (
+    IPResultObject,
+    IPRetriever,
+)
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.scoreboard import Scoreboard
+from python_ifconfig_me.core.vote.votingStrategy import VotingResult
+from tests.mocks import MockResponse
+
+
+def makeResult(retriever, ip, elapsed):
+    result = IPResultObject(IPObject(ip), retriever=retriever)
+    result.elapsed = elapsed
+    return result
+
+
+def test_scoreboard_ranks_fast_agreeing_retrievers_first():
+    fast = SimpleTextIPRetriever("fast.com")
+    slow = SimpleTextIPRetriever("slow.com")
+    broken = SimpleTextIPRetriever("broken.com")
+    liar = SimpleTextIPRetriever("liar.com")
+    scoreboard = Scoreboard(exploration=0)
+    for _ in range(5):
+        scoreboard.record(
+            [
+                makeResult(fast, "127.0.0.1", 0.01),
+                makeResult(slow, "127.0.0.1", 1),
+                makeResult(broken, None, 0.01),
+                makeResult(liar, "127.0.0.2", 0.01),
+            ],
+            VotingResult(ip="127.0.0.1", statistics=[]),
+        )
+
+    ranked = scoreboard.rank([broken, liar, slow, fast])
+    assert ranked[:2] == [fast, slow]
+    assert set(ranked[2:]) == {liar, broken}
+    assert scoreboard.select([broken, liar, slow, fast], 2) == [fast, slow]
+    score = scoreboard.getScore(liar)
+    assert score.requests == 5
+    assert score.disagreements == 5
+    assert scoreboard.getScore(broken).failures == 5
+
+
+def test_scoreboard_exploration_gives_other_retrievers_a_chance():
+    retrievers: List[IPRetriever] = [
+        SimpleTextIPRetriever(f"example{i}.com") for i in range(4)
+    ]
+    scoreboard = Scoreboard(exploration=1, rng=random.Random(0))
+
+    selected = scoreboard.select(retrievers, 2)
+
+    assert selected[0] is retrievers[0]
+    assert selected[1] in retrievers[2:]
+
+
+def test_scoreboard_persistence(tmp_path):
+    retriever = SimpleTextIPRetriever("example.com")
+    scoreboard = Scoreboard()
+    scoreboard.record(
+        [makeResult(retriever, "127.0.0.1", 0.2)],
+        VotingResult(ip="127.0.0.1", statistics=[]),
+    )
+    path = tmp_path / "scoreboard.json"
+    scoreboard.save(path)
+
+    loaded = Scoreboard()
+    loaded.load(path)
+
+    assert loaded.snapshot() == scoreboard.snapshot()
+
+
+def test_failed_save_leaves_no_temporary_file(tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+
+    with pytest.raises(OSError):
+        Scoreboard().save(tmp_path / "scoreboard.json")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_client_only_queries_the_best_retrievers(mock_get):
+    mock_get.return_value = MockResponse("127.0.0.1", 200)
+    retrievers: List[IPRetriever] = [
+        SimpleTextIPRetriever(f"example{i}.com") for i in range(4)
+    ]
+    scoreboard = Scoreboard(exploration=0)
+    scoreboard.record(
+        [makeResult(retrievers[3], "127.0.0.1", 0.01)],
+        VotingResult(ip="127.0.0.1", statistics=[]),
+    )
+
+    async with PublicIPClient(ipRetrievers=retrievers, scoreboard=scoreboard) as c:
+        result = await c.getPublicIPAsync(GetPublicIPOptions(max_retrievers=2))
+
+    assert result == VotingResult(ip="127.0.0.1", statistics=[])
+    assert [call.args[0] for call in mock_get.call_args_list] == [
+        "example3.com",
+        "example0.com",
+    ]
+    assert scoreboard.getScore(retrievers[0]).requests == 1
+    assert scoreboard.getScore(retrievers[1]).requests == 0
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_max_retrievers_without_scoreboard_picks_by_priority(mock_get):
+    mock_get.return_value = MockResponse("127.0.0.1", 200)
+    retrievers: List[IPRetriever] = [
+        SimpleTextIPRetriever("example0.com"),
+        SimpleTextIPRetriever("example1.com"),
+        SimpleTextIPRetriever("example2.com", priority=1),
+    ]
+
+    async with PublicIPClient(ipRetrievers=retrievers) as c:
+        result = await c.getPublicIPAsync(GetPublicIPOptions(max_retrievers=2))
+
+    assert result == VotingResult(ip="127.0.0.1", statistics=[])
+    assert [call.args[0] for call in mock_get.call_args_list] == [
+        "example2.com",
+        "example0.com",
+    ]
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import pickle
+import struct
+
+import aiohttp
+import pytest
+
+from python_ifconfig_me.cli import getArgs, mainAsync
+from python_ifconfig_me.core.getPublicIP import getPublicIPAsync
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetrieverContext
+from python_ifconfig_me.core.ipretriever.registry import makeRetriever
+from python_ifconfig_me.core.ipretriever.stunIPRetriever import (
+    BINDING_ERROR,
+    HEADER,
+    MAGIC_COOKIE,
+    StunError,
+    StunIPRetriever,
+    encodeBindingRequest,
+    parseResponse,
+)
+from python_ifconfig_me.core.options import GetPublicIPOptions
+from python_ifconfig_me.core.vote.votingStrategy import SimpleVotingStrategy
+from python_ifconfig_me.testing.stunServer import StunServer
+
+
+async def getIPAsync(retriever, timeout=2):
+    async with aiohttp.ClientSession() as session:
+        return await retriever.getIPAsync(IPRetrieverContext(session, timeout=timeout))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ip", ["203.0.113.1", "2001:db8::1"])
+@pytest.mark.parametrize("legacy", [False, True])
+async def test_stun_retriever(ip, legacy):
+    async with StunServer(ip, legacy=legacy) as server:
+        result = await getIPAsync(StunIPRetriever.fromURL(server.url()))
+
+    assert result.ipObject.ip == ip
+    assert result.error is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("host", ["127.0.0.1", "::1"])
+async def test_stun_retriever_reports_the_source_address(host):
+    async with StunServer(ip=None, host=host) as server:
+        result = await getIPAsync(StunIPRetriever.fromURL(server.url()))
+
+    assert result.ipObject.ip == host
+
+
+@pytest.mark.asyncio
+async def test_stun_request_is_sent_again_without_an_answer():
+    async with StunServer(drop=1) as server:
+        result = await getIPAsync(StunIPRetriever.fromURL(server.url()), timeout=1)
+
+    assert result.ipObject.ip == "203.0.113.1"
+    assert server.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_stun_request_times_out_within_the_context_timeout():
+    async with StunServer(drop=100) as server:
+        result = await getIPAsync(StunIPRetriever.fromURL(server.url()), timeout=0.3)
+
+    assert isinstance(result.error, asyncio.TimeoutError)
+    assert server.requests == 3
+
+
+def test_response_to_another_transaction_is_ignored():
+    server = StunServer()
+    transactionID = os.urandom(12)
+    response = server.handle(encodeBindingRequest(transactionID), ("10.0.0.1", 1))
+
+    assert parseResponse(response, os.urandom(12)) is None
+    assert parseResponse(response, transactionID) == "203.0.113.1"
+
+
+def test_binding_error_fails_the_request():
+    transactionID = os.urandom(12)
+    reason = b"Bad Request"
+    value = struct.pack("!HBB", 0, 4, 0) + reason
+    attribute = struct.pack("!HH", 0x0009, len(value)) + value + b"\0"
+    response = HEADER.pack(BINDING_ERROR, len(attribute), MAGIC_COOKIE, transactionID)
+
+    with pytest.raises(StunError, match="400 Bad Request"):
+        parseResponse(response + attribute, transactionID)
+
+
+@pytest.mark.asyncio
+async def test_stun_retrievers_vote_with_simple_voting_strategy():
+    async with StunServer() as first, StunServer() as second, StunServer(
+        "198.51.100.1"
+    ) as liar:
+        retrievers = [
+            makeRetriever({"url": server.url()}) for server in (first, second, liar)
+        ]
+        result = await getPublicIPAsync(
+            GetPublicIPOptions(return_statistics=True),
+            retrievers,
+            SimpleVotingStrategy(),
+        )
+
+    assert result.ip == "203.0.113.1"
+    assert result.statistics[0].weight == 2
+
+
+@pytest.mark.parametrize(
+    "url, host, port",
+    [
+        ("stun:stun.l.google.com:19302", "stun.l.google.com", 19302),
+        ("stun:stun.example.com", "stun.example.com", 3478),
+        ("stun:[2001:db8::1]:3479", "2001:db8::1", 3479),
+        ("stun:2001:db8::1", "2001:db8::1", 3478),
+    ],
+)
+def test_stun_url(url, host, port):
+    retriever = pickle.loads(pickle.dumps(StunIPRetriever.fromURL(url)))
+
+    assert (retriever.host, retriever.port) == (host, port)
+    assert StunIPRetriever.fromURL(retriever.url).url == retriever.url
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("extraArgs", [["--show-statistics"], ["--cache-ttl", "60"]])
+async def test_cli_prints_statistics_of_stun_retrievers(tmp_path, capsys, extraArgs):
+    async with StunServer() as server:
+        retrieversFile = tmp_path / "retrievers.json"
+        retrieversFile.write_text(json.dumps({"retrievers": [{"url": server.url()}]}))
+        args = getArgs(
+            ["--retrievers-file", str(retrieversFile)]
+            + ["--cache-file", str(tmp_path / "cache.json")]
+            + extraArgs
+        )
+        assert args is not None
+
+        await mainAsync(args)
+
+    output = capsys.readouterr().out
+    assert output.endswith("203.0.113.1\n")
+    if "--show-statistics" in extraArgs:
+        assert f'"url": "{server.url()}"' in output
@@ -0,0 +1,85 @@
+import asyncio
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from python_ifconfig_me import PublicIPClient
+from python_ifconfig_me.cli import getArgs, mainAsync
+from python_ifconfig_me.core.ipretriever.ipRetriever import IPRetriever
+from python_ifconfig_me.core.ipretriever.simpleTextIPRetriever import (
+    SimpleTextIPRetriever,
+)
+from python_ifconfig_me.core.watch import WatchOptions, watchPublicIPAsync
+from python_ifconfig_me.testing.echoServer import EchoServer
+from tests.mocks import MockResponse
+
+
+@pytest.mark.asyncio
+@patch("aiohttp.ClientSession.get")
+async def test_watch_emits_only_changes_and_backs_off(mock_get):
+    mock_get.side_effect = [
+        MockResponse("127.0.0.1", 200),
+        MockResponse("127.0.0.1", 200),
+        MockResponse("127.0.0.1", 500),
+        MockResponse("127.0.0.1", 200),
+        MockResponse("127.0.0.2", 200),
+    ]
+    retrievers: List[IPRetriever] = [SimpleTextIPRetriever("example.com")]
+    sleeps = []
+
+    async def sleep(interval):
+        sleeps.append(interval)
+
+    watchOptions = WatchOptions(min_interval=1, max_interval=3, backoff_factor=2)
+    async with PublicIPClient(ipRetrievers=retrievers) as client:
+        events = []
+        async for event in watchPublicIPAsync(
+            watchOptions=watchOptions, client=client, sleep=sleep
+        ):
+            events.append(event)
+            if len(events) == 2:
+                break
+        assert not client.getSession().closed
+
+    assert [(e.previousIP, e.ip) for e in events] == [
+        (None, "127.0.0.1"),
+        ("127.0.0.1", "127.0.0.2"),
+    ]
+    assert sleeps == [1, 2, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_watch_cli_keeps_the_scoreboard_and_metrics(tmp_path, capsys):
+    scoreboardFile = tmp_path / "scoreboard.json"
+    metricsFile = tmp_path / "metrics.prom"
+    async with EchoServer(ip="203.0.113.7", host="127.0.0.1") as server:
+        retrieversFile = tmp_path / "retrievers.json"
+        retrieversFile.write_text(f'{{"retrievers": [{{"url": "{server.url()}"}}]}}')
+        args = getArgs(
+            [
+                "--watch",
+                "--retrievers-file",
+                str(retrieversFile),
+                "--scoreboard-file",
+                str(scoreboardFile),
+                "--metrics-file",
+                str(metricsFile),
+                "--voting-strategy",
+                "reliability",
+            ]
+        )
+        assert args is not None
+
+        # The watch runs until it is interrupted, after the first lookup.
+        task = asyncio.ensure_future(mainAsync(args))
+        output = ""
+        while "203.0.113.7" not in output:
+            await asyncio.sleep(0.01)
+            output += capsys.readouterr().out
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert scoreboardFile.exists()
+    assert "ifconfig_me_" in metricsFile.read_text()